@@ -1,9 +1,15 @@
 """Initialize Flask app."""
 
+import atexit
 import os
 
 import A2.adapters.repository as repo
+from A2 import prefork
+from A2.adapters.data_watcher import DataWatcher
+from A2.adapters.database_repository import SqliteRepository
+from A2.adapters.journal import Journal, compact_journal, replay_journal
 from A2.adapters.memory_repository import MemoryRepository, populate
+from A2.adapters.versioned_repository import VersionedRepository
 from flask import Flask
 
 
@@ -22,9 +28,51 @@ def create_app(test_config=None):
         app.config.from_mapping(test_config)
         data_path = app.config['TEST_DATA_PATH']
 
-    # Create the MemoryRepository implementation for a memory-based repository.
-    repo.repo_instance = MemoryRepository()
-    populate(data_path, repo.repo_instance)
+    if app.config.get('REPOSITORY', 'memory') == 'sqlite':
+        # Create the SqliteRepository implementation for a database-backed repository.
+        repo.repo_instance = SqliteRepository(app.config['SQLITE_DATABASE_PATH'])
+        snapshot_path = None
+    else:
+        # Create the MemoryRepository implementation for a memory-based repository.
+        repo.repo_instance = MemoryRepository()
+        snapshot_path = app.config.get('SNAPSHOT_PATH')
+
+    if repo.repo_instance.get_number_of_movies() > 0:
+        # The database was populated by an earlier run.
+        app.logger.info('Using the %d movies already in the repository', repo.repo_instance.get_number_of_movies())
+    else:
+        timings = populate(data_path, repo.repo_instance, snapshot_path, app.config.get('PASSWORD_HASH_METHOD'))
+        source = 'data files' if 'movies' in timings else f'snapshot {snapshot_path}'
+        app.logger.info('Populated repository from %s in %.3fs (%s)', source, sum(timings.values()),
+                        ', '.join(f'{phase} {seconds:.3f}s' for phase, seconds in timings.items()))
+
+    if app.config.get('JOURNAL_PATH') and isinstance(repo.repo_instance, MemoryRepository):
+        # Add the Users and Comments recorded since the data files were last compacted, then record new ones.
+        journal_path = app.config['JOURNAL_PATH']
+        added = replay_journal(journal_path, repo.repo_instance)
+        app.logger.info('Replayed %d users and %d comments from journal %s', added['users'], added['comments'],
+                        journal_path)
+
+        journal = Journal(journal_path, app.config['JOURNAL_SYNC_BATCH'])
+        if journal.size() >= app.config['JOURNAL_COMPACT_BYTES']:
+            compact_journal(data_path, repo.repo_instance, journal)
+            app.logger.info('Compacted journal %s into the data files', journal_path)
+        repo.repo_instance.attach_journal(journal)
+        atexit.register(journal.close)
+
+    watch_data = app.config.get('WATCH_DATA') and isinstance(repo.repo_instance, MemoryRepository)
+    if (app.config.get('THREAD_SAFE_REPOSITORY') or watch_data) and isinstance(repo.repo_instance, MemoryRepository):
+        # Let request threads read without locks while writes, including the data watcher's, publish new versions.
+        # The watcher writes from its own thread, so it's only run over versions.
+        repo.repo_instance = VersionedRepository(repo.repo_instance)
+
+    if watch_data:
+        # Apply edits to the data files as they're made, rather than on the next start. A preloading master leaves the
+        # watcher to the workers it forks.
+        app.data_watcher = DataWatcher(data_path, repo.repo_instance, app.config['WATCH_INTERVAL'],
+                                       app.config.get('PASSWORD_HASH_METHOD'))
+        if not prefork.preloading:
+            app.data_watcher.start()
 
     # Build the application - these steps require an application context.
     with app.app_context():
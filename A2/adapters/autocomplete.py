@@ -0,0 +1,107 @@
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Tuple
+
+import numpy as np
+
+# The largest number of completions returned for a prefix.
+MAX_COMPLETIONS = 10
+
+# Prefixes matching more keys than this have their completions computed when the index is built, so no query has to
+# rank more than this many keys.
+CACHE_THRESHOLD = 256
+
+# Sorts after every character, so that prefix + HIGHEST_CHARACTER bounds all keys starting with prefix.
+HIGHEST_CHARACTER = '\U0010ffff'
+
+
+class PrefixIndex:
+    """ Completes prefixes of names, returning the highest weighted names first.
+
+    Every name is indexed from the start of each of its words, so 'pra' completes 'chris pratt'. Keys are kept in a
+    sorted array searched with bisect; prefixes shared by many keys have their best completions precomputed.
+    """
+
+    def __init__(self, entries: Iterable[Tuple[str, str, float]]):
+        # entries holds (name, kind, weight) triples, e.g. ('chris pratt', 'actor', 1.2e6).
+        self._names: List[str] = list()
+        self._kinds: List[str] = list()
+        weights = list()
+        keys = list()
+        key_entries = list()
+        for entry, (name, kind, weight) in enumerate(entries):
+            self._names.append(name)
+            self._kinds.append(kind)
+            weights.append(weight)
+            name_keys = word_suffixes(name)
+            keys.extend(name_keys)
+            key_entries.extend([entry] * len(name_keys))
+
+        order = sorted(range(len(keys)), key=keys.__getitem__)
+        self._keys: List[str] = [keys[position] for position in order]
+        self._entries = np.array(key_entries, dtype=np.int64)[np.array(order, dtype=np.int64)]
+        self._weights = np.array(weights, dtype=np.float64)
+        self._cache: Dict[str, List[int]] = dict()
+        self._cache_popular_prefixes()
+
+    def __len__(self):
+        return len(self._names)
+
+    def complete(self, prefix: str, k: int = MAX_COMPLETIONS) -> List[Tuple[str, str]]:
+        """ Returns up to k (name, kind) pairs whose names have a word starting with prefix, by descending weight. """
+        prefix = normalize(prefix)
+        k = min(k, MAX_COMPLETIONS)
+        if len(prefix) == 0 or k <= 0:
+            return list()
+
+        entries = self._cache.get(prefix)
+        if entries is None:
+            entries = self._best_entries(*self._key_range(prefix))
+        return [(self._names[entry], self._kinds[entry]) for entry in entries[:k]]
+
+    def _key_range(self, prefix: str, lo: int = 0, hi: int = None) -> Tuple[int, int]:
+        hi = len(self._keys) if hi is None else hi
+        first = bisect_left(self._keys, prefix, lo, hi)
+        last = bisect_left(self._keys, prefix + HIGHEST_CHARACTER, first, hi)
+        return first, last
+
+    def _best_entries(self, first: int, last: int) -> List[int]:
+        # Rank the entries of keys[first:last] by weight, dropping repeats of an entry matched through several words.
+        entries = self._entries[first:last]
+        order = np.argsort(-self._weights[entries], kind='stable')
+        best = list()
+        for entry in entries[order].tolist():
+            if entry not in best:
+                best.append(entry)
+                if len(best) == MAX_COMPLETIONS:
+                    break
+        return best
+
+    def _cache_popular_prefixes(self):
+        # Walk down from one-character prefixes, extending only the prefixes that match too many keys to rank at
+        # query time. Each step bisects past a whole group of keys sharing the next character.
+        popular = [('', 0, len(self._keys))]
+        while len(popular) > 0:
+            parent, lo, hi = popular.pop()
+            length = len(parent) + 1
+            while lo < hi:
+                key = self._keys[lo]
+                if len(key) < length:
+                    # The key is the parent prefix itself.
+                    lo += 1
+                    continue
+                prefix = key[:length]
+                first, last = self._key_range(prefix, lo, hi)
+                if last - first > CACHE_THRESHOLD:
+                    self._cache[prefix] = self._best_entries(first, last)
+                    popular.append((prefix, first, last))
+                lo = last
+
+
+def normalize(name: str) -> str:
+    return ' '.join(name.lower().split())
+
+
+def word_suffixes(name: str) -> List[str]:
+    # The normalized name from the start of each of its words.
+    words = name.lower().split()
+    return [' '.join(words[start:]) for start in range(len(words))]
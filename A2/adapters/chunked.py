@@ -0,0 +1,216 @@
+from collections.abc import MutableMapping
+from itertools import chain
+from typing import Iterable
+
+# Items per chunk of a ChunkedList, and the entries per shard above which a ChunkedDict doubles its shards.
+CHUNK_SIZE = 512
+SHARD_SIZE = 512
+
+MISSING = object()
+
+
+class ChunkedList:
+    """ A list stored as chunks of CHUNK_SIZE items, which a copy shares with the original.
+
+    copy.copy copies the list of chunks, but not the chunks themselves. After that, each copy copies a chunk before it
+    first changes it. So appending to a copy, or replacing one of its items, costs about one chunk rather than the
+    whole list. Inserting or deleting an item rechunks the items after it.
+    """
+    __slots__ = ('_chunks', '_owned', '_length')
+
+    def __init__(self, items: Iterable = ()):
+        self.assign(list(items))
+
+    def __len__(self):
+        return self._length
+
+    def __iter__(self):
+        return chain.from_iterable(self._chunks)
+
+    def __contains__(self, value):
+        return any(value in chunk for chunk in self._chunks)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(self._length)
+            if step != 1:
+                return list(self)[index]
+            items = list()
+            while start < stop:
+                chunk = self._chunks[start // CHUNK_SIZE]
+                offset = start % CHUNK_SIZE
+                items.extend(chunk[offset:offset + stop - start])
+                start += len(chunk) - offset
+            return items
+        chunk, offset = divmod(self.position(index), CHUNK_SIZE)
+        return self._chunks[chunk][offset]
+
+    def __setitem__(self, index: int, value):
+        chunk, offset = divmod(self.position(index), CHUNK_SIZE)
+        self.writable_chunk(chunk)[offset] = value
+
+    def __delitem__(self, index: int):
+        index = self.position(index)
+        first = index // CHUNK_SIZE
+        tail = list(chain.from_iterable(self._chunks[first:]))
+        del tail[index - first * CHUNK_SIZE]
+        self.replace_tail(first, tail)
+
+    def __copy__(self) -> 'ChunkedList':
+        copied = ChunkedList.__new__(ChunkedList)
+        copied._chunks = list(self._chunks)
+        copied._length = self._length
+        copied._owned = [False] * len(self._chunks)
+        self._owned = [False] * len(self._chunks)
+        return copied
+
+    def __reduce__(self):
+        return ChunkedList, (list(self),)
+
+    def __repr__(self):
+        return f'ChunkedList({list(self)!r})'
+
+    def append(self, value):
+        if self._length % CHUNK_SIZE == 0:
+            self._chunks.append([value])
+            self._owned.append(True)
+        else:
+            self.writable_chunk(len(self._chunks) - 1).append(value)
+        self._length += 1
+
+    def extend(self, values: Iterable):
+        for value in values:
+            self.append(value)
+
+    def insert(self, index: int, value):
+        # Clamp index as list.insert does.
+        index = min(max(index + self._length if index < 0 else index, 0), self._length)
+        first = index // CHUNK_SIZE
+        tail = list(chain.from_iterable(self._chunks[first:]))
+        tail.insert(index - first * CHUNK_SIZE, value)
+        self.replace_tail(first, tail)
+
+    def sort(self, key=None, reverse: bool = False):
+        items = list(self)
+        items.sort(key=key, reverse=reverse)
+        self.assign(items)
+
+    # Helper method to check index and make it non-negative, as list indexing does.
+    def position(self, index: int) -> int:
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError('ChunkedList index out of range')
+        return index
+
+    # Helper methods to replace every chunk, or every chunk from first on, with new chunks of items.
+    def assign(self, items: list):
+        self._chunks = list()
+        self._owned = list()
+        self._length = 0
+        self.replace_tail(0, items)
+
+    def replace_tail(self, first: int, items: list):
+        del self._chunks[first:]
+        del self._owned[first:]
+        self._chunks.extend(items[start:start + CHUNK_SIZE] for start in range(0, len(items), CHUNK_SIZE))
+        self._owned.extend([True] * (len(self._chunks) - first))
+        self._length = first * CHUNK_SIZE + len(items)
+
+    def writable_chunk(self, chunk: int) -> list:
+        if not self._owned[chunk]:
+            self._chunks[chunk] = list(self._chunks[chunk])
+            self._owned[chunk] = True
+        return self._chunks[chunk]
+
+
+class ChunkedDict(MutableMapping):
+    """ A dict split by key hash into shards, which a copy shares with the original.
+
+    As with ChunkedList, copy.copy copies the list of shards, and each copy copies a shard before it first changes it,
+    so setting or removing an entry of a copy costs about a shard. The shards double in number whenever they average
+    more than SHARD_SIZE entries. Entries are iterated shard by shard, rather than in the order they were added.
+    """
+    __slots__ = ('_shards', '_owned', '_length')
+
+    def __init__(self, entries=()):
+        self._shards = [dict()]
+        self._owned = [True]
+        self._length = 0
+        self.update(entries)
+
+    def __len__(self):
+        return self._length
+
+    def __iter__(self):
+        return chain.from_iterable(self._shards)
+
+    def __contains__(self, key):
+        return key in self._shards[hash(key) & (len(self._shards) - 1)]
+
+    def __getitem__(self, key):
+        return self._shards[hash(key) & (len(self._shards) - 1)][key]
+
+    def get(self, key, default=None):
+        return self._shards[hash(key) & (len(self._shards) - 1)].get(key, default)
+
+    def __setitem__(self, key, value):
+        shard = self.writable_shard(hash(key) & (len(self._shards) - 1))
+        if key not in shard:
+            self._length += 1
+        shard[key] = value
+        if self._length > SHARD_SIZE * len(self._shards):
+            self.grow()
+
+    def __delitem__(self, key):
+        position = hash(key) & (len(self._shards) - 1)
+        if key not in self._shards[position]:
+            raise KeyError(key)
+        del self.writable_shard(position)[key]
+        self._length -= 1
+
+    def setdefault(self, key, default=None):
+        value = self.get(key, MISSING)
+        if value is MISSING:
+            self[key] = value = default
+        return value
+
+    def pop(self, key, default=MISSING):
+        value = self.get(key, MISSING)
+        if value is MISSING:
+            if default is MISSING:
+                raise KeyError(key)
+            return default
+        del self[key]
+        return value
+
+    def __copy__(self) -> 'ChunkedDict':
+        copied = ChunkedDict.__new__(ChunkedDict)
+        copied._shards = list(self._shards)
+        copied._length = self._length
+        copied._owned = [False] * len(self._shards)
+        self._owned = [False] * len(self._shards)
+        return copied
+
+    def __reduce__(self):
+        # Shards depend on hash(), which differs between processes for str keys, so only the entries are pickled.
+        return ChunkedDict, (dict(chain.from_iterable(shard.items() for shard in self._shards)),)
+
+    def __repr__(self):
+        return f'ChunkedDict({dict(self.items())!r})'
+
+    # Helper method to spread the entries over twice as many shards.
+    def grow(self):
+        shards = [dict() for _ in range(2 * len(self._shards))]
+        mask = len(shards) - 1
+        for shard in self._shards:
+            for key, value in shard.items():
+                shards[hash(key) & mask][key] = value
+        self._shards = shards
+        self._owned = [True] * len(shards)
+
+    def writable_shard(self, position: int) -> dict:
+        if not self._owned[position]:
+            self._shards[position] = dict(self._shards[position])
+            self._owned[position] = True
+        return self._shards[position]
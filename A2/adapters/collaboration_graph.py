@@ -0,0 +1,114 @@
+from array import array
+from typing import Dict, Iterable, List, Tuple
+
+import numpy as np
+
+# Slots in a search's arrays of parents: not reached yet, and the person the search started from.
+UNREACHED = -1
+START = -2
+
+
+class CollaborationGraph:
+    """ The actors and directors who worked on the same Movies, as a graph in compressed sparse row form.
+
+    People are (name, kind) pairs numbered from 0, kind being 'actor' or 'director'. The neighbours of person i are
+    neighbours[offsets[i]:offsets[i + 1]], with weights the number of Movies they shared, ordered by weight descending
+    and then by name. Searches expand a whole frontier at a time with array operations, from whichever end of the
+    search has the smaller frontier.
+    """
+
+    def __init__(self, credits: Iterable[List[Tuple[str, str]]]):
+        # credits lists the people of each Movie. People are numbered in order, so ties are broken by name.
+        credits = [list(dict.fromkeys(people)) for people in credits]
+        self._people: List[Tuple[str, str]] = sorted({person for people in credits for person in people})
+        self._numbers: Dict[Tuple[str, str], int] = {person: number for number, person in enumerate(self._people)}
+        sources = array('q')
+        targets = array('q')
+        for people in credits:
+            numbers = [self._numbers[person] for person in people]
+            for position, first in enumerate(numbers):
+                for second in numbers[position + 1:]:
+                    sources.extend((first, second))
+                    targets.extend((second, first))
+
+        # Count each pair's shared Movies, then order the pairs by person, weight descending and neighbour.
+        size = len(self._people)
+        pairs, weights = np.unique(np.frombuffer(sources, dtype=np.int64) * size +
+                                   np.frombuffer(targets, dtype=np.int64), return_counts=True)
+        sources, targets = np.divmod(pairs, max(size, 1))
+        order = np.lexsort((targets, -weights, sources))
+        self._neighbours = targets[order].astype(np.int32)
+        self._weights = weights[order].astype(np.int32)
+        self._offsets = np.zeros(size + 1, dtype=np.int64)
+        np.cumsum(np.bincount(sources, minlength=size), out=self._offsets[1:])
+
+    def __len__(self):
+        return len(self._people)
+
+    def edge_count(self) -> int:
+        # Each collaboration is stored once in each direction.
+        return len(self._neighbours) // 2
+
+    def top_collaborators(self, person: Tuple[str, str], quantity: int = 10) -> List[Tuple[str, str, int]]:
+        """ Returns up to quantity (name, kind, shared Movies) triples for the people person worked with most. """
+        number = self._numbers.get(person)
+        if number is None:
+            return list()
+        start = self._offsets[number]
+        end = min(self._offsets[number + 1], start + max(quantity, 0))
+        return [self._people[neighbour] + (weight,)
+                for neighbour, weight in zip(self._neighbours[start:end].tolist(), self._weights[start:end].tolist())]
+
+    def shortest_path(self, first: Tuple[str, str], second: Tuple[str, str]) -> List[Tuple[str, str]]:
+        """ Returns the people on a shortest chain of collaborations from first to second, both included, or an empty
+        list if they aren't connected. """
+        source = self._numbers.get(first)
+        target = self._numbers.get(second)
+        if source is None or target is None:
+            return list()
+        if source == target:
+            return [first]
+
+        # Each search records the person it reached each person from.
+        parents = [np.full(len(self._people), UNREACHED, dtype=np.int32) for _ in range(2)]
+        parents[0][source] = START
+        parents[1][target] = START
+        frontiers = [np.array([source]), np.array([target])]
+
+        while len(frontiers[0]) > 0 and len(frontiers[1]) > 0:
+            # Expand the search whose frontier has fewer collaborations to follow.
+            side = 0 if self._degree(frontiers[0]) <= self._degree(frontiers[1]) else 1
+            reached, reached_from = self._expand(frontiers[side])
+
+            # Keep the people this search reaches for the first time, each with the first person it reached them from.
+            new = parents[side][reached] == UNREACHED
+            reached, first_positions = np.unique(reached[new], return_index=True)
+            parents[side][reached] = reached_from[new][first_positions]
+            frontiers[side] = reached
+
+            met = reached[parents[1 - side][reached] != UNREACHED]
+            if len(met) > 0:
+                return self._path(parents, int(met[0]))
+        return list()
+
+    def _degree(self, frontier: np.ndarray) -> int:
+        return int((self._offsets[frontier + 1] - self._offsets[frontier]).sum())
+
+    def _expand(self, frontier: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        # Return the neighbours of every person in frontier, with the person each was reached from.
+        starts = self._offsets[frontier]
+        lengths = self._offsets[frontier + 1] - starts
+        positions = np.arange(lengths.sum()) + np.repeat(starts - np.cumsum(lengths) + lengths, lengths)
+        return self._neighbours[positions], np.repeat(frontier, lengths)
+
+    def _path(self, parents: List[np.ndarray], meeting: int) -> List[Tuple[str, str]]:
+        # Follow each search's parents back from the person where the searches met.
+        halves = list()
+        for side in range(2):
+            half = list()
+            number = meeting
+            while number != START:
+                half.append(number)
+                number = int(parents[side][number])
+            halves.append(half)
+        return [self._people[number] for number in halves[0][::-1] + halves[1][1:]]
@@ -0,0 +1,109 @@
+import csv
+import logging
+import os
+import threading
+from typing import Dict, Tuple
+
+from A2.adapters.memory_repository import MemoryRepository, hash_passwords, read_movie_records, read_user_rows
+from A2.domain.model import User
+
+# Seconds between checks of the data files.
+POLL_INTERVAL = 2.0
+
+logger = logging.getLogger(__name__)
+
+
+class DataWatcher(threading.Thread):
+    """ Watches the data directory, applying edits to Data1000Movies.csv and users.csv to a running MemoryRepository.
+
+    Files are polled for a change of size or modification time. A changed movie file is diffed row by row against
+    the Movies the repository holds, and a changed users file against the rows last read, so only the rows that
+    differ are applied. Requests carry on while a file is read and diffed; a file that can't be read, e.g. because
+    it's part way through being written, is tried again at the next check.
+    """
+
+    def __init__(self, data_path: str, repo: MemoryRepository, interval: float = POLL_INTERVAL,
+                 password_method: str = None):
+        super().__init__(name='data-watcher', daemon=True)
+        self._data_path = data_path
+        self._repo = repo
+        self._interval = interval
+        self._password_method = password_method
+        self._stopped = threading.Event()
+
+        self._reloaders = {
+            'Data1000Movies.csv': self.reload_movies,
+            'users.csv': self.reload_users
+        }
+        self._signatures = {filename: self.file_signature(filename) for filename in self._reloaders}
+        self._user_rows = {username: (password, password_hash)
+                           for _, username, password, password_hash in read_user_rows(data_path)}
+
+    def restarted(self) -> 'DataWatcher':
+        """ Returns a started watcher carrying on from this one, for a process forked after this one was started, in
+        which its thread doesn't run. """
+        watcher = DataWatcher(self._data_path, self._repo, self._interval, self._password_method)
+        watcher._signatures = dict(self._signatures)
+        watcher._user_rows = dict(self._user_rows)
+        watcher.start()
+        return watcher
+
+    def run(self):
+        while not self._stopped.wait(self._interval):
+            self.check()
+
+    def stop(self):
+        self._stopped.set()
+
+    def check(self) -> Dict[str, Dict[str, int]]:
+        """ Applies any changes to the data files since the last check, returning the counts of changed rows for each
+        file that changed. """
+        changes = dict()
+        for filename, reload in self._reloaders.items():
+            signature = self.file_signature(filename)
+            if signature == self._signatures[filename]:
+                continue
+
+            try:
+                changes[filename] = reload()
+            except (OSError, ValueError, IndexError, csv.Error) as exception:
+                logger.warning('Could not reload %s, will retry: %s', filename, exception)
+                continue
+            self._signatures[filename] = signature
+            logger.info('Reloaded %s: %s', filename,
+                        ', '.join(f'{count} {change}' for change, count in changes[filename].items()))
+        return changes
+
+    def reload_movies(self) -> Dict[str, int]:
+        records = read_movie_records(os.path.join(self._data_path, 'Data1000Movies.csv'))
+        return self._repo.apply_movie_records(records)
+
+    def reload_users(self) -> Dict[str, int]:
+        rows = {username: (password, password_hash)
+                for _, username, password, password_hash in read_user_rows(self._data_path)}
+        added = [username for username in rows if username not in self._user_rows]
+        removed = [username for username in self._user_rows if username not in rows]
+        changed = [username for username in rows if username in self._user_rows and
+                   rows[username] != self._user_rows[username]]
+
+        # Hash the new passwords before touching the repository, then apply the whole diff in one write, so that
+        # Users are replaced without a gap.
+        updated = added + changed
+        plaintext = [rows[username][0] for username in updated if rows[username][1] is None]
+        new_hashes = iter(hash_passwords(plaintext, self._password_method))
+        password_hashes = [rows[username][1] if rows[username][1] is not None else next(new_hashes)
+                           for username in updated]
+
+        if len(updated) > 0 or len(removed) > 0:
+            self._repo.apply_user_changes([User(username, password_hash)
+                                           for username, password_hash in zip(updated, password_hashes)], removed)
+
+        self._user_rows = rows
+        return {'added': len(added), 'changed': len(changed), 'removed': len(removed)}
+
+    def file_signature(self, filename: str) -> Tuple[int, int]:
+        try:
+            status = os.stat(os.path.join(self._data_path, filename))
+        except FileNotFoundError:
+            return 0, 0
+        return status.st_mtime_ns, status.st_size
@@ -0,0 +1,834 @@
+import json
+import math
+import sqlite3
+import threading
+import weakref
+from datetime import datetime
+from typing import Dict, Iterable, List, Tuple
+
+import numpy as np
+
+from A2.adapters.autocomplete import MAX_COMPLETIONS, PrefixIndex
+from A2.adapters.collaboration_graph import CollaborationGraph
+from A2.adapters.full_text import RelatedDescriptions, tokenize
+from A2.adapters.fuzzy import FuzzyNameIndex
+from A2.adapters.memory_repository import intersect_movie_ids, normalize_username, title_terms
+from A2.adapters.movie_columns import LEADERBOARD_ATTRIBUTES, numeric_value
+from A2.adapters.repository import AbstractRepository, RepositoryException
+from A2.adapters.similarity import SimilarityIndex
+from A2.domain.model import Movie, Actor, User, Director, Genre, Comment, make_genre_association, \
+    make_director_association, make_actor_association
+
+# Compiled statements kept by each connection, so repeated queries skip parsing and planning.
+STATEMENT_CACHE_SIZE = 256
+
+# Seconds a connection waits for another connection's write lock before giving up.
+BUSY_TIMEOUT = 30
+
+# Numeric Movie attributes and the columns holding their values, with NULL for unknown values.
+ATTRIBUTE_COLUMNS = {
+    'rating': 'rating',
+    'votes': 'votes',
+    'runtime_minutes': 'runtime_minutes',
+    'metascore': 'metascore_value',
+    'revenue': 'revenue_value'
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    id INTEGER PRIMARY KEY,
+    username TEXT NOT NULL UNIQUE,
+    normalized_username TEXT,
+    password TEXT
+);
+CREATE INDEX IF NOT EXISTS users_normalized_username ON users (normalized_username, id);
+
+CREATE TABLE IF NOT EXISTS genres (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+
+CREATE TABLE IF NOT EXISTS directors (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+
+CREATE TABLE IF NOT EXISTS actors (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+
+-- Each word of a director's or actor's name, for partial name searches.
+CREATE TABLE IF NOT EXISTS name_tokens (
+    kind TEXT NOT NULL,
+    token TEXT NOT NULL,
+    entity_id INTEGER NOT NULL,
+    PRIMARY KEY (kind, token, entity_id)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS movies (
+    id INTEGER PRIMARY KEY,
+    title TEXT,
+    year INTEGER,
+    description TEXT,
+    director_id INTEGER REFERENCES directors (id),
+    runtime_minutes INTEGER,
+    rating REAL,
+    votes REAL,
+    revenue TEXT,
+    revenue_value REAL,
+    metascore TEXT,
+    metascore_value REAL,
+    image_hyperlink TEXT
+);
+CREATE INDEX IF NOT EXISTS movies_title ON movies (title, year);
+CREATE INDEX IF NOT EXISTS movies_year ON movies (year, id);
+CREATE INDEX IF NOT EXISTS movies_director ON movies (director_id, id);
+CREATE INDEX IF NOT EXISTS movies_rating ON movies (rating);
+CREATE INDEX IF NOT EXISTS movies_rating_leaderboard ON movies (rating DESC, id);
+CREATE INDEX IF NOT EXISTS movies_votes_leaderboard ON movies (votes DESC, id);
+CREATE INDEX IF NOT EXISTS movies_revenue_leaderboard ON movies (revenue_value DESC, id);
+CREATE INDEX IF NOT EXISTS movies_runtime_minutes_leaderboard ON movies (runtime_minutes DESC, id);
+
+CREATE TABLE IF NOT EXISTS movie_genres (
+    movie_id INTEGER NOT NULL REFERENCES movies (id),
+    genre_id INTEGER NOT NULL REFERENCES genres (id),
+    PRIMARY KEY (movie_id, genre_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS movie_genres_genre ON movie_genres (genre_id, movie_id);
+
+CREATE TABLE IF NOT EXISTS movie_actors (
+    movie_id INTEGER NOT NULL REFERENCES movies (id),
+    actor_id INTEGER NOT NULL REFERENCES actors (id),
+    position INTEGER NOT NULL,
+    PRIMARY KEY (movie_id, actor_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS movie_actors_actor ON movie_actors (actor_id, movie_id);
+
+-- Each term of a title with its position, for term and phrase searches.
+CREATE TABLE IF NOT EXISTS title_terms (
+    term TEXT NOT NULL,
+    movie_id INTEGER NOT NULL REFERENCES movies (id),
+    position INTEGER NOT NULL,
+    PRIMARY KEY (term, movie_id, position)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS title_terms_movie ON title_terms (movie_id);
+
+CREATE TABLE IF NOT EXISTS years (
+    year INTEGER PRIMARY KEY
+);
+
+CREATE TABLE IF NOT EXISTS comments (
+    id INTEGER PRIMARY KEY,
+    username TEXT REFERENCES users (username),
+    movie_id INTEGER REFERENCES movies (id),
+    comment TEXT,
+    timestamp TEXT
+);
+CREATE INDEX IF NOT EXISTS comments_movie ON comments (movie_id, id);
+
+-- Descriptions, without stop words, ranked with FTS5's BM25. The rowid is the Movie id.
+CREATE VIRTUAL TABLE IF NOT EXISTS descriptions USING fts5 (description);
+"""
+
+MOVIE_SELECT = """
+SELECT m.id, m.title, m.year, m.description, m.runtime_minutes, m.rating, m.votes, m.revenue, m.metascore,
+       m.image_hyperlink, d.name
+FROM movies m LEFT JOIN directors d ON d.id = m.director_id
+WHERE m.id IN (SELECT value FROM json_each(?))
+"""
+
+
+class ThreadConnection:
+    """ Holds a thread's connection, so that the connection is released once the thread's local data is. """
+    __slots__ = ('connection', '__weakref__')
+
+    def __init__(self, connection: sqlite3.Connection):
+        self.connection = connection
+
+
+def release_connection(connection: sqlite3.Connection, connections: List[sqlite3.Connection], lock: threading.RLock):
+    # Close a connection whose thread has ended, unless close() has already closed it.
+    with lock:
+        if connection in connections:
+            connections.remove(connection)
+            connection.close()
+
+
+class SqliteRepository(AbstractRepository):
+    """ A repository stored in a SQLite database file, so that its contents outlive the process and needn't fit in
+    memory.
+
+    Each thread gets its own connection, opened on first use and closed when the thread ends; the database is in WAL
+    mode so readers don't block the writer. Domain objects are built from rows on demand and tracked in identity maps, so while a Movie or User is in
+    use, every lookup returns that same object. A Movie's Genres, Director and Actors only list the Movies loaded
+    alongside it, while get_genres, get_directors and get_actors return them with all their Movies.
+    """
+
+    def __init__(self, database_path: str):
+        self._database_path = database_path
+        self._local = threading.local()
+        self._connections = list()
+        self._lock = threading.RLock()
+        self._movies_map = weakref.WeakValueDictionary()
+        self._users_map = weakref.WeakValueDictionary()
+
+        # Built by build_name_indexes, and discarded whenever a name is added.
+        self._prefix_index = None
+        self._fuzzy_index = None
+        self._collaboration_graph = None
+        self._similarity_index = None
+        self._related_descriptions = None
+
+        self._connection().executescript(SCHEMA)
+
+    def close(self):
+        """ Closes every connection opened by the repository. """
+        with self._lock:
+            for connection in self._connections:
+                connection.close()
+            self._connections.clear()
+            self._local = threading.local()
+
+    def add_user(self, user: User):
+        connection = self._connection()
+        with self._lock, connection:
+            # The first User registered under a name wins, as it does in MemoryRepository.
+            cursor = connection.execute(
+                'INSERT OR IGNORE INTO users (username, normalized_username, password) VALUES (?, ?, ?)',
+                (user.username, normalize_username(user.username), user.password))
+            if cursor.rowcount > 0:
+                self._users_map[user.username] = user
+
+    def get_user(self, username, ignore_case: bool = False) -> User:
+        if ignore_case:
+            row = self._connection().execute(
+                'SELECT username FROM users WHERE normalized_username = ? ORDER BY id LIMIT 1',
+                (normalize_username(username),)).fetchone()
+            if row is None:
+                return None
+            username = row[0]
+        return self._load_users([username]).get(username)
+
+    def is_username_available(self, username, ignore_case: bool = False) -> bool:
+        if ignore_case:
+            row = self._connection().execute('SELECT 1 FROM users WHERE normalized_username = ?',
+                                             (normalize_username(username),)).fetchone()
+        else:
+            row = self._connection().execute('SELECT 1 FROM users WHERE username = ?', (username,)).fetchone()
+        return row is None
+
+    def get_users(self):
+        usernames = [row[0] for row in self._connection().execute('SELECT username FROM users ORDER BY id')]
+        users = self._load_users(usernames)
+        return [users[username] for username in usernames]
+
+    def add_movie(self, movie: Movie):
+        self.add_movies([movie])
+
+    def add_movies(self, movies: Iterable[Movie]):
+        movies = list(movies)
+        connection = self._connection()
+        with self._lock, connection:
+            movie_ids = [(movie.id,) for movie in movies]
+            connection.executemany('DELETE FROM title_terms WHERE movie_id = ?', movie_ids)
+            connection.executemany('DELETE FROM descriptions WHERE rowid = ?', movie_ids)
+
+            connection.executemany(
+                'INSERT OR REPLACE INTO movies (id, title, year, description, runtime_minutes, rating, votes, revenue, '
+                'revenue_value, metascore, metascore_value, image_hyperlink) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                (movie_row(movie) for movie in movies))
+            connection.executemany('INSERT INTO title_terms (term, movie_id, position) VALUES (?, ?, ?)',
+                                   ((term, movie.id, position) for movie in movies
+                                    for position, term in enumerate(title_terms(movie.title))))
+            connection.executemany('INSERT INTO descriptions (rowid, description) VALUES (?, ?)',
+                                   ((movie.id, ' '.join(tokenize(movie.description))) for movie in movies))
+            connection.executemany('INSERT OR IGNORE INTO years (year) VALUES (?)',
+                                   ((movie.date,) for movie in movies if movie.date is not None))
+
+            # Store any associations the Movies already have.
+            for movie in movies:
+                for genre in movie.genres:
+                    self._link_genre(connection, genre.genre_name, [movie])
+                if movie.director is not None:
+                    self._link_director(connection, movie.director.director_full_name, [movie])
+                for actor in movie.actors:
+                    self._link_actor(connection, actor.actor_full_name, [movie])
+
+            for movie in movies:
+                self._movies_map[movie.id] = movie
+            self.discard_name_indexes()
+
+    def get_movie(self, movie_id: int) -> Movie:
+        return self._load_movies([movie_id]).get(movie_id)
+
+    def get_number_of_movies(self):
+        return self._connection().execute('SELECT COUNT(*) FROM movies').fetchone()[0]
+
+    def get_first_movie(self):
+        movie_id = self._connection().execute('SELECT MIN(id) FROM movies').fetchone()[0]
+        return self.get_movie(movie_id) if movie_id is not None else None
+
+    def get_last_movie(self):
+        movie_id = self._connection().execute('SELECT MAX(id) FROM movies').fetchone()[0]
+        return self.get_movie(movie_id) if movie_id is not None else None
+
+    def get_movies_by_id(self, id_list):
+        # Strip out any ids in id_list that don't represent Movie ids in the repository.
+        movies = self._load_movies(id_list)
+        return [movies[movie_id] for movie_id in id_list if movie_id in movies]
+
+    def get_movie_ids_for_genre(self, genre_name: str):
+        rows = self._connection().execute(
+            'SELECT mg.movie_id FROM genres g JOIN movie_genres mg ON mg.genre_id = g.id WHERE g.name = ? '
+            'ORDER BY mg.movie_id', (genre_name,))
+        return [row[0] for row in rows]
+
+    def get_movie_ids_for_director(self, director_name: str):
+        # A full name identifies a single Director; otherwise every Director with director_name as part of their name
+        # matches.
+        director_ids = self._matching_name_ids('directors', 'director', director_name)
+        rows = self._connection().execute(
+            'SELECT id FROM movies WHERE director_id IN (SELECT value FROM json_each(?)) ORDER BY director_id, id',
+            (json.dumps(director_ids),))
+        return [row[0] for row in rows]
+
+    def get_movie_ids_for_actor(self, actor_name: str):
+        # A full name identifies a single Actor; otherwise every Actor with actor_name as part of their name matches.
+        actor_ids = self._matching_name_ids('actors', 'actor', actor_name)
+        rows = self._connection().execute(
+            'SELECT movie_id FROM movie_actors WHERE actor_id IN (SELECT value FROM json_each(?)) '
+            'ORDER BY actor_id, movie_id', (json.dumps(actor_ids),))
+
+        # Drop duplicates, keeping first-seen order.
+        return list(dict.fromkeys(row[0] for row in rows))
+
+    def get_movie_ids_for_title(self, title_name: str, match_phrase: bool = True):
+        terms = title_terms(title_name)
+        if len(terms) == 0:
+            return list()
+
+        if match_phrase:
+            # Join each term to the next one along, at the following position of the same title.
+            joins = ''.join(f' JOIN title_terms t{offset} ON t{offset}.movie_id = t0.movie_id AND '
+                            f't{offset}.position = t0.position + {offset} AND t{offset}.term = ?'
+                            for offset in range(1, len(terms)))
+            query = f'SELECT DISTINCT t0.movie_id FROM title_terms t0{joins} WHERE t0.term = ? ORDER BY t0.movie_id'
+            parameters = terms[1:] + terms[:1]
+        else:
+            query = ' INTERSECT '.join(['SELECT movie_id FROM title_terms WHERE term = ?'] * len(terms))
+            query += ' ORDER BY movie_id'
+            parameters = terms
+
+        return [row[0] for row in self._connection().execute(query, parameters)]
+
+    def get_movie_ids_for_description(self, query: str, quantity: int = 30):
+        terms = list(dict.fromkeys(tokenize(query)))
+        if len(terms) == 0 or quantity <= 0:
+            return list()
+
+        # Quote each term, so FTS5 reads it as a word rather than as query syntax.
+        match = ' OR '.join(f'"{term}"' for term in terms)
+        rows = self._connection().execute(
+            'SELECT rowid FROM descriptions WHERE descriptions MATCH ? ORDER BY bm25(descriptions), rowid LIMIT ?',
+            (match, quantity))
+        return [row[0] for row in rows]
+
+    def get_movie_ids_for_date(self, the_date: str):
+        try:
+            year = int(the_date)
+        except (TypeError, ValueError):
+            # the_date isn't a year, so no movies match.
+            return list()
+
+        rows = self._connection().execute('SELECT id FROM movies WHERE year = ? ORDER BY id', (year,))
+        return [row[0] for row in rows]
+
+    def get_movie_ids_for_date_range(self, start_date: int, end_date: int):
+        rows = self._connection().execute('SELECT id FROM movies WHERE year BETWEEN ? AND ? ORDER BY year, id',
+                                          (start_date, end_date))
+        return [row[0] for row in rows]
+
+    def get_movie_ids_for_attribute_range(self, attribute: str, minimum: float = None, maximum: float = None):
+        column = attribute_column(attribute)
+        conditions = [f'{column} IS NOT NULL']
+        parameters = list()
+        if minimum is not None:
+            conditions.append(f'{column} >= ?')
+            parameters.append(minimum)
+        if maximum is not None:
+            conditions.append(f'{column} <= ?')
+            parameters.append(maximum)
+
+        rows = self._connection().execute(f'SELECT id FROM movies WHERE {" AND ".join(conditions)} ORDER BY id',
+                                          parameters)
+        return [row[0] for row in rows]
+
+    def get_leaderboard_movie_ids(self, attribute: str, cursor: int = 0, quantity: int = 10) -> List[int]:
+        column = leaderboard_column(attribute)
+        rows = self._connection().execute(
+            f'SELECT id FROM movies WHERE {column} IS NOT NULL ORDER BY {column} DESC, id LIMIT ? OFFSET ?',
+            (max(quantity, 0), max(cursor, 0)))
+        return [row[0] for row in rows]
+
+    def get_leaderboard_length(self, attribute: str) -> int:
+        column = leaderboard_column(attribute)
+        return self._connection().execute(f'SELECT COUNT(*) FROM movies WHERE {column} IS NOT NULL').fetchone()[0]
+
+    def get_attribute_mean_by_genre(self, attribute: str) -> Dict[str, float]:
+        column = attribute_column(attribute)
+        rows = self._connection().execute(
+            f'SELECT g.name, AVG(m.{column}) FROM genres g LEFT JOIN movie_genres mg ON mg.genre_id = g.id '
+            f'LEFT JOIN movies m ON m.id = mg.movie_id GROUP BY g.id ORDER BY g.id')
+        return {name: mean if mean is not None else math.nan for name, mean in rows}
+
+    def get_attribute_total_by_date(self, attribute: str) -> Dict[int, float]:
+        column = attribute_column(attribute)
+        rows = self._connection().execute(
+            f'SELECT year, SUM({column}) FROM movies WHERE {column} IS NOT NULL AND year IS NOT NULL '
+            f'GROUP BY year ORDER BY year')
+        return {year: float(total) for year, total in rows}
+
+    def get_movie_ids_for_facets(self, genre_names: Iterable[str] = (), director_name: str = None,
+                                 actor_name: str = None, start_date: int = None, end_date: int = None,
+                                 minimum_rating: float = None):
+        # Gather the ids matching each facet that was given.
+        facets = [self.get_movie_ids_for_genre(genre_name) for genre_name in genre_names]
+        if director_name is not None:
+            facets.append(self.get_movie_ids_for_director(director_name))
+        if actor_name is not None:
+            facets.append(self.get_movie_ids_for_actor(actor_name))
+        if start_date is not None or end_date is not None:
+            facets.append(self.get_movie_ids_for_date_range(start_date if start_date is not None else -math.inf,
+                                                            end_date if end_date is not None else math.inf))
+        if minimum_rating is not None:
+            facets.append(self.get_movie_ids_for_attribute_range('rating', minimum_rating))
+
+        if len(facets) == 0:
+            # No facets, so every movie matches.
+            return [row[0] for row in self._connection().execute('SELECT id FROM movies ORDER BY id')]
+
+        # The queries return ids in credit or date order, so each list is sorted before intersecting.
+        return intersect_movie_ids([np.unique(np.array(ids, dtype=np.int64)) for ids in facets]).tolist()
+
+    def get_facet_counts(self, movie_ids: List[int]) -> Dict[str, Dict]:
+        connection = self._connection()
+        movie_ids = json.dumps(list(movie_ids))
+        genre_rows = connection.execute(
+            'SELECT g.name, COUNT(*) FROM json_each(?) j JOIN movie_genres mg ON mg.movie_id = j.value '
+            'JOIN genres g ON g.id = mg.genre_id GROUP BY g.id ORDER BY COUNT(*) DESC, g.id', (movie_ids,))
+        genre_counts = dict(genre_rows.fetchall())
+        date_rows = connection.execute(
+            'SELECT m.year, COUNT(*) FROM json_each(?) j JOIN movies m ON m.id = j.value WHERE m.year IS NOT NULL '
+            'GROUP BY m.year ORDER BY m.year', (movie_ids,))
+
+        return {
+            'genre': genre_counts,
+            'date': dict(date_rows.fetchall())
+        }
+
+    def get_date_of_previous_movie(self, movie: Movie):
+        # Movies are ordered by date, then by id.
+        if not self.contains_movie(movie):
+            return None
+
+        row = self._connection().execute(
+            'SELECT year FROM movies WHERE (year, id) < (?, ?) ORDER BY year DESC, id DESC LIMIT 1',
+            (movie.date, movie.id)).fetchone()
+        return row[0] if row is not None else None
+
+    def get_date_of_next_movie(self, movie: Movie):
+        # Movies are ordered by date, then by id.
+        if not self.contains_movie(movie):
+            return None
+
+        row = self._connection().execute(
+            'SELECT year FROM movies WHERE (year, id) > (?, ?) ORDER BY year, id LIMIT 1',
+            (movie.date, movie.id)).fetchone()
+        return row[0] if row is not None else None
+
+    def add_genre(self, genre: Genre):
+        connection = self._connection()
+        with self._lock, connection:
+            self._link_genre(connection, genre.genre_name, genre.tagged_movies)
+            self.discard_name_indexes()
+
+    def get_genres(self) -> List[Genre]:
+        return self._load_named(Genre, 'SELECT id, name FROM genres ORDER BY id',
+                                'SELECT genre_id, movie_id FROM movie_genres ORDER BY genre_id, movie_id')
+
+    def add_actor(self, actor: Actor):
+        connection = self._connection()
+        with self._lock, connection:
+            self._link_actor(connection, actor.actor_full_name, actor.joined_movies)
+            self.discard_name_indexes()
+
+    def get_actors(self) -> List[Actor]:
+        return self._load_named(Actor, 'SELECT id, name FROM actors ORDER BY id',
+                                'SELECT actor_id, movie_id FROM movie_actors ORDER BY actor_id, movie_id')
+
+    def add_date(self, the_date: int):
+        connection = self._connection()
+        with connection:
+            connection.execute('INSERT OR IGNORE INTO years (year) VALUES (?)', (the_date,))
+
+    def get_dates(self) -> List[int]:
+        return [row[0] for row in self._connection().execute('SELECT year FROM years ORDER BY year')]
+
+    def add_director(self, director: Director):
+        connection = self._connection()
+        with self._lock, connection:
+            self._link_director(connection, director.director_full_name, director.directed_movies)
+            self.discard_name_indexes()
+
+    def get_directors(self) -> List[Director]:
+        return self._load_named(Director, 'SELECT id, name FROM directors ORDER BY id',
+                                'SELECT director_id, id FROM movies WHERE director_id IS NOT NULL '
+                                'ORDER BY director_id, id')
+
+    def add_comment(self, comment: Comment):
+        super().add_comment(comment)
+        connection = self._connection()
+        with connection:
+            connection.execute('INSERT INTO comments (username, movie_id, comment, timestamp) VALUES (?, ?, ?, ?)',
+                               (comment.user.username, comment.movie.id, comment.comment,
+                                comment.timestamp.isoformat()))
+
+    def add_image_link(self, link: str, movie: Movie):
+        self.add_image_links({movie.id: link})
+
+    def add_image_links(self, links: Dict[int, str]):
+        connection = self._connection()
+        with self._lock, connection:
+            # Check every id before updating any Movie, so that a failed batch leaves the repository unchanged.
+            unknown_ids = [row[0] for row in connection.execute(
+                'SELECT value FROM json_each(?) WHERE value NOT IN (SELECT id FROM movies)',
+                (json.dumps(list(links)),))]
+            if len(unknown_ids) > 0:
+                raise RepositoryException(f'Movies {unknown_ids} not in the repository')
+
+            connection.executemany('UPDATE movies SET image_hyperlink = ? WHERE id = ?',
+                                   ((link, movie_id) for movie_id, link in links.items()))
+            for movie_id, link in links.items():
+                movie = self._movies_map.get(movie_id)
+                if movie is not None:
+                    movie.image_hyperlink = link
+
+    def build_name_indexes(self):
+        entries = list(self.name_entries())
+        with self._lock:
+            self._prefix_index = PrefixIndex(entries)
+            self._fuzzy_index = FuzzyNameIndex(entries)
+            self._collaboration_graph = CollaborationGraph(self.credit_entries())
+            self._similarity_index = SimilarityIndex(self.feature_entries())
+            self._related_descriptions = RelatedDescriptions(
+                self._connection().execute('SELECT id, description FROM movies ORDER BY id'))
+
+    def discard_name_indexes(self):
+        with self._lock:
+            self._prefix_index = None
+            self._fuzzy_index = None
+            self._collaboration_graph = None
+            self._similarity_index = None
+            self._related_descriptions = None
+
+    def get_name_completions(self, prefix: str, quantity: int = MAX_COMPLETIONS) -> List[Tuple[str, str]]:
+        prefix_index = self._prefix_index
+        if prefix_index is None:
+            self.build_name_indexes()
+            prefix_index = self._prefix_index
+        return prefix_index.complete(prefix, quantity)
+
+    def get_name_suggestions(self, query: str, quantity: int = 5) -> List[Tuple[str, str, int]]:
+        fuzzy_index = self._fuzzy_index
+        if fuzzy_index is None:
+            self.build_name_indexes()
+            fuzzy_index = self._fuzzy_index
+        return fuzzy_index.suggest(query, quantity)
+
+    def get_collaboration_path(self, first: Tuple[str, str], second: Tuple[str, str]) -> List[Tuple[str, str]]:
+        collaboration_graph = self._collaboration_graph
+        if collaboration_graph is None:
+            self.build_name_indexes()
+            collaboration_graph = self._collaboration_graph
+        return collaboration_graph.shortest_path(first, second)
+
+    def get_top_collaborators(self, person: Tuple[str, str], quantity: int = 10) -> List[Tuple[str, str, int]]:
+        collaboration_graph = self._collaboration_graph
+        if collaboration_graph is None:
+            self.build_name_indexes()
+            collaboration_graph = self._collaboration_graph
+        return collaboration_graph.top_collaborators(person, quantity)
+
+    def get_similar_movie_ids(self, movie_id: int, quantity: int = 5) -> List[int]:
+        similarity_index = self._similarity_index
+        if similarity_index is None:
+            self.build_name_indexes()
+            similarity_index = self._similarity_index
+        return [similar_id for similar_id, _ in similarity_index.similar(movie_id, quantity)]
+
+    def get_related_movie_ids(self, movie_id: int, quantity: int = 5) -> List[int]:
+        related_descriptions = self._related_descriptions
+        if related_descriptions is None:
+            self.build_name_indexes()
+            related_descriptions = self._related_descriptions
+        return [related_id for related_id, _ in related_descriptions.related(movie_id, quantity)]
+
+    def get_comments(self):
+        rows = self._connection().execute(
+            'SELECT username, movie_id, comment, timestamp FROM comments ORDER BY id').fetchall()
+        users = self._load_users(row[0] for row in rows)
+        movies = self._load_movies(row[1] for row in rows)
+        return [Comment(users.get(username), movies.get(movie_id), text, datetime.fromisoformat(timestamp))
+                for username, movie_id, text, timestamp in rows]
+
+    def get_movies(self):
+        movie_ids = [row[0] for row in self._connection().execute('SELECT id FROM movies ORDER BY title, year')]
+        return self.get_movies_by_id(movie_ids)
+
+    # Helper method to list every searchable name as a (name, kind, weight) triple, weighted by the votes of its movies.
+    def name_entries(self):
+        connection = self._connection()
+        for title, votes in connection.execute(
+                'SELECT title, votes FROM movies WHERE title IS NOT NULL ORDER BY title, year'):
+            yield title, 'title', votes
+        for name, votes in connection.execute(
+                'SELECT g.name, TOTAL(m.votes) FROM genres g LEFT JOIN movie_genres mg ON mg.genre_id = g.id '
+                'LEFT JOIN movies m ON m.id = mg.movie_id GROUP BY g.id ORDER BY g.id'):
+            yield name, 'genre', votes
+        for name, votes in connection.execute(
+                'SELECT d.name, TOTAL(m.votes) FROM directors d LEFT JOIN movies m ON m.director_id = d.id '
+                'GROUP BY d.id ORDER BY d.id'):
+            yield name, 'director', votes
+        for name, votes in connection.execute(
+                'SELECT a.name, TOTAL(m.votes) FROM actors a LEFT JOIN movie_actors ma ON ma.actor_id = a.id '
+                'LEFT JOIN movies m ON m.id = ma.movie_id GROUP BY a.id ORDER BY a.id'):
+            yield name, 'actor', votes
+
+    # Helper method to list the (name, kind) pairs of the actors and director of each movie.
+    def credit_entries(self):
+        rows = self._connection().execute(
+            "SELECT ma.movie_id, a.name, 'actor' FROM movie_actors ma JOIN actors a ON a.id = ma.actor_id "
+            "UNION ALL SELECT m.id, d.name, 'director' FROM movies m JOIN directors d ON d.id = m.director_id "
+            "ORDER BY 1")
+        people = list()
+        movie_id = None
+        for row_movie_id, name, kind in rows:
+            if row_movie_id != movie_id and len(people) > 0:
+                yield people
+                people = list()
+            movie_id = row_movie_id
+            people.append((name, kind))
+        if len(people) > 0:
+            yield people
+
+    # Helper method to list the id of each movie with its genre, actor and director features.
+    def feature_entries(self):
+        rows = self._connection().execute(
+            "SELECT m.id, 'genre:' || g.name FROM movies m JOIN movie_genres mg ON mg.movie_id = m.id "
+            "JOIN genres g ON g.id = mg.genre_id "
+            "UNION ALL SELECT ma.movie_id, 'actor:' || a.name FROM movie_actors ma JOIN actors a ON a.id = ma.actor_id "
+            "UNION ALL SELECT m.id, 'director:' || d.name FROM movies m JOIN directors d ON d.id = m.director_id "
+            "UNION ALL SELECT id, NULL FROM movies "
+            "ORDER BY 1")
+        features = dict()
+        for movie_id, feature in rows:
+            movie_features = features.setdefault(movie_id, list())
+            if feature is not None:
+                movie_features.append(feature)
+        return features.items()
+
+    # Helper method to check that movie is the one stored in the repository under its id.
+    def contains_movie(self, movie: Movie) -> bool:
+        row = self._connection().execute('SELECT year FROM movies WHERE id = ?', (movie.id,)).fetchone()
+        return row is not None and row[0] == movie.date and movie.date is not None
+
+    def _connection(self) -> sqlite3.Connection:
+        # Each thread opens its own connection on first use. The thread's local data holds it through a ThreadConnection,
+        # which is dropped when the thread ends, and whose finalizer then closes the connection.
+        holder = getattr(self._local, 'holder', None)
+        if holder is None:
+            connection = sqlite3.connect(self._database_path, timeout=BUSY_TIMEOUT, check_same_thread=False,
+                                         cached_statements=STATEMENT_CACHE_SIZE)
+            connection.execute('PRAGMA journal_mode = WAL')
+            connection.execute('PRAGMA synchronous = NORMAL')
+            holder = ThreadConnection(connection)
+            with self._lock:
+                self._connections.append(connection)
+            weakref.finalize(holder, release_connection, connection, self._connections, self._lock)
+            self._local.holder = holder
+        return holder.connection
+
+    def _name_id(self, connection: sqlite3.Connection, table: str, kind: str, name: str) -> int:
+        # Return the id of the named row of table, adding the row, and indexing the words of its name, if it's new.
+        row = connection.execute(f'SELECT id FROM {table} WHERE name = ?', (name,)).fetchone()
+        if row is not None:
+            return row[0]
+
+        entity_id = connection.execute(f'INSERT INTO {table} (name) VALUES (?)', (name,)).lastrowid
+        connection.executemany('INSERT OR IGNORE INTO name_tokens (kind, token, entity_id) VALUES (?, ?, ?)',
+                               ((kind, token, entity_id) for token in dict.fromkeys(name.split())))
+        return entity_id
+
+    def _link_genre(self, connection: sqlite3.Connection, name: str, movies: Iterable[Movie]):
+        if name is None:
+            return
+        genre_id = self._name_id(connection, 'genres', 'genre', name)
+        connection.executemany('INSERT OR IGNORE INTO movie_genres (movie_id, genre_id) VALUES (?, ?)',
+                               ((movie.id, genre_id) for movie in movies))
+
+    def _link_director(self, connection: sqlite3.Connection, name: str, movies: Iterable[Movie]):
+        if name is None:
+            return
+        director_id = self._name_id(connection, 'directors', 'director', name)
+        connection.executemany('UPDATE movies SET director_id = ? WHERE id = ?',
+                               ((director_id, movie.id) for movie in movies))
+
+    def _link_actor(self, connection: sqlite3.Connection, name: str, movies: Iterable[Movie]):
+        if name is None:
+            return
+        actor_id = self._name_id(connection, 'actors', 'actor', name)
+
+        # Keep each Actor's place in the cast, so Movies list their Actors in the same order when loaded.
+        connection.executemany('INSERT OR IGNORE INTO movie_actors (movie_id, actor_id, position) VALUES (?, ?, ?)',
+                               ((movie.id, actor_id, cast_position(movie, name)) for movie in movies))
+
+    def _matching_name_ids(self, table: str, kind: str, name: str) -> List[int]:
+        connection = self._connection()
+        row = connection.execute(f'SELECT id FROM {table} WHERE name = ?', (name,)).fetchone()
+        if row is not None:
+            return [row[0]]
+        rows = connection.execute('SELECT entity_id FROM name_tokens WHERE kind = ? AND token = ? ORDER BY entity_id',
+                                  (kind, name))
+        return [row[0] for row in rows]
+
+    def _load_named(self, entity_class, names_query: str, links_query: str) -> list:
+        # Build every Genre, Director or Actor with all of its Movies.
+        connection = self._connection()
+        entities = {entity_id: entity_class(name) for entity_id, name in connection.execute(names_query)}
+        links = connection.execute(links_query).fetchall()
+        movies = self._load_movies(movie_id for _, movie_id in links)
+        for entity_id, movie_id in links:
+            if entity_id in entities and movie_id in movies:
+                entities[entity_id].add_movie(movies[movie_id])
+        return list(entities.values())
+
+    def _load_users(self, usernames: Iterable[str]) -> Dict[str, User]:
+        with self._lock:
+            users = dict()
+            missing = dict()
+            for username in usernames:
+                user = self._users_map.get(username)
+                if user is not None:
+                    users[username] = user
+                else:
+                    missing[username] = None
+            if len(missing) == 0:
+                return users
+
+            rows = self._connection().execute(
+                'SELECT username, password FROM users WHERE username IN (SELECT value FROM json_each(?))',
+                (json.dumps(list(missing)),))
+            for username, password in rows:
+                user = User(username, password)
+                self._users_map[username] = user
+                users[username] = user
+            return users
+
+    def _load_movies(self, movie_ids: Iterable[int]) -> Dict[int, Movie]:
+        # Return the Movies already in use, and build the others from their rows in a few batched queries.
+        with self._lock:
+            movies = dict()
+            missing = dict()
+            for movie_id in movie_ids:
+                movie = self._movies_map.get(movie_id)
+                if movie is not None:
+                    movies[movie_id] = movie
+                else:
+                    missing[movie_id] = None
+            if len(missing) == 0:
+                return movies
+
+            connection = self._connection()
+            parameters = (json.dumps(list(missing)),)
+            loaded = dict()
+            directors = dict()
+            for row in connection.execute(MOVIE_SELECT, parameters):
+                movie = movie_from_row(row)
+                if row[10] is not None:
+                    make_director_association(movie, directors.setdefault(row[10], Director(row[10])))
+                loaded[movie.id] = movie
+
+            genres = dict()
+            for movie_id, name in connection.execute(
+                    'SELECT mg.movie_id, g.name FROM movie_genres mg JOIN genres g ON g.id = mg.genre_id '
+                    'WHERE mg.movie_id IN (SELECT value FROM json_each(?)) ORDER BY mg.movie_id, g.id', parameters):
+                if movie_id in loaded:
+                    make_genre_association(loaded[movie_id], genres.setdefault(name, Genre(name)))
+
+            actors = dict()
+            for movie_id, name in connection.execute(
+                    'SELECT ma.movie_id, a.name FROM movie_actors ma JOIN actors a ON a.id = ma.actor_id '
+                    'WHERE ma.movie_id IN (SELECT value FROM json_each(?)) ORDER BY ma.movie_id, ma.position, a.id',
+                    parameters):
+                if movie_id in loaded:
+                    make_actor_association(loaded[movie_id], actors.setdefault(name, Actor(name)))
+
+            # Comments are attached to their Movies only; a User built here doesn't list its Comments.
+            comment_rows = connection.execute(
+                'SELECT movie_id, username, comment, timestamp FROM comments '
+                'WHERE movie_id IN (SELECT value FROM json_each(?)) ORDER BY id', parameters).fetchall()
+            users = self._load_users(row[1] for row in comment_rows)
+            for movie_id, username, text, timestamp in comment_rows:
+                if movie_id in loaded:
+                    user = users.get(username)
+                    movie = loaded[movie_id]
+                    movie.add_comment(Comment(user, movie, text, datetime.fromisoformat(timestamp)))
+
+            for movie_id, movie in loaded.items():
+                self._movies_map[movie_id] = movie
+            movies.update(loaded)
+            return movies
+
+
+def attribute_column(attribute: str) -> str:
+    if attribute not in ATTRIBUTE_COLUMNS:
+        raise ValueError(f'{attribute} is not a numeric Movie attribute')
+    return ATTRIBUTE_COLUMNS[attribute]
+
+
+def leaderboard_column(attribute: str) -> str:
+    if attribute not in LEADERBOARD_ATTRIBUTES:
+        raise ValueError(f'{attribute} has no leaderboard')
+    return ATTRIBUTE_COLUMNS[attribute]
+
+
+def nullable(value: float):
+    # SQLite has no NaN, so unknown values are stored as NULL.
+    return None if math.isnan(value) else value
+
+
+def cast_position(movie: Movie, actor_name: str) -> int:
+    for position, actor in enumerate(movie.actors):
+        if actor.actor_full_name == actor_name:
+            return position
+    return len(movie.actors)
+
+
+def movie_row(movie: Movie) -> tuple:
+    return (movie.id, movie.title, movie.date, movie.description, movie.runtime_minutes, movie.rating, movie.votes,
+            movie.revenue, nullable(numeric_value(movie.revenue)), movie.metascore,
+            nullable(numeric_value(movie.metascore)), movie.image_hyperlink)
+
+
+def movie_from_row(row) -> Movie:
+    movie_id, title, year, description, runtime_minutes, rating, votes, revenue, metascore, image_hyperlink, _ = row
+    movie = Movie(title, year, movie_id)
+    movie.description = description
+    movie.runtime_minutes = runtime_minutes
+    movie.rating = rating
+    movie.votes = votes
+    movie.revenue = revenue
+    movie.metascore = metascore
+    movie.image_hyperlink = image_hyperlink
+    return movie
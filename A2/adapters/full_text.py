@@ -0,0 +1,261 @@
+import heapq
+import math
+import re
+from array import array
+from typing import Dict, Iterable, List, Tuple
+
+import numpy as np
+
+# BM25 parameters: K1 limits the benefit of repeating a term, B scales the penalty for long documents.
+K1 = 1.2
+B = 0.75
+
+STOP_WORDS = frozenset(('a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'for', 'from', 'has', 'he', 'her', 'his',
+                        'in', 'is', 'it', 'its', 'of', 'on', 'or', 'she', 'that', 'the', 'their', 'they', 'to', 'was',
+                        'who', 'with'))
+
+TERM_PATTERN = re.compile(r"[a-z0-9]+(?:'[a-z]+)?")
+
+# Related descriptions: the neighbours kept for each Movie, and the Movies scored at a time. A term in more than
+# MAX_TERM_SHARE of the descriptions, or in more than MAX_TERM_MOVIES of them, is too common to relate Movies and is
+# left out. The work of scoring grows with the square of the number of Movies sharing each term.
+RELATED_QUANTITY = 10
+BATCH_SIZE = 256
+MAX_TERM_SHARE = 0.02
+MAX_TERM_MOVIES = 500
+
+# Share of the live documents that may be removed before the postings of removed documents are dropped.
+COMPACT_SHARE = 0.25
+
+
+class DescriptionIndex:
+    """ An inverted index over Movie descriptions, ranking Movies for a query with BM25.
+
+    Each term's postings are compact integer arrays, of document numbers, term frequencies and document lengths, that
+    grow as Movies are added. A query only reads the postings of its own terms.
+    """
+
+    def __init__(self):
+        self._postings: Dict[str, Tuple[array, array, array]] = dict()
+        self._movie_ids = array('q')
+        self._lengths = array('q')
+        self._total_length = 0
+
+        # The current document of each Movie id. Documents of removed or re-added Movies stay in the postings, skipped
+        # by searches, until they reach COMPACT_SHARE of the live documents and compact drops them.
+        self._documents: Dict[int, int] = dict()
+        self._removed = array('q')
+
+        # The terms whose postings this index may append to, or None for every term. A copy shares the postings with
+        # the original, and each copies a term's postings before it first appends to them.
+        self._owned_terms = None
+
+    def __len__(self):
+        return len(self._documents)
+
+    def __copy__(self) -> 'DescriptionIndex':
+        copied = DescriptionIndex.__new__(DescriptionIndex)
+        copied._postings = dict(self._postings)
+        copied._movie_ids = array('q', self._movie_ids)
+        copied._lengths = array('q', self._lengths)
+        copied._total_length = self._total_length
+        copied._documents = dict(self._documents)
+        copied._removed = array('q', self._removed)
+        copied._owned_terms = set()
+        self._owned_terms = set()
+        return copied
+
+    def add(self, movie_id: int, description: str):
+        """ Indexes description for movie_id, replacing any description indexed for it before. """
+        self.remove(movie_id)
+        document = len(self._movie_ids)
+        terms = tokenize(description)
+        self._movie_ids.append(movie_id)
+        self._lengths.append(len(terms))
+        self._documents[movie_id] = document
+        self._total_length += len(terms)
+
+        frequencies = dict()
+        for term in terms:
+            frequencies[term] = frequencies.get(term, 0) + 1
+        for term, frequency in frequencies.items():
+            postings = self._postings.get(term)
+            if postings is None:
+                postings = self._postings[term] = (array('q'), array('q'), array('q'))
+                if self._owned_terms is not None:
+                    self._owned_terms.add(term)
+            elif self._owned_terms is not None and term not in self._owned_terms:
+                postings = self._postings[term] = tuple(array('q', values) for values in postings)
+                self._owned_terms.add(term)
+            documents, term_frequencies, lengths = postings
+            documents.append(document)
+            term_frequencies.append(frequency)
+            lengths.append(len(terms))
+
+    def remove(self, movie_id: int):
+        document = self._documents.pop(movie_id, None)
+        if document is not None:
+            self._removed.append(document)
+            self._total_length -= self._lengths[document]
+            if len(self._removed) > COMPACT_SHARE * len(self._documents):
+                self.compact()
+
+    def compact(self):
+        """ Drops the postings of removed documents, renumbering the live ones in the order they were added. """
+        live = np.zeros(len(self._movie_ids), dtype=bool)
+        live[np.fromiter(self._documents.values(), dtype=np.int64, count=len(self._documents))] = True
+        numbers = np.cumsum(live) - 1
+
+        for term, postings in list(self._postings.items()):
+            documents, term_frequencies, lengths = (np.frombuffer(values, dtype=np.int64) for values in postings)
+            kept = live[documents]
+            if not kept.any():
+                del self._postings[term]
+                continue
+            self._postings[term] = (array('q', numbers[documents[kept]].tobytes()),
+                                    array('q', term_frequencies[kept].tobytes()), array('q', lengths[kept].tobytes()))
+
+        self._movie_ids = array('q', np.frombuffer(self._movie_ids, dtype=np.int64)[live].tobytes())
+        self._lengths = array('q', np.frombuffer(self._lengths, dtype=np.int64)[live].tobytes())
+        self._documents = {movie_id: int(numbers[document]) for movie_id, document in self._documents.items()}
+        self._removed = array('q')
+        self._owned_terms = None
+
+    def search(self, query: str, quantity: int = 10) -> List[Tuple[int, float]]:
+        """ Returns up to quantity (movie id, score) pairs for the Movies best matching query, highest score first. """
+        terms = [term for term in dict.fromkeys(tokenize(query)) if term in self._postings]
+        if len(terms) == 0 or quantity <= 0:
+            return list()
+
+        if len(self._documents) == 0:
+            return list()
+        average_length = self._total_length / len(self._documents)
+        removed = np.array(self._removed, dtype=np.int64)
+
+        # Score every posting of the query terms, then sum the scores of each document.
+        documents = list()
+        scores = list()
+        for term in terms:
+            term_documents, term_frequencies, lengths = (np.array(postings, dtype=np.int64)
+                                                         for postings in self._postings[term])
+            if len(removed) > 0:
+                live = ~np.isin(term_documents, removed)
+                term_documents, term_frequencies, lengths = term_documents[live], term_frequencies[live], lengths[live]
+            idf = math.log(1 + (len(self._documents) - len(term_documents) + 0.5) / (len(term_documents) + 0.5))
+            normalization = K1 * (1 - B + B * lengths / average_length)
+            documents.append(term_documents)
+            scores.append(idf * term_frequencies * (K1 + 1) / (term_frequencies + normalization))
+
+        if sum(len(term_documents) for term_documents in documents) == 0:
+            return list()
+        matched, positions = np.unique(np.concatenate(documents), return_inverse=True)
+        totals = np.bincount(positions, weights=np.concatenate(scores))
+
+        # Keep the best scores on a heap, breaking ties in favour of the earlier added Movie.
+        best = heapq.nlargest(quantity, zip(totals.tolist(), (-document for document in matched.tolist())))
+        return [(self._movie_ids[-document], score) for score, document in best]
+
+
+class RelatedDescriptions:
+    """ The Movies whose descriptions are most alike, by the cosine similarity of their TF-IDF vectors, found in
+    advance for every Movie.
+
+    The vectors are the rows of a sparse matrix in compressed sparse row form. Its columns, the postings of each term,
+    are kept too, so that a batch of rows is multiplied by the whole matrix by expanding the postings of the batch's
+    terms. The work follows the number of Movies sharing a term, rather than the number of pairs of Movies.
+    """
+
+    def __init__(self, entries: Iterable[Tuple[int, str]], quantity: int = RELATED_QUANTITY):
+        # entries gives each Movie's id and description. Rows are numbered in id order, so ties are broken by id.
+        entries = sorted(entries, key=lambda entry: entry[0])
+        self._ids = np.fromiter((movie_id for movie_id, _ in entries), dtype=np.int64, count=len(entries))
+        self._rows: Dict[int, int] = {movie_id: row for row, (movie_id, _) in enumerate(entries)}
+
+        # Count each term of each description, numbering terms as they're first seen.
+        terms: Dict[str, int] = dict()
+        rows, columns, frequencies = array('q'), array('q'), array('q')
+        for row, (_, description) in enumerate(entries):
+            counts = dict()
+            for term in tokenize(description):
+                counts[term] = counts.get(term, 0) + 1
+            for term, count in counts.items():
+                rows.append(row)
+                columns.append(terms.setdefault(term, len(terms)))
+                frequencies.append(count)
+        rows, columns, frequencies = (np.frombuffer(values, dtype=np.int64) for values in (rows, columns, frequencies))
+
+        # Weigh terms by log-scaled frequency and inverse document frequency, leaving out the most common terms, then
+        # scale each row to unit length.
+        size = len(entries)
+        document_frequencies = np.bincount(columns, minlength=len(terms))
+        kept = document_frequencies[columns] <= max(min(MAX_TERM_SHARE * size, MAX_TERM_MOVIES), 2)
+        rows, columns, frequencies = rows[kept], columns[kept], frequencies[kept]
+        weights = (1 + np.log(frequencies)) * np.log(size / document_frequencies[columns])
+        norms = np.sqrt(np.bincount(rows, weights=weights ** 2, minlength=size))
+        weights = weights / np.where(norms > 0, norms, 1)[rows]
+
+        row_offsets = np.zeros(size + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows, minlength=size), out=row_offsets[1:])
+        order = np.argsort(columns, kind='stable')
+        term_offsets = np.zeros(len(terms) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(columns, minlength=len(terms)), out=term_offsets[1:])
+        postings = (rows[order], weights[order], term_offsets)
+
+        self._neighbours = np.full((size, quantity), -1, dtype=np.int32)
+        self._scores = np.zeros((size, quantity), dtype=np.float32)
+        for start in range(0, size, BATCH_SIZE):
+            end = min(start + BATCH_SIZE, size)
+            self._score_batch(start, end, columns, weights, row_offsets, postings)
+
+    def __len__(self):
+        return len(self._ids)
+
+    def related(self, movie_id: int, quantity: int = 5) -> List[Tuple[int, float]]:
+        """ Returns up to quantity (movie id, cosine similarity) pairs for the Movies whose descriptions are most like
+        that of the Movie with movie_id, most similar first, then by id. """
+        row = self._rows.get(movie_id)
+        if row is None:
+            return list()
+        neighbours = self._neighbours[row, :max(quantity, 0)]
+        found = neighbours >= 0
+        return list(zip(self._ids[neighbours[found]].tolist(), self._scores[row, :max(quantity, 0)][found].tolist()))
+
+    def _score_batch(self, start: int, end: int, columns: np.ndarray, weights: np.ndarray, row_offsets: np.ndarray,
+                     postings: Tuple[np.ndarray, np.ndarray, np.ndarray]):
+        # Multiply rows start to end by every row, then keep each row's best scores.
+        posting_rows, posting_weights, term_offsets = postings
+        first, last = row_offsets[start], row_offsets[end]
+        batch_rows = np.repeat(np.arange(start, end), np.diff(row_offsets[start:end + 1]))
+        batch_columns, batch_weights = columns[first:last], weights[first:last]
+
+        # Pair each of the batch's terms with every posting of that term.
+        starts = term_offsets[batch_columns]
+        lengths = term_offsets[batch_columns + 1] - starts
+        positions = np.arange(lengths.sum()) + np.repeat(starts - np.cumsum(lengths) + lengths, lengths)
+        sources = np.repeat(batch_rows, lengths)
+        targets = posting_rows[positions]
+        products = np.repeat(batch_weights, lengths) * posting_weights[positions]
+
+        # Sum the products of each pair of rows, leaving out each row's pair with itself.
+        other = sources != targets
+        size = len(self._ids)
+        pairs, inverse = np.unique(sources[other] * size + targets[other], return_inverse=True)
+        scores = np.bincount(inverse, weights=products[other])
+        positive = scores > 0
+        pairs, scores = pairs[positive], scores[positive]
+        sources, targets = np.divmod(pairs, max(size, 1))
+
+        # Rank each row's pairs by score and then by id, and keep the first of each. Scores are at most 1, so one
+        # stable sort on row minus score does the work of a much slower np.lexsort, and rows follow id order.
+        order = np.argsort(sources * 4.0 - scores, kind='stable')
+        sources, targets, scores = sources[order], targets[order], scores[order]
+        ranks = np.arange(len(sources)) - np.searchsorted(sources, sources)
+        best = ranks < self._neighbours.shape[1]
+        self._neighbours[sources[best], ranks[best]] = targets[best]
+        self._scores[sources[best], ranks[best]] = scores[best]
+
+
+def tokenize(text: str) -> List[str]:
+    if not isinstance(text, str):
+        return list()
+    return [term for term in TERM_PATTERN.findall(text.lower()) if term not in STOP_WORDS]
@@ -0,0 +1,112 @@
+from itertools import combinations, product
+from typing import Dict, Iterable, List, Set, Tuple
+
+# Words further apart than this, in edits, are not considered a match.
+MAX_EDIT_DISTANCE = 2
+
+# Only this many leading characters of a word generate deletes, which bounds the work per word however long it is.
+PREFIX_LENGTH = 7
+
+# Bounds on the work done for a query, independent of the size of the vocabulary.
+MAX_CORRECTIONS_PER_WORD = 3
+MAX_CANDIDATE_NAMES = 100
+
+
+class FuzzyNameIndex:
+    """ Finds names that nearly match a query, tolerating up to MAX_EDIT_DISTANCE edits in each word.
+
+    Words are matched with a symmetric-delete index: every word of every name is stored under each string obtained by
+    deleting up to MAX_EDIT_DISTANCE characters from its prefix, so a misspelt word is looked up through its own
+    deletes instead of being compared with the whole vocabulary.
+    """
+
+    def __init__(self, entries: Iterable[Tuple[str, str, float]]):
+        # entries holds (name, kind, weight) triples, e.g. ('chris pratt', 'actor', 1.2e6).
+        entries = sorted(entries, key=lambda entry: -entry[2])
+        self._names: List[str] = [name for name, _, _ in entries]
+        self._kinds: List[str] = [kind for _, kind, _ in entries]
+        self._name_words: List[Set[str]] = list()
+
+        # Names are numbered by descending weight, so each word's list of names starts with the most relevant.
+        self._word_names: Dict[str, List[int]] = dict()
+        for entry, name in enumerate(self._names):
+            words = set(name.lower().split())
+            self._name_words.append(words)
+            for word in words:
+                self._word_names.setdefault(word, list()).append(entry)
+
+        self._deletes: Dict[str, List[str]] = dict()
+        for word in self._word_names:
+            for delete in deletes(word[:PREFIX_LENGTH]):
+                self._deletes.setdefault(delete, list()).append(word)
+
+    def suggest(self, query: str, quantity: int = 5) -> List[Tuple[str, str, int]]:
+        """ Returns up to quantity (name, kind, distance) triples for names containing a close match of every word of
+        query, ordered by total edit distance and then by weight. """
+        words = query.lower().split()
+        if len(words) == 0:
+            return list()
+
+        corrections = [self.correct(word) for word in words]
+        if any(len(word_corrections) == 0 for word_corrections in corrections):
+            return list()
+
+        best = dict()
+        for combination in product(*corrections):
+            distance = sum(word_distance for _, word_distance in combination)
+            corrected_words = [word for word, _ in combination]
+
+            # Check the most relevant names of the rarest word for the remaining words.
+            rarest = min(corrected_words, key=lambda word: len(self._word_names[word]))
+            for entry in self._word_names[rarest][:MAX_CANDIDATE_NAMES]:
+                if all(word in self._name_words[entry] for word in corrected_words):
+                    if distance < best.get(entry, MAX_EDIT_DISTANCE * len(words) + 1):
+                        best[entry] = distance
+
+        ranked = sorted(best, key=lambda entry: (best[entry], entry))
+        return [(self._names[entry], self._kinds[entry], best[entry]) for entry in ranked[:quantity]]
+
+    def correct(self, word: str) -> List[Tuple[str, int]]:
+        """ Returns up to MAX_CORRECTIONS_PER_WORD (word, distance) pairs from the vocabulary that are within
+        MAX_EDIT_DISTANCE of word, closest and most common first. """
+        candidates = set()
+        for delete in deletes(word[:PREFIX_LENGTH]):
+            candidates.update(self._deletes.get(delete, ()))
+
+        corrections = list()
+        for candidate in candidates:
+            distance = edit_distance(word, candidate, MAX_EDIT_DISTANCE)
+            if distance <= MAX_EDIT_DISTANCE:
+                corrections.append((candidate, distance))
+
+        corrections.sort(key=lambda correction: (correction[1], -len(self._word_names[correction[0]]), correction[0]))
+        return corrections[:MAX_CORRECTIONS_PER_WORD]
+
+
+def deletes(word: str) -> Set[str]:
+    # word itself, and every string obtained by deleting up to MAX_EDIT_DISTANCE of its characters.
+    results = {word}
+    for count in range(1, min(MAX_EDIT_DISTANCE, len(word)) + 1):
+        for positions in combinations(range(len(word)), count):
+            results.add(''.join(character for index, character in enumerate(word) if index not in positions))
+    return results
+
+
+def edit_distance(first: str, second: str, limit: int) -> int:
+    # Optimal string alignment distance (insertions, deletions, substitutions and adjacent transpositions), or
+    # limit + 1 as soon as the distance is known to exceed limit.
+    if abs(len(first) - len(second)) > limit:
+        return limit + 1
+
+    previous_row = None
+    row = list(range(len(second) + 1))
+    for i in range(1, len(first) + 1):
+        earlier_row, previous_row, row = previous_row, row, [i] + [0] * len(second)
+        for j in range(1, len(second) + 1):
+            cost = 0 if first[i - 1] == second[j - 1] else 1
+            row[j] = min(previous_row[j] + 1, row[j - 1] + 1, previous_row[j - 1] + cost)
+            if i > 1 and j > 1 and first[i - 1] == second[j - 2] and first[i - 2] == second[j - 1]:
+                row[j] = min(row[j], earlier_row[j - 2] + 1)
+        if min(row) > limit:
+            return limit + 1
+    return min(row[-1], limit + 1)
@@ -0,0 +1,234 @@
+import csv
+import json
+import os
+import struct
+import threading
+import zlib
+from datetime import datetime
+from typing import Dict, List
+
+from A2.adapters.repository import AbstractRepository
+from A2.domain.model import Comment, User
+
+# Each record is its payload's length and CRC-32, then the payload: a JSON list whose first item is the record kind.
+RECORD_HEADER = struct.Struct('<II')
+
+# Records appended before the journal's file is written and synced; 1 syncs every record before add_user or
+# add_comment returns.
+SYNC_BATCH = 1
+
+
+class Journal:
+    """ An append-only file of the Users and Comments added to a repository since it was populated.
+
+    Records are written with group commit: a writer that finds another thread part way through a sync queues its
+    record, and the next sync writes every queued record with one write and one fsync. With a sync_batch above 1,
+    records are only written once that many are queued, so up to sync_batch - 1 of the latest records are lost if the
+    process stops before close is called.
+    """
+
+    def __init__(self, path: str, sync_batch: int = SYNC_BATCH):
+        self._path = path
+        self._sync_batch = max(1, sync_batch)
+        self._condition = threading.Condition()
+        self._pending: List[bytes] = list()
+        self._appended = 0
+        self._committed = 0
+        self._committing = False
+
+        # Drop any torn record left at the end by a crash, so that new records follow the last complete one.
+        _, end = read_records(path)
+        self._file = open(path, 'ab')
+        self._file.truncate(end)
+        self._file.seek(end)
+
+    @property
+    def path(self) -> str:
+        return self._path
+
+    def size(self) -> int:
+        with self._condition:
+            return self._file.tell() + sum(len(data) for data in self._pending)
+
+    def append_user(self, user: User):
+        self.append(['user', user.username, user.password])
+
+    def append_comment(self, comment: Comment):
+        self.append(['comment', comment.user.username, comment.movie.id, comment.comment,
+                     comment.timestamp.isoformat(sep=' ')])
+
+    def append(self, record: list):
+        data = encode_record(record)
+        with self._condition:
+            self._pending.append(data)
+            self._appended += 1
+            if len(self._pending) >= self._sync_batch:
+                self.commit_to(self._appended)
+
+    def commit(self):
+        """ Writes and syncs every queued record. """
+        with self._condition:
+            self.commit_to(self._appended)
+
+    def commit_to(self, number: int):
+        # Called holding the condition's lock. Returns once the first number records appended are synced.
+        while self._committed < number:
+            if self._committing:
+                # Another thread is syncing; its sync or the next one will include this record.
+                self._condition.wait()
+                continue
+
+            batch, self._pending = self._pending, list()
+            last = self._appended
+            self._committing = True
+            self._condition.release()
+            written = False
+            try:
+                self._file.write(b''.join(batch))
+                self._file.flush()
+                os.fsync(self._file.fileno())
+                written = True
+            finally:
+                self._condition.acquire()
+                self._committing = False
+                if written:
+                    self._committed = last
+                else:
+                    # Queue the batch again, ahead of later records, for the next sync.
+                    self._pending[:0] = batch
+                self._condition.notify_all()
+
+    def truncate(self):
+        """ Discards every record, once they've been compacted into the data files. """
+        with self._condition:
+            self.commit_to(self._appended)
+            self._file.truncate(0)
+            self._file.seek(0)
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    def close(self):
+        with self._condition:
+            if not self._file.closed:
+                self.commit_to(self._appended)
+                self._file.close()
+
+
+def encode_record(record: list) -> bytes:
+    payload = json.dumps(record, separators=(',', ':')).encode('utf-8')
+    return RECORD_HEADER.pack(len(payload), zlib.crc32(payload)) + payload
+
+
+def read_records(path: str):
+    """ Returns the records in the journal at path, and the offset just past the last complete one. Reading stops at
+    a record that's cut short or fails its checksum, as a crash part way through a write leaves. """
+    try:
+        with open(path, 'rb') as infile:
+            data = infile.read()
+    except FileNotFoundError:
+        return list(), 0
+
+    records = list()
+    offset = 0
+    while offset + RECORD_HEADER.size <= len(data):
+        length, checksum = RECORD_HEADER.unpack_from(data, offset)
+        payload = data[offset + RECORD_HEADER.size:offset + RECORD_HEADER.size + length]
+        if len(payload) < length or zlib.crc32(payload) != checksum:
+            break
+        records.append(json.loads(payload.decode('utf-8')))
+        offset += RECORD_HEADER.size + length
+    return records, offset
+
+
+def replay_journal(path: str, repo: AbstractRepository) -> Dict[str, int]:
+    """ Adds the Users and Comments recorded in the journal at path to repo, returning the number of each added.
+
+    Replaying is idempotent: records already in repo, e.g. because they were compacted into the data files, and
+    Comments on Movies no longer in repo are skipped.
+    """
+    records, _ = read_records(path)
+    added = {'users': 0, 'comments': 0}
+    for record in records:
+        if record[0] == 'user':
+            _, username, password_hash = record
+            if repo.get_user(username) is None:
+                repo.add_user(User(username, password_hash))
+                added['users'] += 1
+
+        elif record[0] == 'comment':
+            _, username, movie_id, text, timestamp = record
+            user = repo.get_user(username)
+            movie = repo.get_movie(movie_id)
+            timestamp = datetime.fromisoformat(timestamp)
+            if user is None or movie is None or Comment(user, movie, text, timestamp) in movie.comments:
+                continue
+            repo.comment_on_movie(text, user, movie, timestamp)
+            added['comments'] += 1
+    return added
+
+
+def compact_journal(data_path: str, repo: AbstractRepository, journal: Journal):
+    """ Writes the Users and Comments in repo that aren't yet in users.csv and comments.csv to those files, then
+    empties journal.
+
+    Each file is rewritten alongside and moved into place, so a crash leaves either the old or the new file. Users
+    added by the journal are written with their password hash, in a password-hash column added to users.csv if it
+    has none. Comments whose User isn't in repo are left out. As replaying is idempotent, a crash before the
+    journal is emptied only means its records are skipped at the next start.
+    """
+    users_filename = os.path.join(data_path, 'users.csv')
+    header, rows = read_csv_rows(users_filename)
+    if 'password-hash' not in header:
+        header = header + ['password-hash']
+        rows = [row + [''] for row in rows]
+    username_column = header.index('username')
+    user_ids = dict()
+    for row in rows:
+        user_ids.setdefault(row[username_column], row[0])
+
+    next_id = max((int(row[0]) for row in rows), default=0) + 1
+    for user in repo.get_users():
+        if user.username not in user_ids:
+            row = [''] * len(header)
+            row[0], row[username_column], row[header.index('password-hash')] = str(next_id), user.username, \
+                user.password
+            rows.append(row)
+            user_ids[user.username] = str(next_id)
+            next_id += 1
+    write_csv_rows(users_filename, header, rows)
+
+    comments_filename = os.path.join(data_path, 'comments.csv')
+    header, rows = read_csv_rows(comments_filename)
+    recorded = {(row[1], int(row[2]), row[3], datetime.fromisoformat(row[4])) for row in rows}
+    next_id = max((int(row[0]) for row in rows), default=0) + 1
+    for comment in repo.get_comments():
+        user_id = user_ids.get(comment.user.username)
+        if user_id is None:
+            # The Comment's User isn't in repo, so there's no id to record it under.
+            continue
+        key = (user_id, comment.movie.id, comment.comment, comment.timestamp)
+        if key not in recorded:
+            rows.append([str(next_id), key[0], str(key[1]), key[2], key[3].isoformat(sep=' ')])
+            recorded.add(key)
+            next_id += 1
+    write_csv_rows(comments_filename, header, rows)
+
+    journal.truncate()
+
+
+def read_csv_rows(filename: str):
+    with open(filename, encoding='utf-8-sig', newline='') as infile:
+        reader = csv.reader(infile)
+        header = [column.strip() for column in next(reader)]
+        return header, [[item.strip() for item in row] for row in reader if len(row) > 0]
+
+
+def write_csv_rows(filename: str, header: List[str], rows: List[List[str]]):
+    temporary_path = f'{filename}.{os.getpid()}.tmp'
+    with open(temporary_path, 'w', encoding='utf-8', newline='') as outfile:
+        writer = csv.writer(outfile)
+        writer.writerow(header)
+        writer.writerows(rows)
+        outfile.flush()
+        os.fsync(outfile.fileno())
+    os.replace(temporary_path, filename)
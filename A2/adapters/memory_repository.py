@@ -1,39 +1,315 @@
+import copy
 import csv
+import io
+import math
 import os
-from bisect import bisect_left, insort_left
+import time
+from bisect import bisect_left, bisect_right, insort_left
 from datetime import datetime
-from typing import List
-
-from A2.adapters.repository import AbstractRepository
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from itertools import chain
+from typing import Dict, Iterable, List, Tuple
+
+import numpy as np
+from A2.adapters.autocomplete import MAX_COMPLETIONS, PrefixIndex
+from A2.adapters.chunked import ChunkedDict, ChunkedList
+from A2.adapters.collaboration_graph import CollaborationGraph
+from A2.adapters.full_text import DescriptionIndex, RelatedDescriptions
+from A2.adapters.fuzzy import FuzzyNameIndex
+from A2.adapters.journal import Journal
+from A2.adapters.movie_columns import UNKNOWN_YEAR, MovieColumns
+from A2.adapters.repository import AbstractRepository, RepositoryException
+from A2.adapters.similarity import SimilarityIndex
+from A2.adapters.snapshot import read_snapshot, snapshot_key, write_snapshot
 from A2.domain.model import Movie, Actor, User, Director, Genre, Comment, make_genre_association, \
-    make_comment, make_director_association, make_actor_association
+    make_comment, make_director_association, make_actor_association, remove_genre_association, remove_actor_association
 from werkzeug.security import generate_password_hash
 
+# Below this many passwords, starting a process pool costs more than hashing them in turn.
+PARALLEL_HASH_MINIMUM = 32
+
+# Movie files at least this large are parsed in chunks by a process pool; smaller ones are parsed faster in turn.
+PARALLEL_LOAD_MINIMUM_BYTES = 8 << 20
+MINIMUM_CHUNK_BYTES = 1 << 20
+
+# The containers that each of MemoryRepository's writers changes in place. VersionedRepository copies them before a
+# write, so that readers of the previous version never see them change. The containers of Users, Comments and Movies
+# are chunked, so that copying them costs about a chunk per change. The lists and dicts nested in containers, and the
+# domain objects they hold, are copied as a writer changes them.
+USER_ATTRIBUTES = ('_users', '_users_index', '_users_normalized_index', '_user_positions')
+MOVIE_ATTRIBUTES = ('_movies', '_movies_index')
+CATALOGUE_ATTRIBUTES = MOVIE_ATTRIBUTES + ('_movie_ids', '_movie_columns', '_description_index', '_title_index',
+                                           '_genres', '_genres_index', '_directors', '_directors_index',
+                                           '_directors_token_index', '_actors', '_actors_index',
+                                           '_actors_token_index', '_dates', '_dates_index', '_comments')
+WRITTEN_ATTRIBUTES = {
+    'add_user': USER_ATTRIBUTES,
+    'remove_user': USER_ATTRIBUTES,
+    'apply_user_changes': USER_ATTRIBUTES,
+    'add_comment': ('_comments',),
+    'comment_on_movie': USER_ATTRIBUTES + MOVIE_ATTRIBUTES + ('_comments',),
+    'add_image_link': MOVIE_ATTRIBUTES,
+    'add_image_links': MOVIE_ATTRIBUTES,
+    'attach_journal': (),
+    'add_movie': CATALOGUE_ATTRIBUTES,
+    'add_movies': CATALOGUE_ATTRIBUTES,
+    'remove_movie': CATALOGUE_ATTRIBUTES,
+    'apply_movie_records': CATALOGUE_ATTRIBUTES,
+    'add_genre': ('_genres', '_genres_index'),
+    'add_actor': ('_actors', '_actors_index', '_actors_token_index'),
+    'add_director': ('_directors', '_directors_index', '_directors_token_index'),
+    'add_date': ('_dates', '_dates_index')
+}
+
+# The indexes built by build_name_indexes, and the changes that make each stale: to the 'names' of Movies, Genres,
+# Directors and Actors, to the 'votes' that weigh names, to the 'credits' linking Movies with Genres, Directors and
+# Actors, and to 'descriptions'.
+DERIVED_INDEXES = {
+    '_prefix_index': ('names', 'votes', 'credits'),
+    '_fuzzy_index': ('names', 'votes', 'credits'),
+    '_collaboration_graph': ('credits',),
+    '_similarity_index': ('credits',),
+    '_facet_ids': ('credits',),
+    '_related_descriptions': ('descriptions',)
+}
+INDEX_CHANGES = frozenset(('names', 'votes', 'credits', 'descriptions'))
+
+# The writers that change what the derived indexes are built from, and so may leave them to be built again. No other
+# writer changes the catalogue.
+INDEXED_WRITERS = ('add_movie', 'add_movies', 'remove_movie', 'apply_movie_records', 'add_genre', 'add_actor',
+                   'add_director')
+
+# The changes made by a change to each field of a Movie's record (see movie_record).
+RECORD_CHANGES = {1: ('names',), 2: ('credits',), 3: ('descriptions',), 4: ('credits',), 5: ('credits',), 9: ('votes',)}
+
+# Ids of a facet that matches no movies.
+NO_IDS = np.empty(0, dtype=np.int64)
+
 
 class MemoryRepository(AbstractRepository):
 
     def __init__(self):
-        self._movies = []
-        self._movies_index = {}
+        self._movies = ChunkedList()
+        self._movies_index = ChunkedDict()
+        self._movie_ids = []
+        self._movie_columns = MovieColumns()
+        self._description_index = DescriptionIndex()
+        self._title_index = {}
         self._genres = []
-        self._users = []
-        self._comments = []
+        self._genres_index = {}
+        self._users = ChunkedList()
+        self._users_index = ChunkedDict()
+        self._users_normalized_index = ChunkedDict()
+        self._comments = ChunkedList()
         self._directors = []
+        self._directors_index = {}
+        self._directors_token_index = {}
         self._actors = []
+        self._actors_index = {}
+        self._actors_token_index = {}
+
+        # The position in _users of the User indexed under each username.
+        self._user_positions = ChunkedDict()
+
+        # Built by build_name_indexes, and discarded by the changes listed in DERIVED_INDEXES.
+        self._prefix_index = None
+        self._fuzzy_index = None
+        self._collaboration_graph = None
+        self._similarity_index = None
+        self._facet_ids = None
+        self._related_descriptions = None
         self._dates = []
+        self._dates_index = {}
+
+        # The Journal recording added Users and Comments, once attach_journal is called.
+        self._journal = None
+
+        # In a draft made by copy_for_write, the objects the draft has copied or created, by id, which its writers may
+        # change in place, and the positions of Genres, Directors and Actors in their lists once looked up. None
+        # outside a draft, where writers change every object in place.
+        self._owned = None
+        self._positions = None
+
+    def attach_journal(self, journal: Journal):
+        # Attach after populating and replaying, so that only Users and Comments added from then on are recorded.
+        self._journal = journal
 
-    def add_user(self, user: User):
+    def add_user(self, user: User, journaled: bool = True):
+        # journaled is False for Users read from the data files, which needn't be recorded.
+        if self._journal is not None and journaled:
+            self._journal.append_user(user)
         self._users.append(user)
 
-    def get_user(self, username) -> User:
-        return next((user for user in self._users if user.username == username), None)
+        # Index the User by its exact and case-insensitive username. The first User registered under a name wins, as
+        # it did with the previous linear search.
+        if user.username not in self._users_index:
+            self._users_index[user.username] = user
+            self._user_positions[user.username] = len(self._users) - 1
+        self._users_normalized_index.setdefault(normalize_username(user.username), user)
+
+    def get_user(self, username, ignore_case: bool = False) -> User:
+        if ignore_case:
+            return self._users_normalized_index.get(normalize_username(username))
+        return self._users_index.get(username)
+
+    def is_username_available(self, username, ignore_case: bool = False) -> bool:
+        return self.get_user(username, ignore_case) is None
 
     def get_users(self):
         return self._users
 
+    def remove_user(self, username: str):
+        """ Removes the User registered under username. Their Comments stay with their Movies. """
+        user = self._users_index.pop(username, None)
+        if user is None:
+            return
+        self._users = ChunkedList(other for other in self._users if other is not user)
+
+        # Index the next User registered under the same name, if any, in place of the removed one.
+        normalized_username = normalize_username(username)
+        if self._users_normalized_index.get(normalized_username) is user:
+            del self._users_normalized_index[normalized_username]
+        for other in self._users:
+            if other.username == username:
+                self._users_index.setdefault(username, other)
+            if normalize_username(other.username) == normalized_username:
+                self._users_normalized_index.setdefault(normalized_username, other)
+        self.index_user_positions()
+
+    def apply_user_changes(self, users: Iterable[User], removed_usernames: Iterable[str] = ()):
+        """ Adds users, each replacing the Users registered under its username, and removes the Users registered under
+        removed_usernames, in one pass over the Users. Neither is journaled, as the changes come from users.csv. """
+        users = list(users)
+        usernames = set(removed_usernames).union(user.username for user in users)
+        normalized_usernames = {normalize_username(username) for username in usernames}
+        self._users = ChunkedList(chain((other for other in self._users if other.username not in usernames), users))
+
+        # Index the first remaining User under each changed name, as add_user would have.
+        for username in usernames:
+            self._users_index.pop(username, None)
+        for normalized_username in normalized_usernames:
+            self._users_normalized_index.pop(normalized_username, None)
+        for user in self._users:
+            if user.username in usernames:
+                self._users_index.setdefault(user.username, user)
+            normalized_username = normalize_username(user.username)
+            if normalized_username in normalized_usernames:
+                self._users_normalized_index.setdefault(normalized_username, user)
+        self.index_user_positions()
+
+    # Helper method to record the position of each indexed User, once Users have been removed.
+    def index_user_positions(self):
+        self._user_positions = ChunkedDict({user.username: position for position, user in enumerate(self._users)
+                                            if self._users_index.get(user.username) is user})
+
     def add_movie(self, movie: Movie):
+        self.own(movie)
         insort_left(self._movies, movie)
         self._movies_index[movie.id] = movie
+        insort_left(self._movie_ids, movie.id)
+        self._movie_columns.add(movie)
+        self._description_index.add(movie.id, movie.description)
+        self.index_title(movie)
+        self.discard_name_indexes()
+        if movie.date is not None:
+            self.add_date(movie.date)
+            insort_left(self.writable_value(self._dates_index, movie.date), movie.id)
+
+    def add_movies(self, movies: Iterable[Movie]):
+        # Append the movies, then sort each ordered list once rather than inserting every movie in place.
+        updated_dates = set()
+        for movie in movies:
+            self.own(movie)
+            self._movies.append(movie)
+            self._movies_index[movie.id] = movie
+            self._movie_ids.append(movie.id)
+            self._movie_columns.add(movie)
+            self._description_index.add(movie.id, movie.description)
+            self.index_title(movie)
+            if movie.date is not None:
+                self.add_date(movie.date)
+                self.writable_value(self._dates_index, movie.date).append(movie.id)
+                updated_dates.add(movie.date)
+
+        self.discard_name_indexes()
+        self._movies.sort(key=movie_sort_key)
+        self._movie_ids.sort()
+        for the_date in updated_dates:
+            self._dates_index[the_date].sort()
+
+    def remove_movie(self, movie_id: int):
+        """ Removes the Movie with movie_id, with its Comments, from the repository and from its Genres, Director and
+        Actors. """
+        if movie_id not in self._movies_index:
+            return
+        movie = self.writable_movie(self._movies_index[movie_id])
+
+        self.unindex_movie(movie)
+        del self._movies_index[movie_id]
+        del self._movie_ids[bisect_left(self._movie_ids, movie_id)]
+        self._movie_columns.remove(movie_id)
+        self._description_index.remove(movie_id)
+        for genre in list(movie.genres):
+            remove_genre_association(movie, self.writable_genre(genre))
+        if movie.director is not None:
+            self.writable_director(movie.director).remove_movie(movie)
+        for actor in list(movie.actors):
+            remove_actor_association(movie, self.writable_actor(actor))
+
+        # Comments may refer to an earlier copy of the Movie, so they're matched by id.
+        self._comments = ChunkedList(comment for comment in self._comments if comment.movie.id != movie_id)
+        self.discard_name_indexes()
+
+    def apply_movie_records(self, records: Iterable[tuple]) -> Dict[str, int]:
+        """ Brings the Movies in line with records read from Data1000Movies.csv (see movie_record), adding, changing
+        and removing only the Movies whose rows differ. Changed Movies are updated in place, keeping their Comments.
+
+        Returns the number of Movies added, changed and removed.
+        """
+        records = {record[0]: record for record in records}
+        removed_ids = [movie_id for movie_id in self._movies_index if movie_id not in records]
+        added = [record for movie_id, record in records.items() if movie_id not in self._movies_index]
+
+        # Note which fields changed, so that only the indexes built from them are discarded.
+        changed = list()
+        changes = set(INDEX_CHANGES) if len(added) > 0 or len(removed_ids) > 0 else set()
+        for movie_id, record in records.items():
+            movie = self._movies_index.get(movie_id)
+            if movie is None:
+                continue
+            stored = comparable_record(record_of_movie(movie))
+            updated = comparable_record(record_as_stored(record, movie))
+            if updated != stored:
+                changed.append(record)
+                for field, kinds in RECORD_CHANGES.items():
+                    if updated[field] != stored[field]:
+                        changes.update(kinds)
+
+        for movie_id in removed_ids:
+            self.remove_movie(movie_id)
+
+        for record in changed:
+            movie = self.writable_movie(self._movies_index[record[0]], credits=True)
+
+            # The title and year place the Movie in the ordered lists and indexes, so take it out while they change.
+            self.unindex_movie(movie)
+            movie.title = record[1]
+            movie.date = record[6]
+            set_movie_details(movie, record)
+            self.index_movie(movie)
+            self._movie_columns.add(movie)
+            self._description_index.add(movie.id, movie.description)
+            self.associate_movie(movie, record[2], record[4], record[5])
+
+        movies = [movie_from_record(record) for record in added]
+        self.add_movies(movies)
+        for movie, record in zip(movies, added):
+            self.associate_movie(movie, record[2], record[4], record[5])
+
+        self.discard_name_indexes(changes)
+        return {'added': len(added), 'changed': len(changed), 'removed': len(removed_ids)}
 
     def get_movie(self, movie_id: int) -> Movie:
         movie = None
@@ -50,19 +326,15 @@ class MemoryRepository(AbstractRepository):
     def get_first_movie(self):
         movie = None
 
-        if len(self._movies) > 0:
-            for mov in self._movies:
-                if mov.id == 1:
-                    movie = mov
+        if len(self._movie_ids) > 0:
+            movie = self._movies_index[self._movie_ids[0]]
         return movie
 
     def get_last_movie(self):
         movie = None
 
-        if len(self._movies) > 0:
-            for mov in self._movies:
-                if mov.id == len(self._movies):
-                    movie = mov
+        if len(self._movie_ids) > 0:
+            movie = self._movies_index[self._movie_ids[-1]]
         return movie
 
     def get_movies_by_id(self, id_list):
@@ -74,8 +346,7 @@ class MemoryRepository(AbstractRepository):
         return movies
 
     def get_movie_ids_for_genre(self, genre_name: str):
-        # Linear search, to find the first occurrence of a Genre with the name genre_name.
-        genre = next((genre for genre in self._genres if genre.genre_name == genre_name), None)
+        genre = self._genres_index.get(genre_name)
 
         # Retrieve the ids of movies associated with the Genre.
         if genre is not None:
@@ -87,107 +358,292 @@ class MemoryRepository(AbstractRepository):
         return movie_ids
 
     def get_movie_ids_for_director(self, director_name: str):
-        # Linear search, to find the first occurrence of a Director with the name director_name.
-        director = next((director for director in self._directors if
-                         director_name == director.director_full_name or
-                         director_name in director.director_full_name.split()), None)
-
-        # Retrieve the ids of movies associated with the Director.
+        # A full name identifies a single Director; otherwise every Director with director_name as part of their name
+        # matches.
+        director = self._directors_index.get(director_name)
         if director is not None:
-            movie_ids = [movie.id for movie in director.directed_movies]
+            directors = [director]
         else:
-            # No Director with name director_name, so return an empty list.
-            movie_ids = list()
+            directors = self._directors_token_index.get(director_name, [])
 
-        return movie_ids
+        # Retrieve the ids of movies associated with the Directors.
+        return collect_movie_ids(director.directed_movies for director in directors)
 
     def get_movie_ids_for_actor(self, actor_name: str):
-        # Linear search, to find the first occurrence of a actor with the name actor_name.
-        actor = next((actor for actor in self._actors if
-                      actor_name == actor.actor_full_name or actor_name in actor.actor_full_name.split()), None)
-
-        # Retrieve the ids of movies associated with the Actor.
+        # A full name identifies a single Actor; otherwise every Actor with actor_name as part of their name matches.
+        actor = self._actors_index.get(actor_name)
         if actor is not None:
-            movie_ids = [movie.id for movie in actor.joined_movies]
+            actors = [actor]
         else:
-            # No Actor with name actor_name, so return an empty list.
-            movie_ids = list()
+            actors = self._actors_token_index.get(actor_name, [])
+
+        # Retrieve the ids of movies associated with the Actors.
+        return collect_movie_ids(actor.joined_movies for actor in actors)
+
+    def get_movie_ids_for_title(self, title_name: str, match_phrase: bool = True):
+        terms = title_terms(title_name)
+        if len(terms) == 0:
+            return list()
+
+        # Look up each term's postings, and intersect them starting with the shortest.
+        postings = [self._title_index.get(term) for term in terms]
+        if None in postings:
+            return list()
+        shortest_first = sorted(postings, key=len)
+        candidates = set(shortest_first[0])
+        for posting in shortest_first[1:]:
+            candidates.intersection_update(posting)
+            if len(candidates) == 0:
+                return list()
+
+        if match_phrase and len(terms) > 1:
+            # Keep only movies where the terms appear consecutively, in order.
+            candidates = [movie_id for movie_id in candidates if
+                          any(all(start + offset in postings[offset][movie_id] for offset in range(1, len(terms)))
+                              for start in postings[0][movie_id])]
+
+        return sorted(candidates)
+
+    def get_movie_ids_for_description(self, query: str, quantity: int = 30):
+        return [movie_id for movie_id, _ in self._description_index.search(query, quantity)]
 
-        return movie_ids
+    def get_movie_ids_for_date(self, the_date: str):
+        try:
+            year = int(the_date)
+        except (TypeError, ValueError):
+            # the_date isn't a year, so no movies match.
+            return list()
 
-    def get_movie_ids_for_title(self, title_name: str):
-        movie_ids = list()
-        for movie in self._movies:
-            if title_name == movie.title or title_name in movie.title.split():
-                movie_ids.append(movie.id)
+        return list(self._dates_index.get(year, []))
 
-        return movie_ids
+    def get_movie_ids_for_date_range(self, start_date: int, end_date: int):
+        # Find the slice of the sorted years that falls within the range.
+        first = bisect_left(self._dates, start_date)
+        last = bisect_right(self._dates, end_date)
 
-    def get_movie_ids_for_date(self, the_date: str):
         movie_ids = list()
-        for movie in self._movies:
-            if str(movie.date) == the_date:
-                movie_ids.append(movie.id)
+        for year in self._dates[first:last]:
+            movie_ids.extend(self._dates_index[year])
 
         return movie_ids
 
+    def get_movie_ids_for_attribute_range(self, attribute: str, minimum: float = None, maximum: float = None):
+        return self._movie_columns.ids_in_range(attribute, minimum, maximum).tolist()
+
+    def get_leaderboard_movie_ids(self, attribute: str, cursor: int = 0, quantity: int = 10) -> List[int]:
+        return self._movie_columns.leaderboard(attribute, cursor, cursor + quantity).tolist()
+
+    def get_leaderboard_length(self, attribute: str) -> int:
+        return self._movie_columns.leaderboard_length(attribute)
+
+    def get_attribute_mean_by_genre(self, attribute: str) -> Dict[str, float]:
+        groups = {genre.genre_name: self.get_movie_ids_for_genre(genre.genre_name) for genre in self._genres}
+        return self._movie_columns.mean_by_group(attribute, groups)
+
+    def get_attribute_total_by_date(self, attribute: str) -> Dict[int, float]:
+        return self._movie_columns.total_by_year(attribute)
+
+    def get_movie_ids_for_facets(self, genre_names: Iterable[str] = (), director_name: str = None,
+                                 actor_name: str = None, start_date: int = None, end_date: int = None,
+                                 minimum_rating: float = None):
+        if self._facet_ids is None:
+            self.build_name_indexes()
+        start_date = start_date if start_date is not None else -math.inf
+        end_date = end_date if end_date is not None else math.inf
+        has_date_range = not (math.isinf(start_date) and math.isinf(end_date))
+
+        # Gather the presorted ids of each name facet that was given.
+        facets = [self._facet_ids.get(('genre', genre_name), NO_IDS) for genre_name in genre_names]
+        if director_name is not None:
+            facets.append(self._facet_ids.get(('director', director_name), NO_IDS))
+        if actor_name is not None:
+            facets.append(self._facet_ids.get(('actor', actor_name), NO_IDS))
+
+        if len(facets) == 0:
+            # Without a name facet, a range facet supplies the candidates: only the Movies within it are sorted.
+            if has_date_range:
+                facets.append(np.sort(np.array(self.get_movie_ids_for_date_range(start_date, end_date),
+                                               dtype=np.int64)))
+                has_date_range = False
+            elif minimum_rating is not None:
+                facets.append(self._movie_columns.ids_at_least('rating', minimum_rating))
+                minimum_rating = None
+            else:
+                # No facets, so every movie matches.
+                return list(self._movie_ids)
+
+        # Check the remaining range facets against the values of each candidate, rather than gathering every Movie
+        # within the ranges.
+        movie_ids = intersect_movie_ids(facets)
+        if len(movie_ids) > 0 and (has_date_range or minimum_rating is not None):
+            rows = self._movie_columns.rows_for(movie_ids.tolist())
+            mask = np.ones(len(rows), dtype=bool)
+            if has_date_range:
+                years = self._movie_columns.years()[rows]
+                mask &= (years != UNKNOWN_YEAR) & (years >= start_date) & (years <= end_date)
+            if minimum_rating is not None:
+                mask &= self._movie_columns.column('rating')[rows] >= minimum_rating
+            movie_ids = movie_ids[mask]
+        return movie_ids.tolist()
+
+    def get_facet_counts(self, movie_ids: List[int]) -> Dict[str, Dict]:
+        genre_counts = Counter()
+        date_counts = Counter()
+        for movie in self.get_movies_by_id(movie_ids):
+            genre_counts.update(genre.genre_name for genre in movie.genres)
+            if movie.date is not None:
+                date_counts[movie.date] += 1
+
+        return {
+            'genre': dict(genre_counts.most_common()),
+            'date': dict(sorted(date_counts.items()))
+        }
+
     def get_date_of_previous_movie(self, movie: Movie):
-        previous_date = None
+        # Movies are ordered by date, then by id.
+        if not self.contains_movie(movie):
+            return None
 
-        try:
-            index = self.movie_index(movie)
-            if index == 0:
-                return None
-            previous_date = self._movies[index - 1].date
-        except:
-            # No earlier movies, so return None.
-            pass
+        if self._dates_index[movie.date][0] < movie.id:
+            # An earlier movie was released in the same year.
+            return movie.date
+
+        # Look for the closest earlier year that has movies.
+        year_index = bisect_left(self._dates, movie.date) - 1
+        while year_index >= 0 and len(self._dates_index[self._dates[year_index]]) == 0:
+            year_index -= 1
 
-        return previous_date
+        if year_index < 0:
+            # No earlier movies, so return None.
+            return None
+        return self._dates[year_index]
 
     def get_date_of_next_movie(self, movie: Movie):
-        next_date = None
+        # Movies are ordered by date, then by id.
+        if not self.contains_movie(movie):
+            return None
 
-        try:
-            index = self.movie_index(movie)
-            next_date = self._movies[index + 1].date
-        except:
-            # No subsequent movies, so return None.
-            pass
+        if self._dates_index[movie.date][-1] > movie.id:
+            # A later movie was released in the same year.
+            return movie.date
 
-        return next_date
+        # Look for the closest later year that has movies.
+        year_index = bisect_right(self._dates, movie.date)
+        while year_index < len(self._dates) and len(self._dates_index[self._dates[year_index]]) == 0:
+            year_index += 1
+
+        if year_index == len(self._dates):
+            # No subsequent movies, so return None.
+            return None
+        return self._dates[year_index]
 
     def add_genre(self, genre: Genre):
-        self._genres.append(genre)
+        self._genres.append(self.own(genre))
+        self._genres_index.setdefault(genre.genre_name, genre)
+        self.discard_name_indexes(('names', 'credits'))
 
     def get_genres(self) -> List[Genre]:
         return self._genres
 
     def add_actor(self, actor: Actor):
-        self._actors.append(actor)
+        self._actors.append(self.own(actor))
+        self.index_name(self._actors_index, self._actors_token_index, actor.actor_full_name, actor)
+        self.discard_name_indexes(('names', 'credits'))
 
     def get_actors(self) -> List[Actor]:
         return self._actors
 
     def add_date(self, the_date: int):
-        self._dates.append(the_date)
+        if the_date not in self._dates_index:
+            self._dates_index[the_date] = self.own(list())
+            insort_left(self._dates, the_date)
 
     def get_dates(self) -> List[int]:
         return self._dates
 
     def add_director(self, director: Director):
-        self._directors.append(director)
+        self._directors.append(self.own(director))
+        self.index_name(self._directors_index, self._directors_token_index, director.director_full_name, director)
+        self.discard_name_indexes(('names', 'credits'))
 
     def get_directors(self) -> List[Director]:
         return self._directors
 
     def add_comment(self, comment: Comment):
         super().add_comment(comment)
+        if self._journal is not None:
+            self._journal.append_comment(comment)
         self._comments.append(comment)
 
+    def comment_on_movie(self, comment_text: str, user: User, movie: Movie, timestamp: datetime = None) -> Comment:
+        # Attach the Comment to the User and Movie this repository holds, which in a draft are copies of them.
+        return super().comment_on_movie(comment_text, self.writable_user(user), self.writable_movie(movie), timestamp)
+
     def add_image_link(self, link: str, movie: Movie):
-        index = self._movies.index(movie)
-        self._movies[index].image_hyperlink = link
+        if movie.id not in self._movies_index:
+            raise RepositoryException(f'Movie {movie.id} not in the repository')
+        self.writable_movie(movie).image_hyperlink = link
+
+    def add_image_links(self, links: Dict[int, str]):
+        # Check every id before updating any Movie, so that a failed batch leaves the repository unchanged.
+        unknown_ids = [movie_id for movie_id in links if movie_id not in self._movies_index]
+        if len(unknown_ids) > 0:
+            raise RepositoryException(f'Movies {unknown_ids} not in the repository')
+
+        for movie_id, link in links.items():
+            self.writable_movie(self._movies_index[movie_id]).image_hyperlink = link
+
+    def build_name_indexes(self):
+        # Build the indexes that are missing, having been discarded since they were last built.
+        if self._prefix_index is None or self._fuzzy_index is None:
+            entries = list(self.name_entries())
+            self._prefix_index = PrefixIndex(entries)
+            self._fuzzy_index = FuzzyNameIndex(entries)
+        if self._collaboration_graph is None:
+            self._collaboration_graph = CollaborationGraph(self.credit_entries())
+        if self._similarity_index is None:
+            self._similarity_index = SimilarityIndex(self.feature_entries())
+        if self._facet_ids is None:
+            self._facet_ids = dict(self.facet_entries())
+        if self._related_descriptions is None:
+            self._related_descriptions = RelatedDescriptions((movie.id, movie.description) for movie in self._movies)
+
+    def discard_name_indexes(self, changes: Iterable[str] = INDEX_CHANGES):
+        # Discard the indexes made stale by the given kinds of change (see DERIVED_INDEXES).
+        changes = frozenset(changes)
+        for name, kinds in DERIVED_INDEXES.items():
+            if not changes.isdisjoint(kinds):
+                setattr(self, name, None)
+
+    def get_name_completions(self, prefix: str, quantity: int = MAX_COMPLETIONS) -> List[Tuple[str, str]]:
+        if self._prefix_index is None:
+            self.build_name_indexes()
+        return self._prefix_index.complete(prefix, quantity)
+
+    def get_name_suggestions(self, query: str, quantity: int = 5) -> List[Tuple[str, str, int]]:
+        if self._fuzzy_index is None:
+            self.build_name_indexes()
+        return self._fuzzy_index.suggest(query, quantity)
+
+    def get_collaboration_path(self, first: Tuple[str, str], second: Tuple[str, str]) -> List[Tuple[str, str]]:
+        if self._collaboration_graph is None:
+            self.build_name_indexes()
+        return self._collaboration_graph.shortest_path(first, second)
+
+    def get_top_collaborators(self, person: Tuple[str, str], quantity: int = 10) -> List[Tuple[str, str, int]]:
+        if self._collaboration_graph is None:
+            self.build_name_indexes()
+        return self._collaboration_graph.top_collaborators(person, quantity)
+
+    def get_similar_movie_ids(self, movie_id: int, quantity: int = 5) -> List[int]:
+        if self._similarity_index is None:
+            self.build_name_indexes()
+        return [similar_id for similar_id, _ in self._similarity_index.similar(movie_id, quantity)]
+
+    def get_related_movie_ids(self, movie_id: int, quantity: int = 5) -> List[int]:
+        if self._related_descriptions is None:
+            self.build_name_indexes()
+        return [related_id for related_id, _ in self._related_descriptions.related(movie_id, quantity)]
 
     def get_comments(self):
         return self._comments
@@ -195,12 +651,315 @@ class MemoryRepository(AbstractRepository):
     def get_movies(self):
         return self._movies
 
-    # Helper method to return movie index.
-    def movie_index(self, movie: Movie):
-        index = bisect_left(self._movies, movie)
-        if index != len(self._movies) and self._movies[index].date == movie.date:
-            return index
-        raise ValueError
+    def copy_for_write(self, writer: str) -> 'MemoryRepository':
+        """ Returns a copy of the repository on which the method named writer can be called without changing this
+        one. Only the containers the writer changes are copied, and the copy's writers copy the nested containers and
+        domain objects they change before changing them. """
+        draft = copy.copy(self)
+        for name in WRITTEN_ATTRIBUTES[writer]:
+            setattr(draft, name, copy.copy(getattr(self, name)))
+        draft._owned = dict()
+        draft._positions = dict()
+        return draft
+
+    def prepare_for_readers(self):
+        """ Does the work that reads would otherwise do on first use, so that a published version is never changed by
+        its readers. Only the indexes the write discarded are built again. """
+        self._movie_columns.flush()
+        if any(getattr(self, name) is None for name in DERIVED_INDEXES):
+            self.build_name_indexes()
+        self._owned = None
+        self._positions = None
+
+    def take_derived_indexes(self, source: 'MemoryRepository'):
+        """ Uses the derived indexes of source, a version of the repository whose catalogue is the same as this one's,
+        rather than building them again. """
+        for name in DERIVED_INDEXES:
+            setattr(self, name, getattr(source, name))
+
+    # Helper methods for writers. In a draft, an object is changed in place only once the draft owns it, having
+    # copied or created it; outside a draft, every object is.
+    def owns(self, obj) -> bool:
+        return self._owned is None or id(obj) in self._owned
+
+    def own(self, obj):
+        if self._owned is not None:
+            self._owned[id(obj)] = obj
+        return obj
+
+    def adopt(self, obj):
+        # Returns an owned copy of obj, which the caller puts in its place.
+        return self.own(copy.copy(obj))
+
+    def writable_value(self, container: dict, key, factory=None):
+        # Returns container[key], made first by factory if missing, or copied first if shared.
+        value = container.get(key)
+        if value is None:
+            value = container[key] = self.own(factory())
+        elif not self.owns(value):
+            value = container[key] = self.adopt(value)
+        return value
+
+    def writable_movie(self, movie: Movie, credits: bool = False) -> Movie:
+        # Returns the Movie held under movie's id, copied first if shared, or movie itself if none is held. With
+        # credits, the Movie's Genres, Director and Actors are copied too, and refer to the copy.
+        stored = self._movies_index.get(movie.id)
+        if stored is None:
+            return movie
+        if not self.owns(stored):
+            copied = self.adopt(stored)
+            self._movies[self.movie_position(stored)] = copied
+            self._movies_index[movie.id] = copied
+        else:
+            copied = stored
+        if credits and self._owned is not None:
+            copied.genres = [self.writable_genre(genre) for genre in copied.genres]
+            for genre in copied.genres:
+                genre.replace_movie(stored, copied)
+            if copied.director is not None:
+                copied.director = self.writable_director(copied.director)
+                copied.director.replace_movie(stored, copied)
+            copied.actors = [self.writable_actor(actor) for actor in copied.actors]
+            for actor in copied.actors:
+                actor.replace_movie(stored, copied)
+        return copied
+
+    def writable_user(self, user: User) -> User:
+        # Returns the User indexed under user's username, copied first if shared, or user itself if none is.
+        stored = self._users_index.get(user.username)
+        if stored is None or self.owns(stored):
+            return stored if stored is not None else user
+        copied = self.adopt(stored)
+        self._users[self._user_positions[user.username]] = copied
+        self._users_index[user.username] = copied
+        normalized_username = normalize_username(user.username)
+        if self._users_normalized_index.get(normalized_username) is stored:
+            self._users_normalized_index[normalized_username] = copied
+        return copied
+
+    def writable_genre(self, genre: Genre) -> Genre:
+        return self.writable_entity(genre, genre.genre_name, '_genres', self._genres_index)
+
+    def writable_director(self, director: Director) -> Director:
+        return self.writable_entity(director, director.director_full_name, '_directors', self._directors_index,
+                                    self._directors_token_index)
+
+    def writable_actor(self, actor: Actor) -> Actor:
+        return self.writable_entity(actor, actor.actor_full_name, '_actors', self._actors_index,
+                                    self._actors_token_index)
+
+    def writable_entity(self, entity, name: str, attribute: str, index: dict, token_index: dict = None):
+        # Returns the entity held under name, copied first if shared, or entity itself if none is held. A copy takes
+        # the original's place in the list named attribute and in the indexes.
+        stored = index.get(name) if name is not None else None
+        if stored is None or self.owns(stored):
+            return stored if stored is not None else entity
+        copied = self.adopt(stored)
+        index[name] = copied
+        if token_index is not None:
+            for token in dict.fromkeys(name.split()):
+                replace_item(self.writable_value(token_index, token), stored, copied)
+
+        positions = self._positions.get(attribute)
+        if positions is None:
+            positions = self._positions[attribute] = {id(other): position
+                                                      for position, other in enumerate(getattr(self, attribute))}
+        position = positions.get(id(stored))
+        if position is not None:
+            getattr(self, attribute)[position] = copied
+            positions[id(copied)] = position
+        return copied
+
+    # Helper method to pair each genre, director and actor name, and each word of a director or actor name, with the
+    # sorted ids of its movies. A full name takes precedence over a word, as in get_movie_ids_for_director.
+    def facet_entries(self):
+        for genre_name, genre in self._genres_index.items():
+            yield ('genre', genre_name), sorted_movie_ids(genre.tagged_movies)
+        for kind, index, token_index, credited_movies in (
+                ('director', self._directors_index, self._directors_token_index, lambda person: person.directed_movies),
+                ('actor', self._actors_index, self._actors_token_index, lambda person: person.joined_movies)):
+            for name, person in index.items():
+                yield (kind, name), sorted_movie_ids(credited_movies(person))
+            for token, people in token_index.items():
+                if token not in index:
+                    yield (kind, token), sorted_movie_ids(chain.from_iterable(map(credited_movies, people)))
+
+    # Helper method to list every searchable name as a (name, kind, weight) triple, weighted by the votes of its movies.
+    def name_entries(self):
+        for movie in self._movies:
+            if movie.title is not None:
+                yield movie.title, 'title', movie.votes
+        for genre in self._genres:
+            if genre.genre_name is not None:
+                yield genre.genre_name, 'genre', sum(movie.votes for movie in genre.tagged_movies)
+        for director in self._directors:
+            if director.director_full_name is not None:
+                yield director.director_full_name, 'director', sum(movie.votes for movie in director.directed_movies)
+        for actor in self._actors:
+            if actor.actor_full_name is not None:
+                yield actor.actor_full_name, 'actor', sum(movie.votes for movie in actor.joined_movies)
+
+    # Helper method to list the (name, kind) pairs of the actors and director of each movie.
+    def credit_entries(self):
+        for movie in self._movies:
+            people = [(actor.actor_full_name, 'actor') for actor in movie.actors if actor.actor_full_name is not None]
+            if movie.director is not None and movie.director.director_full_name is not None:
+                people.append((movie.director.director_full_name, 'director'))
+            yield people
+
+    # Helper method to list the id of each movie with its genre, actor and director features.
+    def feature_entries(self):
+        for movie in self._movies:
+            features = [f'genre:{genre.genre_name}' for genre in movie.genres]
+            features.extend(f'actor:{actor.actor_full_name}' for actor in movie.actors)
+            if movie.director is not None:
+                features.append(f'director:{movie.director.director_full_name}')
+            yield movie.id, features
+
+    # Helper methods to take a movie out of, and put it back into, the title order and the title and date indexes.
+    def unindex_movie(self, movie: Movie):
+        del self._movies[self.movie_position(movie)]
+        self.unindex_title(movie)
+        if movie.date is not None:
+            movie_ids = self.writable_value(self._dates_index, movie.date)
+            del movie_ids[bisect_left(movie_ids, movie.id)]
+
+    def index_movie(self, movie: Movie):
+        insort_left(self._movies, movie)
+        self.index_title(movie)
+        if movie.date is not None:
+            self.add_date(movie.date)
+            insort_left(self.writable_value(self._dates_index, movie.date), movie.id)
+
+    def movie_position(self, movie: Movie) -> int:
+        # Movies that compare equal are adjacent in the title order, so the search ends among them.
+        position = bisect_left(self._movies, movie)
+        while self._movies[position] is not movie:
+            position += 1
+        return position
+
+    # Helper methods to map each term of the title to the ids of movies containing it, and each id to the term's
+    # positions in the title, and to undo that.
+    def index_title(self, movie: Movie):
+        for position, term in enumerate(title_terms(movie.title)):
+            self.writable_value(self._title_index, term, dict).setdefault(movie.id, set()).add(position)
+
+    def unindex_title(self, movie: Movie):
+        for term in title_terms(movie.title):
+            if term in self._title_index:
+                movie_ids = self.writable_value(self._title_index, term)
+                movie_ids.pop(movie.id, None)
+                if len(movie_ids) == 0:
+                    del self._title_index[term]
+
+    def index_name(self, name_index: dict, token_index: dict, name: str, entity):
+        # Map the full name to its entity, and each word of the name to every entity whose name contains that word.
+        if name is None:
+            return
+        name_index.setdefault(name, entity)
+        for token in dict.fromkeys(name.split()):
+            self.writable_value(token_index, token, list).append(entity)
+
+    # Helper method to bring movie's Genres, Director and Actors in line with the given names, adding any new ones.
+    def associate_movie(self, movie: Movie, genre_names: List[str], director_names: List[str],
+                        actor_names: List[str]):
+        for genre in [genre for genre in movie.genres if genre.genre_name not in genre_names]:
+            remove_genre_association(movie, self.writable_genre(genre))
+        for genre_name in genre_names:
+            genre = self._genres_index.get(genre_name)
+            if genre is None:
+                genre = Genre(genre_name)
+                make_genre_association(movie, genre)
+                self.add_genre(genre)
+            elif not genre.is_applied_to(movie):
+                make_genre_association(movie, self.writable_genre(genre))
+
+        # A Movie has a single Director; as when loading, it's the last one listed.
+        director_name = director_names[-1] if len(director_names) > 0 else None
+        if movie.director is not None and movie.director.director_full_name != director_name:
+            self.writable_director(movie.director).remove_movie(movie)
+        if director_name is not None and (movie.director is None or movie.director.director_full_name != director_name):
+            director = self._directors_index.get(director_name)
+            if director is None:
+                director = Director(director_name)
+                make_director_association(movie, director)
+                self.add_director(director)
+            else:
+                make_director_association(movie, self.writable_director(director))
+
+        for actor in [actor for actor in movie.actors if actor.actor_full_name not in actor_names]:
+            remove_actor_association(movie, self.writable_actor(actor))
+        for actor_name in actor_names:
+            actor = self._actors_index.get(actor_name)
+            if actor is None:
+                actor = Actor(actor_name)
+                make_actor_association(movie, actor)
+                self.add_actor(actor)
+            elif not actor.joined(movie):
+                make_actor_association(movie, self.writable_actor(actor))
+
+    # Helper method to check that movie is the one stored in the repository under its id.
+    def contains_movie(self, movie: Movie) -> bool:
+        stored = self._movies_index.get(movie.id)
+        return stored is not None and stored.date == movie.date and movie.date is not None
+
+
+def normalize_username(username) -> str:
+    if not isinstance(username, str):
+        return username
+    return username.strip().casefold()
+
+
+def replace_item(items: list, item, replacement):
+    # Put replacement in place of item, found by identity rather than equality.
+    for position, other in enumerate(items):
+        if other is item:
+            items[position] = replacement
+            return
+
+
+def collect_movie_ids(movie_lists) -> List[int]:
+    # Concatenate the ids of the given movie lists, dropping duplicates but keeping first-seen order.
+    movie_ids = dict()
+    for movies in movie_lists:
+        for movie in movies:
+            movie_ids[movie.id] = None
+    return list(movie_ids)
+
+
+def sorted_movie_ids(movies) -> np.ndarray:
+    return np.unique(np.fromiter((movie.id for movie in movies), dtype=np.int64))
+
+
+def intersect_movie_ids(id_arrays: List[np.ndarray]) -> np.ndarray:
+    # Intersect sorted arrays of unique ids smallest first, probing each larger array with binary search. The cost is
+    # about the size of the smallest array times the logarithm of the others, as no array is sorted or scanned here.
+    id_arrays = sorted(id_arrays, key=len)
+    result = id_arrays[0]
+    for ids in id_arrays[1:]:
+        if len(result) == 0:
+            break
+        positions = np.searchsorted(ids, result)
+        found = positions < len(ids)
+        found[found] = ids[positions[found]] == result[found]
+        result = result[found]
+    return result
+
+
+def movie_sort_key(movie: Movie):
+    # Orders movies as Movie.__lt__ does, by title and then by year, without a Python-level comparison per pair.
+    return movie.title, movie.date
+
+
+def title_terms(title: str) -> List[str]:
+    if not isinstance(title, str):
+        return list()
+    return title.lower().split()
+
+
+def read_csv_header(filename: str) -> List[str]:
+    with open(filename, encoding='utf-8-sig') as infile:
+        return [column.strip() for column in next(csv.reader(infile))]
 
 
 def read_csv_file(filename: str):
@@ -217,49 +976,139 @@ def read_csv_file(filename: str):
             yield row
 
 
-def load_movies_and_genres(data_path: str, repo: MemoryRepository):
+def movie_record(data_row: List[str]) -> tuple:
+    # A row of Data1000Movies.csv converted to its types, with names lower-cased and split into lists. Records are
+    # plain tuples, as they pickle in half the time of named tuples when returned by a worker process.
+    return (int(data_row[0]), data_row[1].lower(), split_names(data_row[2]), data_row[3], split_names(data_row[4]),
+            split_names(data_row[5]), int(data_row[6]), int(data_row[7]), float(data_row[8]), float(data_row[9]),
+            data_row[10], data_row[11])
+
+
+def split_names(names: str) -> List[str]:
+    return [name.strip() for name in names.lower().split(",")]
+
+
+def movie_from_record(record: tuple) -> Movie:
+    movie = Movie(
+        title=record[1],
+        year=record[6],
+        movie_id=record[0]
+    )
+    set_movie_details(movie, record)
+    return movie
+
+
+def set_movie_details(movie: Movie, record: tuple):
+    (_, _, _, description, _, _, _, runtime_minutes, rating, votes, revenue, metascore) = record
+    movie.description = description
+    movie.runtime_minutes = runtime_minutes
+    movie.rating = rating
+    movie.votes = votes
+    movie.revenue = f"{revenue}Millions" if revenue != 'N/A' else 'N/A'
+    movie.metascore = metascore
+
+
+def record_of_movie(movie: Movie) -> tuple:
+    # The record of the row movie was loaded from, as far as the Movie holds it.
+    director_names = [movie.director.director_full_name] if movie.director is not None else []
+    return (movie.id, movie.title, [genre.genre_name for genre in movie.genres], movie.description, director_names,
+            [actor.actor_full_name for actor in movie.actors], movie.date, movie.runtime_minutes, movie.rating,
+            movie.votes, movie.revenue.replace('Millions', ''), movie.metascore)
+
+
+def record_as_stored(record: tuple, movie: Movie) -> tuple:
+    # The Movie.date setter ignores years before 1900, so a record with such a year leaves the Movie's year as it is.
+    year = record[6]
+    if not (isinstance(year, int) and year >= 1900):
+        record = record[:6] + (movie.date,) + record[7:]
+    return record
+
+
+def comparable_record(record: tuple) -> tuple:
+    # Normalize the parts of a record that a Movie doesn't hold exactly as read: the order of names, a Movie's single
+    # Director, blank descriptions and the rounding of ratings.
+    (movie_id, title, genre_names, description, director_names, actor_names, year, runtime_minutes, rating, votes,
+     revenue, metascore) = record
+    return (movie_id, title, frozenset(genre_names), description or None, director_names[-1:], frozenset(actor_names),
+            year, runtime_minutes, round(rating, 2), float(votes), revenue, metascore)
+
+
+def read_movie_records(filename: str) -> List[tuple]:
+    size = os.path.getsize(filename)
+    if size >= PARALLEL_LOAD_MINIMUM_BYTES and (os.cpu_count() or 1) > 1:
+        try:
+            return read_movie_records_in_parallel(filename, size)
+        except (ValueError, IndexError, csv.Error):
+            # A chunk couldn't be parsed on its own, e.g. a quoted field spans lines. Parsing the whole file in this
+            # process handles that, and reports any genuinely malformed row.
+            pass
+    return [movie_record(data_row) for data_row in read_csv_file(filename)]
+
+
+def read_movie_records_in_parallel(filename: str, size: int) -> List[tuple]:
+    # Split the file into about four chunks per worker, so that a slow chunk doesn't leave the other workers idle.
+    chunk_size = max(MINIMUM_CHUNK_BYTES, size // (4 * (os.cpu_count() or 1)))
+    ranges = chunk_ranges(filename, size, chunk_size)
+
+    records = list()
+    with ProcessPoolExecutor() as executor:
+        # Chunks are returned in file order, so the records are in the same order as the rows.
+        for chunk_records in executor.map(parse_movie_chunk, [filename] * len(ranges), *zip(*ranges)):
+            records.extend(chunk_records)
+    return records
+
+
+def chunk_ranges(filename: str, size: int, chunk_size: int) -> List[Tuple[int, int]]:
+    # Return (start, end) byte offsets covering the rows after the header, with every chunk starting at the beginning
+    # of a line so that no row is split between two chunks.
+    with open(filename, 'rb') as infile:
+        infile.readline()
+        boundaries = [infile.tell()]
+        while boundaries[-1] + chunk_size < size:
+            infile.seek(boundaries[-1] + chunk_size)
+            infile.readline()
+            if infile.tell() >= size:
+                break
+            boundaries.append(infile.tell())
+    boundaries.append(size)
+    return list(zip(boundaries, boundaries[1:]))
+
+
+def parse_movie_chunk(filename: str, start: int, end: int) -> List[tuple]:
+    with open(filename, 'rb') as infile:
+        infile.seek(start)
+        # Split lines as read_csv_file's text-mode file does, only at '\n', '\r' and '\r\n'. str.splitlines() would
+        # also split at characters such as '\u2028' and '\x0c', which may appear within a description.
+        lines = io.StringIO(infile.read(end - start).decode('utf-8'), newline=None).readlines()
+
+    # Every row must lie on one line; an odd number of quotes means a quoted field carries on to the next line.
+    if any(line.count('"') % 2 == 1 for line in lines):
+        raise ValueError(f'A row of {filename} between bytes {start} and {end} spans several lines')
+
+    return [movie_record([item.strip() for item in row]) for row in csv.reader(lines)]
+
+
+def load_movies_and_genres(data_path: str, repo: AbstractRepository):
+    movies = list()
     genres = dict()
     directors = dict()
     actors = dict()
 
-    for data_row in read_csv_file(os.path.join(data_path, 'Data1000Movies.csv')):
-
-        movie_key = int(data_row[0])
-        movie_genres = data_row[2].lower().split(",")
-        movie_directors = data_row[4].lower().split(",")
-        movie_actors = data_row[5].lower().split(",")
+    for record in read_movie_records(os.path.join(data_path, 'Data1000Movies.csv')):
+        movie_key, movie_genres, movie_directors, movie_actors = record[0], record[2], record[4], record[5]
 
         # Add any new genres; associate the current movie with genres.
         for genre in movie_genres:
-            if genre not in genres.keys():
-                genres[genre] = list()
-            genres[genre].append(movie_key)
+            genres.setdefault(genre, list()).append(movie_key)
         for director in movie_directors:
-            if director not in directors.keys():
-                directors[director] = list()
-            directors[director].append(movie_key)
+            directors.setdefault(director, list()).append(movie_key)
         for actor in movie_actors:
-            if actor not in actors.keys():
-                actors[actor] = list()
-            actors[actor].append(movie_key)
-
-        # Create Movie object.
-        movie = Movie(
-            title=data_row[1].lower(),
-            year=int(data_row[6]),
-            movie_id=int(data_row[0])
-        )
-        movie.description = data_row[3]
-        movie.runtime_minutes = int(data_row[7])
-        movie.rating = float(data_row[8])
-        movie.votes = float(data_row[9])
-        if data_row[10] != 'N/A':
-            movie.revenue = f"{data_row[10]}Millions"
-        if data_row[11] != 'N/A':
-            movie.metascore = data_row[11]
-
-        # Add the Movie to the repository.
-        repo.add_movie(movie)
+            actors.setdefault(actor, list()).append(movie_key)
+
+        movies.append(movie_from_record(record))
+
+    # Add the Movies to the repository in one batch.
+    repo.add_movies(movies)
 
     # Create Genre objects, associate them with Movies and add them to the repository.
     for genre_name in genres.keys():
@@ -284,20 +1133,53 @@ def load_movies_and_genres(data_path: str, repo: MemoryRepository):
         repo.add_actor(actor)
 
 
-def load_users(data_path: str, repo: MemoryRepository):
-    users = dict()
+def load_users(data_path: str, repo: AbstractRepository, password_method: str = None):
+    rows = read_user_rows(data_path)
 
-    for data_row in read_csv_file(os.path.join(data_path, 'users.csv')):
+    # A row may give a password hash, which is used as is, or a plaintext password, which is hashed here.
+    new_hashes = iter(hash_passwords([password for _, _, password, password_hash in rows if password_hash is None],
+                                     password_method))
+
+    users = dict()
+    for user_id, username, _, password_hash in rows:
         user = User(
-            username=data_row[1],
-            password=generate_password_hash(data_row[2])
+            username=username,
+            password=password_hash if password_hash is not None else next(new_hashes)
         )
         repo.add_user(user)
-        users[data_row[0]] = user
+        users[user_id] = user
     return users
 
 
-def load_comments(data_path: str, repo: MemoryRepository, users):
+def read_user_rows(data_path: str) -> List[Tuple[str, str, str, str]]:
+    # Return the (id, username, password, password hash) of each row of users.csv, where the password or the hash is
+    # None if the file doesn't give it.
+    filename = os.path.join(data_path, 'users.csv')
+    columns = read_csv_header(filename)
+    password_column = columns.index('password') if 'password' in columns else None
+    hash_column = columns.index('password-hash') if 'password-hash' in columns else None
+
+    rows = list()
+    for data_row in read_csv_file(filename):
+        password = data_row[password_column] if password_column is not None else None
+        password_hash = data_row[hash_column] if hash_column is not None and data_row[hash_column] != '' else None
+        rows.append((data_row[0], data_row[1], password, password_hash))
+    return rows
+
+
+def hash_passwords(passwords: List[str], method: str = None) -> List[str]:
+    # method is a werkzeug hash method such as 'pbkdf2:sha256:1000'; None uses werkzeug's default.
+    hash_password = partial(generate_password_hash, method=method) if method is not None else generate_password_hash
+    if len(passwords) < PARALLEL_HASH_MINIMUM:
+        return [hash_password(password) for password in passwords]
+
+    # Hashing is CPU bound, so spread it over processes rather than threads.
+    with ProcessPoolExecutor() as executor:
+        chunk_size = max(1, len(passwords) // (4 * (os.cpu_count() or 1)))
+        return list(executor.map(hash_password, passwords, chunksize=chunk_size))
+
+
+def load_comments(data_path: str, repo: AbstractRepository, users):
     for data_row in read_csv_file(os.path.join(data_path, 'comments.csv')):
         comment = make_comment(
             comment_text=data_row[3],
@@ -308,12 +1190,44 @@ def load_comments(data_path: str, repo: MemoryRepository, users):
         repo.add_comment(comment)
 
 
-def populate(data_path: str, repo: MemoryRepository):
+def populate(data_path: str, repo: AbstractRepository, snapshot_path: str = None,
+             password_method: str = None) -> Dict[str, float]:
+    # Time each phase of loading, in seconds, so that slow startups can be diagnosed.
+    timings = dict()
+
+    # Restore the repository from a snapshot of the same data files and settings, if there is one.
+    if snapshot_path is not None:
+        start = time.perf_counter()
+        key = snapshot_key(data_path, repo, password_method)
+        restored = read_snapshot(snapshot_path, key, repo)
+        timings['snapshot read'] = time.perf_counter() - start
+        if restored:
+            return timings
+
     # Load movies and genres into the repository.
+    start = time.perf_counter()
     load_movies_and_genres(data_path, repo)
+    timings['movies'] = time.perf_counter() - start
 
     # Load users into the repository.
-    users = load_users(data_path, repo)
+    start = time.perf_counter()
+    users = load_users(data_path, repo, password_method)
+    timings['users'] = time.perf_counter() - start
 
     # Load comments into the repository.
+    start = time.perf_counter()
     load_comments(data_path, repo, users)
+    timings['comments'] = time.perf_counter() - start
+
+    # Index every title and name for completion and typo-tolerant search, and find each Movie's related Movies.
+    start = time.perf_counter()
+    repo.build_name_indexes()
+    timings['name indexes'] = time.perf_counter() - start
+
+    # Save the populated repository, so the next start can skip the data files.
+    if snapshot_path is not None:
+        start = time.perf_counter()
+        write_snapshot(snapshot_path, key, repo)
+        timings['snapshot write'] = time.perf_counter() - start
+
+    return timings
@@ -0,0 +1,272 @@
+import math
+from typing import Dict, Hashable, Iterable, List
+
+import numpy as np
+
+from A2.domain.model import Movie
+
+NUMERIC_ATTRIBUTES = ('rating', 'votes', 'runtime_minutes', 'metascore', 'revenue')
+
+# Attributes whose leaderboards are kept, and the share of a leaderboard that may change before it's sorted afresh
+# rather than updated in place.
+LEADERBOARD_ATTRIBUTES = ('rating', 'votes', 'revenue', 'runtime_minutes')
+RESORT_SHARE = 0.125
+
+# Year stored for Movies without one; excluded from per-year aggregates.
+UNKNOWN_YEAR = -1
+
+
+class MovieColumns:
+    """ Typed NumPy arrays of the numeric attributes of Movies, one row per Movie id.
+
+    Values are captured when a Movie is added; adding a Movie with an id already present replaces its row, and removing
+    a Movie frees its row. Additions and removals are applied in one step when the arrays are next read. Missing values
+    (e.g. a revenue of 'N/A') are stored as NaN and excluded from filters, orderings and aggregates.
+
+    Each leaderboard attribute also keeps the ids of Movies ordered by that attribute, highest first and then by id,
+    with the negated values in the same, ascending, order. Changed Movies are taken out and put back with binary
+    searches, so a page of a leaderboard is a slice, rather than a sort of every Movie.
+    """
+
+    def __init__(self):
+        self._ids = np.empty(0, dtype=np.int64)
+        self._years = np.empty(0, dtype=np.int64)
+        self._columns = {attribute: np.empty(0, dtype=np.float64) for attribute in NUMERIC_ATTRIBUTES}
+        self._rows: Dict[int, int] = dict()
+        self._leaderboards = {attribute: (np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64))
+                              for attribute in LEADERBOARD_ATTRIBUTES}
+
+        # Movies added since the arrays were last extended, by id, and the rows of Movies removed since then. Arrays
+        # are grown and compacted in one step when they are next read.
+        self._pending: Dict[int, Movie] = dict()
+        self._freed: List[int] = list()
+
+        # Whether a copy shares the arrays. Arrays are replaced rather than changed, except for the rows of changed
+        # Movies, which are written to copies of shared arrays.
+        self._shared = False
+
+    def __len__(self):
+        self.flush()
+        return len(self._ids)
+
+    def __copy__(self) -> 'MovieColumns':
+        copied = MovieColumns.__new__(MovieColumns)
+        copied.__dict__.update(self.__dict__)
+        copied._columns = dict(self._columns)
+        copied._rows = dict(self._rows)
+        copied._leaderboards = dict(self._leaderboards)
+        copied._pending = dict(self._pending)
+        copied._freed = list(self._freed)
+        copied._shared = self._shared = True
+        return copied
+
+    def add(self, movie: Movie):
+        # Later additions of the same id replace earlier ones.
+        self._pending[movie.id] = movie
+
+    def remove(self, movie_id: int):
+        self._pending.pop(movie_id, None)
+        row = self._rows.pop(movie_id, None)
+        if row is not None:
+            self._freed.append(row)
+
+    def column(self, attribute: str) -> np.ndarray:
+        """ Returns the values of attribute, aligned with ids(). """
+        self.flush()
+        if attribute not in self._columns:
+            raise ValueError(f'{attribute} is not a numeric Movie attribute')
+        return self._columns[attribute]
+
+    def ids(self) -> np.ndarray:
+        self.flush()
+        return self._ids
+
+    def years(self) -> np.ndarray:
+        self.flush()
+        return self._years
+
+    def rows_for(self, movie_ids: Iterable[int]) -> np.ndarray:
+        """ Returns the rows of the given Movie ids, skipping ids that aren't stored. """
+        self.flush()
+        rows = [self._rows[movie_id] for movie_id in movie_ids if movie_id in self._rows]
+        return np.array(rows, dtype=np.int64)
+
+    def ids_in_range(self, attribute: str, minimum: float = None, maximum: float = None) -> np.ndarray:
+        """ Returns the sorted ids of Movies whose attribute lies within [minimum, maximum]. """
+        values = self.column(attribute)
+        mask = ~np.isnan(values)
+        if minimum is not None:
+            mask &= values >= minimum
+        if maximum is not None:
+            mask &= values <= maximum
+        return np.sort(self._ids[mask])
+
+    def ids_at_least(self, attribute: str, minimum: float) -> np.ndarray:
+        """ Returns the sorted ids of Movies whose attribute is at least minimum. A leaderboard attribute's Movies are a
+        prefix of its leaderboard, so only the matches are sorted, rather than every Movie scanned. """
+        self.flush()
+        if attribute not in self._leaderboards:
+            return self.ids_in_range(attribute, minimum)
+        ids, keys = self._leaderboards[attribute]
+        return np.sort(ids[:np.searchsorted(keys, -minimum, side='right')])
+
+    def ids_ordered_by(self, attribute: str, descending: bool = False) -> np.ndarray:
+        """ Returns the ids of Movies ordered by attribute, breaking ties by id. Movies missing the value are left
+        out. """
+        values = self.column(attribute)
+        mask = ~np.isnan(values)
+        ids = self._ids[mask]
+        values = values[mask]
+        order = np.lexsort((ids, -values if descending else values))
+        return ids[order]
+
+    def leaderboard(self, attribute: str, start: int = 0, stop: int = None) -> np.ndarray:
+        """ Returns the ids from position start to stop of the Movies ordered by attribute, highest first and then by
+        id. Movies missing the value are left out. """
+        self.flush()
+        if attribute not in self._leaderboards:
+            raise ValueError(f'{attribute} has no leaderboard')
+        return self._leaderboards[attribute][0][start:stop]
+
+    def leaderboard_length(self, attribute: str) -> int:
+        self.flush()
+        if attribute not in self._leaderboards:
+            raise ValueError(f'{attribute} has no leaderboard')
+        return len(self._leaderboards[attribute][0])
+
+    def mean_by_group(self, attribute: str, groups: Dict[Hashable, Iterable[int]]) -> Dict[Hashable, float]:
+        """ Returns the mean of attribute over the Movie ids of each group, or NaN for groups with no values. """
+        values = self.column(attribute)
+        keys = list(groups.keys())
+        if len(keys) == 0:
+            return dict()
+
+        # Label each row with the position of its group, so every group is reduced in a single pass.
+        rows = [self.rows_for(groups[key]) for key in keys]
+        labels = np.repeat(np.arange(len(keys)), [len(group_rows) for group_rows in rows])
+        group_values = values[np.concatenate(rows)]
+        mask = ~np.isnan(group_values)
+        sums = np.bincount(labels[mask], weights=group_values[mask], minlength=len(keys))
+        counts = np.bincount(labels[mask], minlength=len(keys))
+        with np.errstate(invalid='ignore', divide='ignore'):
+            means = sums / counts
+        return dict(zip(keys, means.tolist()))
+
+    def total_by_year(self, attribute: str) -> Dict[int, float]:
+        """ Returns the sum of attribute over the Movies released in each year. """
+        values = self.column(attribute)
+        mask = ~np.isnan(values) & (self._years != UNKNOWN_YEAR)
+        years, labels = np.unique(self._years[mask], return_inverse=True)
+        totals = np.bincount(labels, weights=values[mask], minlength=len(years))
+        return dict(zip(years.tolist(), totals.tolist()))
+
+    def flush(self):
+        # Drop the rows of Movies removed, and write the Movies added, since the arrays were last read.
+        if len(self._freed) > 0:
+            self.compact()
+        if len(self._pending) == 0:
+            return
+
+        movies = self._pending
+        self._pending = dict()
+
+        new_movies = [movie for movie_id, movie in movies.items() if movie_id not in self._rows]
+        changed_rows = np.array([self._rows[movie_id] for movie_id in movies if movie_id in self._rows], dtype=np.int64)
+
+        # Take changed Movies out of the leaderboards while their old values are still stored.
+        self.unrank(changed_rows)
+        if len(changed_rows) > 0 and self._shared:
+            self._years = self._years.copy()
+            self._columns = {attribute: column.copy() for attribute, column in self._columns.items()}
+            self._shared = False
+        for row in changed_rows.tolist():
+            movie = movies[int(self._ids[row])]
+            self._years[row] = movie_year(movie)
+            for attribute in NUMERIC_ATTRIBUTES:
+                self._columns[attribute][row] = numeric_value(getattr(movie, attribute))
+
+        first_row = len(self._ids)
+        if len(new_movies) > 0:
+            self.append(new_movies)
+        self.rank(np.concatenate((changed_rows, np.arange(first_row, len(self._ids)))))
+
+    # Helper method to delete freed rows, taking their Movies out of the leaderboards, and renumber the rows after them.
+    def compact(self):
+        freed = np.array(self._freed, dtype=np.int64)
+        self._freed = list()
+        self.unrank(freed)
+        self._ids = np.delete(self._ids, freed)
+        self._years = np.delete(self._years, freed)
+        for attribute in NUMERIC_ATTRIBUTES:
+            self._columns[attribute] = np.delete(self._columns[attribute], freed)
+        self._rows = {movie_id: row for row, movie_id in enumerate(self._ids.tolist())}
+
+    # Helper method to add rows for Movies not stored yet.
+    def append(self, new_movies: List[Movie]):
+        first_row = len(self._ids)
+        count = len(new_movies)
+        self._ids = np.concatenate((self._ids, np.fromiter((movie.id for movie in new_movies), np.int64, count)))
+        self._years = np.concatenate((self._years, np.fromiter(map(movie_year, new_movies), np.int64, count)))
+        for attribute in NUMERIC_ATTRIBUTES:
+            new_values = np.fromiter((numeric_value(getattr(movie, attribute)) for movie in new_movies), np.float64,
+                                     count)
+            self._columns[attribute] = np.concatenate((self._columns[attribute], new_values))
+        for offset, movie in enumerate(new_movies):
+            self._rows[movie.id] = first_row + offset
+
+    # Helper methods to take the Movies in rows out of, and put them into, the leaderboards, using their current values.
+    def unrank(self, rows: np.ndarray):
+        if len(rows) == 0:
+            return
+        for attribute, (ids, keys) in self._leaderboards.items():
+            row_keys = -self._columns[attribute][rows]
+            known = ~np.isnan(row_keys)
+            positions = leaderboard_positions(ids, keys, self._ids[rows][known], row_keys[known])
+            self._leaderboards[attribute] = (np.delete(ids, positions), np.delete(keys, positions))
+
+    def rank(self, rows: np.ndarray):
+        if len(rows) == 0:
+            return
+        for attribute, (ids, keys) in self._leaderboards.items():
+            if len(rows) > RESORT_SHARE * len(ids):
+                # Sorting every Movie is quicker than inserting this many.
+                column = self._columns[attribute]
+                known = ~np.isnan(column)
+                order = np.lexsort((self._ids[known], -column[known]))
+                self._leaderboards[attribute] = (self._ids[known][order], -column[known][order])
+                continue
+
+            row_keys = -self._columns[attribute][rows]
+            known = ~np.isnan(row_keys)
+            new_ids, new_keys = self._ids[rows][known], row_keys[known]
+            order = np.lexsort((new_ids, new_keys))
+            new_ids, new_keys = new_ids[order], new_keys[order]
+            positions = leaderboard_positions(ids, keys, new_ids, new_keys)
+            self._leaderboards[attribute] = (np.insert(ids, positions, new_ids), np.insert(keys, positions, new_keys))
+
+
+def leaderboard_positions(ids: np.ndarray, keys: np.ndarray, movie_ids: np.ndarray,
+                          movie_keys: np.ndarray) -> np.ndarray:
+    # Returns the position of each (movie id, key) pair in a leaderboard, or where it would be inserted. Among equal
+    # keys, ids are in ascending order.
+    firsts = np.searchsorted(keys, movie_keys, side='left')
+    lasts = np.searchsorted(keys, movie_keys, side='right')
+    return np.array([first + np.searchsorted(ids[first:last], movie_id)
+                     for first, last, movie_id in zip(firsts.tolist(), lasts.tolist(), movie_ids.tolist())],
+                    dtype=np.int64)
+
+
+def movie_year(movie: Movie) -> int:
+    return movie.date if movie.date is not None else UNKNOWN_YEAR
+
+
+def numeric_value(value) -> float:
+    # Movie holds revenue as e.g. '333.13Millions' and metascore as a string, with 'N/A' for unknown values.
+    if value is None:
+        return math.nan
+    if isinstance(value, str):
+        try:
+            return float(value.replace('Millions', ''))
+        except ValueError:
+            return math.nan
+    return float(value)
@@ -1,7 +1,8 @@
 import abc
-from typing import List
+from datetime import datetime
+from typing import Dict, Iterable, List, Tuple
 
-from A2.domain.model import Movie, Actor, User, Director, Genre, Comment
+from A2.domain.model import Movie, Actor, User, Director, Genre, Comment, make_comment
 
 repo_instance = None
 
@@ -20,18 +21,29 @@ class AbstractRepository(abc.ABC):
         raise NotImplementedError
 
     @abc.abstractmethod
-    def get_user(self, username) -> User:
+    def get_user(self, username, ignore_case: bool = False) -> User:
         """ Returns the User named username from the repository.
 
-        If there is no User with the given username, this method returns None.
+        If ignore_case is True, usernames are compared without regard to case or surrounding white space. If there is
+        no User with the given username, this method returns None.
         """
         raise NotImplementedError
 
+    @abc.abstractmethod
+    def is_username_available(self, username, ignore_case: bool = False) -> bool:
+        """ Returns True if no User in the repository is registered under username. """
+        raise NotImplementedError
+
     @abc.abstractmethod
     def add_movie(self, movie: Movie):
         """ Adds an Movie to the repository. """
         raise NotImplementedError
 
+    def add_movies(self, movies: Iterable[Movie]):
+        """ Adds Movies to the repository in bulk. """
+        for movie in movies:
+            self.add_movie(movie)
+
     @abc.abstractmethod
     def get_movie(self, movie_id: int) -> Movie:
         """ Returns Movie with id from the repository.
@@ -47,7 +59,7 @@ class AbstractRepository(abc.ABC):
 
     @abc.abstractmethod
     def get_first_movie(self) -> Movie:
-        """ Returns the first Movie, ordered by date, from the repository.
+        """ Returns the first Movie, ordered by id, from the repository.
 
         Returns None if the repository is empty.
         """
@@ -55,7 +67,7 @@ class AbstractRepository(abc.ABC):
 
     @abc.abstractmethod
     def get_last_movie(self) -> Movie:
-        """ Returns the last Movie, ordered by date, from the repository.
+        """ Returns the last Movie, ordered by id, from the repository.
 
         Returns None if the repository is empty.
         """
@@ -94,36 +106,109 @@ class AbstractRepository(abc.ABC):
         raise NotImplementedError
 
     @abc.abstractmethod
-    def get_movie_ids_for_title(self, title_name: str):
-        """ Returns a list of ids representing Movies that are classified by genre_name.
+    def get_movie_ids_for_title(self, title_name: str, match_phrase: bool = True):
+        """ Returns a sorted list of ids representing Movies whose titles contain the words of title_name.
 
-        If there are Movies that are classified by genre_name, this method returns an empty list.
+        Words are compared without regard to case. If match_phrase is True, the words must appear consecutively and in
+        order; otherwise they may appear anywhere in the title. If there are no such Movies, this method returns an
+        empty list.
+        """
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def get_movie_ids_for_description(self, query: str, quantity: int = 30):
+        """ Returns a list of up to quantity ids representing the Movies whose descriptions best match the words of
+        query, best match first.
+
+        Matches are ranked with BM25. If no description contains a word of query, this method returns an empty list.
         """
         raise NotImplementedError
 
     @abc.abstractmethod
     def get_movie_ids_for_date(self, the_date: str):
-        """ Returns a list of ids representing Movies that are classified by genre_name.
+        """ Returns a sorted list of ids representing Movies released in the year the_date.
 
-        If there are Movies that are classified by genre_name, this method returns an empty list.
+        If there are no Movies released in the_date, or the_date isn't a year, this method returns an empty list.
+        """
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def get_movie_ids_for_date_range(self, start_date: int, end_date: int):
+        """ Returns a list of ids representing Movies released from start_date to end_date, inclusive.
+
+        The ids are ordered by year, then by id. If there are no such Movies, this method returns an empty list.
+        """
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def get_movie_ids_for_attribute_range(self, attribute: str, minimum: float = None, maximum: float = None):
+        """ Returns a sorted list of ids representing Movies whose numeric attribute lies from minimum to maximum.
+
+        attribute is one of 'rating', 'votes', 'runtime_minutes', 'metascore' or 'revenue'; either bound may be None.
+        Movies without a value for attribute are excluded. An unknown attribute raises a ValueError.
+        """
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def get_leaderboard_movie_ids(self, attribute: str, cursor: int = 0, quantity: int = 10) -> List[int]:
+        """ Returns the ids of up to quantity Movies from position cursor of the leaderboard for attribute, which orders
+        Movies by attribute, highest first, and then by id.
+
+        attribute is one of 'rating', 'votes', 'revenue' or 'runtime_minutes'. Movies without a value for attribute
+        are left out. An unknown attribute raises a ValueError.
+        """
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def get_leaderboard_length(self, attribute: str) -> int:
+        """ Returns the number of Movies in the leaderboard for attribute. An unknown attribute raises a ValueError. """
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def get_attribute_mean_by_genre(self, attribute: str) -> Dict[str, float]:
+        """ Returns the mean of a numeric attribute over the Movies of each Genre, keyed by genre name. """
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def get_attribute_total_by_date(self, attribute: str) -> Dict[int, float]:
+        """ Returns the sum of a numeric attribute over the Movies released in each year, keyed by year. """
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def get_movie_ids_for_facets(self, genre_names: Iterable[str] = (), director_name: str = None,
+                                 actor_name: str = None, start_date: int = None, end_date: int = None,
+                                 minimum_rating: float = None):
+        """ Returns a sorted list of ids representing Movies that match every facet given.
+
+        A Movie must be classified by all of genre_names. Facets left as None don't restrict the result; the date range
+        is inclusive and either end may be open. If no facets are given, this method returns the ids of every Movie.
+        """
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def get_facet_counts(self, movie_ids: List[int]) -> Dict[str, Dict]:
+        """ Returns, for the Movies with the given ids, the number of Movies per genre name and per year.
+
+        The result maps 'genre' and 'date' to dictionaries of counts; genres are ordered by descending count and
+        years in ascending order.
         """
         raise NotImplementedError
 
     @abc.abstractmethod
     def get_date_of_previous_movie(self, movie: Movie):
-        """ Returns the date of an Movie that immediately precedes movie.
+        """ Returns the date of the Movie that immediately precedes movie, with Movies ordered by date and then by id.
 
-        If movie is the first Movie in the repository, this method returns None because there are no Movies
-        on a previous date.
+        If movie is the first Movie in the repository, or isn't in the repository, this method returns None because
+        there are no Movies on a previous date.
         """
         raise NotImplementedError
 
     @abc.abstractmethod
     def get_date_of_next_movie(self, movie: Movie):
-        """ Returns the date of an Movie that immediately follows movie.
+        """ Returns the date of the Movie that immediately follows movie, with Movies ordered by date and then by id.
 
-        If movie is the last Movie in the repository, this method returns None because there are no Movies
-        on a later date.
+        If movie is the last Movie in the repository, or isn't in the repository, this method returns None because
+        there are no Movies on a later date.
         """
         raise NotImplementedError
 
@@ -158,12 +243,12 @@ class AbstractRepository(abc.ABC):
         raise NotImplementedError
 
     def add_date(self, the_date: int):
-        """ Adds a Genre to the repository. """
+        """ Adds a year to the repository. """
         raise NotImplementedError
 
     @abc.abstractmethod
     def get_dates(self) -> List[int]:
-        """ Returns the Genres stored in the repository. """
+        """ Returns the years in which the repository's Movies were released, in ascending order. """
         raise NotImplementedError
 
     @abc.abstractmethod
@@ -183,6 +268,78 @@ class AbstractRepository(abc.ABC):
         if comment.movie is None or comment not in comment.movie.comments:
             raise RepositoryException('Comment not correctly attached to an Movie')
 
+    def comment_on_movie(self, comment_text: str, user: User, movie: Movie, timestamp: datetime = None) -> Comment:
+        """ Makes a Comment by user on movie, made now unless timestamp is given, and adds it to the repository.
+
+        Returns the Comment.
+        """
+        comment = make_comment(comment_text, user, movie, timestamp or datetime.today())
+        self.add_comment(comment)
+        return comment
+
+    @abc.abstractmethod
+    def get_name_completions(self, prefix: str, quantity: int = 10) -> List[Tuple[str, str]]:
+        """ Returns up to quantity (name, kind) pairs for titles, genres, directors and actors with a word starting
+        with prefix, ordered by the votes of their Movies.
+
+        kind is one of 'title', 'genre', 'director' or 'actor'. Prefixes are compared without regard to case.
+        """
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def get_name_suggestions(self, query: str, quantity: int = 5) -> List[Tuple[str, str, int]]:
+        """ Returns up to quantity (name, kind, distance) triples for titles, genres, directors and actors that nearly
+        match query, closest first.
+
+        Each word of query may be up to two edits (insertions, deletions, substitutions or transpositions) from a word
+        of the name; distance is the total number of edits. If nothing is close enough, this method returns an empty
+        list.
+        """
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def get_collaboration_path(self, first: Tuple[str, str], second: Tuple[str, str]) -> List[Tuple[str, str]]:
+        """ Returns a shortest chain of people linking first to second, both included, where each worked on a Movie
+        with the next.
+
+        People are (name, kind) pairs, kind being 'actor' or 'director'. The length of the chain less one is the
+        degrees of separation between first and second. If they aren't linked, this method returns an empty list.
+        """
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def get_top_collaborators(self, person: Tuple[str, str], quantity: int = 10) -> List[Tuple[str, str, int]]:
+        """ Returns up to quantity (name, kind, count) triples for the actors and directors who worked on the most
+        Movies with person, a (name, kind) pair; count is the number of those Movies. """
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def get_similar_movie_ids(self, movie_id: int, quantity: int = 5) -> List[int]:
+        """ Returns the ids of up to quantity Movies sharing the most genres, actors and director with the Movie with
+        movie_id, most similar first.
+
+        Similarity is estimated with MinHash, and only Movies that are likely to be similar are considered, so a Movie
+        sharing little with every other Movie may have none. If there is no Movie with movie_id, this method returns
+        an empty list.
+        """
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def get_related_movie_ids(self, movie_id: int, quantity: int = 5) -> List[int]:
+        """ Returns the ids of up to quantity Movies whose descriptions are most like that of the Movie with movie_id,
+        most related first.
+
+        Descriptions are compared by the cosine similarity of their TF-IDF vectors, and each Movie's most related
+        Movies are found when the indexes are built. Movies sharing no uncommon term are not related. If there is no
+        Movie with movie_id, this method returns an empty list.
+        """
+        raise NotImplementedError
+
+    def build_name_indexes(self):
+        """ Prepares the indexes behind get_name_completions, get_name_suggestions, the collaboration queries,
+        get_similar_movie_ids and get_related_movie_ids, once the repository has been populated. Repositories that build them on first use needn't do anything. """
+        pass
+
     @abc.abstractmethod
     def get_comments(self):
         """ Returns the Comments stored in the repository. """
@@ -195,3 +352,17 @@ class AbstractRepository(abc.ABC):
     def add_image_link(self, link, movie):
 
         raise NotImplementedError
+
+    def add_image_links(self, links: Dict[int, str]):
+        """ Sets the image links of Movies in bulk, given a mapping of Movie ids to links.
+
+        If any id doesn't represent a Movie in the repository, this method raises a RepositoryException and doesn't
+        update the repository.
+        """
+        movies = {movie_id: self.get_movie(movie_id) for movie_id in links}
+        unknown_ids = [movie_id for movie_id, movie in movies.items() if movie is None]
+        if len(unknown_ids) > 0:
+            raise RepositoryException(f'Movies {unknown_ids} not in the repository')
+
+        for movie_id, link in links.items():
+            self.add_image_link(link, movies[movie_id])
@@ -0,0 +1,106 @@
+import hashlib
+from typing import Dict, Iterable, List, Tuple
+
+import numpy as np
+
+# Each signature holds NUM_PERMUTATIONS minimum hashes, split into bands of BAND_ROWS. Two Movies become candidates
+# when any band matches, which for Jaccard similarity s happens with probability 1 - (1 - s ** BAND_ROWS) ** bands:
+# about a half at s = 0.15, and nearly always above s = 0.4.
+NUM_PERMUTATIONS = 64
+BAND_ROWS = 2
+
+# Most candidates taken from any one band's bucket. Narrow bands put Movies sharing only a common genre or actor in the
+# same bucket, so buckets grow with the catalogue; capping them bounds the Movies scored at BUCKET_CANDIDATES per band.
+# Movies much alike share several bands, most of them in small buckets, so they're rarely left out.
+BUCKET_CANDIDATES = 32
+
+# Signature value of a Movie without features, which therefore matches nothing.
+EMPTY = np.iinfo(np.uint64).max
+
+# Multiplier combining the rows of a band into one key.
+BAND_MULTIPLIER = np.uint64(0x9E3779B97F4A7C15)
+
+
+class SimilarityIndex:
+    """ MinHash signatures of each Movie's genres, actors and director, bucketed with locality-sensitive hashing.
+
+    A Movie's signature estimates the Jaccard similarity of its features with any other Movie's. Each band of each
+    signature is hashed to a key, and the keys of every band are kept sorted, so the Movies sharing a band with a given
+    Movie are found with binary searches. Only those candidates are scored, rather than every Movie.
+    """
+
+    def __init__(self, entries: Iterable[Tuple[int, List[str]]]):
+        # entries gives each Movie's id and features, e.g. 'genre:action' or 'actor:chris pratt'.
+        entries = list(entries)
+        self._ids = np.fromiter((movie_id for movie_id, _ in entries), dtype=np.int64, count=len(entries))
+        self._rows: Dict[int, int] = {movie_id: row for row, (movie_id, _) in enumerate(entries)}
+
+        feature_sets = [sorted(set(features)) for _, features in entries]
+        counts = np.fromiter(map(len, feature_sets), dtype=np.int64, count=len(feature_sets))
+        hashes = np.fromiter((feature_hash(feature) for features in feature_sets for feature in features),
+                             dtype=np.uint64, count=int(counts.sum()))
+        self._signatures = minhash_signatures(hashes, counts)
+
+        # Sort each band's keys, leaving out Movies without features.
+        rows = np.flatnonzero(counts > 0)
+        band_keys = self.band_keys(rows)
+        order = np.argsort(band_keys, axis=1, kind='stable')
+        self._band_keys = np.take_along_axis(band_keys, order, axis=1)
+        self._band_rows = rows[order].astype(np.int32)
+
+    def __len__(self):
+        return len(self._ids)
+
+    def similar(self, movie_id: int, quantity: int = 5) -> List[Tuple[int, float]]:
+        """ Returns up to quantity (id, estimated similarity) pairs for the Movies most like the Movie with movie_id,
+        most similar first, then by id. """
+        row = self._rows.get(movie_id)
+        if row is None or self._signatures[row, 0] == EMPTY:
+            return list()
+
+        candidates = self.candidates(row)
+        scores = (self._signatures[candidates] == self._signatures[row]).mean(axis=1)
+        best = np.lexsort((self._ids[candidates], -scores))[:quantity]
+        return list(zip(self._ids[candidates[best]].tolist(), scores[best].tolist()))
+
+    def candidates(self, row: int) -> np.ndarray:
+        # Returns the rows sharing a band with row, taking at most BUCKET_CANDIDATES from each band's bucket.
+        keys = self.band_keys(np.array([row]))[:, 0]
+        candidates = list()
+        for band, key in enumerate(keys):
+            first = np.searchsorted(self._band_keys[band], key, side='left')
+            last = np.searchsorted(self._band_keys[band], key, side='right')
+            candidates.append(self._band_rows[band, first:min(last, first + BUCKET_CANDIDATES + 1)])
+        candidates = np.unique(np.concatenate(candidates))
+        return candidates[candidates != row]
+
+    def band_keys(self, rows: np.ndarray) -> np.ndarray:
+        # Returns a (bands, len(rows)) array of the key of each band of the signatures of rows.
+        signatures = self._signatures[rows]
+        keys = np.zeros((NUM_PERMUTATIONS // BAND_ROWS, len(rows)), dtype=np.uint64)
+        for offset in range(BAND_ROWS):
+            keys = keys * BAND_MULTIPLIER + signatures[:, offset::BAND_ROWS].T
+        return keys
+
+
+def feature_hash(feature: str) -> int:
+    # A hash that is the same in every process, unlike hash(), so that pickled indexes stay valid.
+    return int.from_bytes(hashlib.blake2b(feature.encode('utf-8'), digest_size=8).digest(), 'little')
+
+
+def minhash_signatures(hashes: np.ndarray, counts: np.ndarray) -> np.ndarray:
+    # Returns a (len(counts), NUM_PERMUTATIONS) array, where row i holds the minimum of each permutation of the counts[i]
+    # hashes of Movie i. A permutation is h -> a * h + b modulo 2 ** 64, with a odd.
+    rng = np.random.default_rng(235)
+    multipliers = rng.integers(0, EMPTY, NUM_PERMUTATIONS, dtype=np.uint64, endpoint=True) | np.uint64(1)
+    increments = rng.integers(0, EMPTY, NUM_PERMUTATIONS, dtype=np.uint64, endpoint=True)
+
+    signatures = np.full((len(counts), NUM_PERMUTATIONS), EMPTY, dtype=np.uint64)
+    rows = np.flatnonzero(counts > 0)
+    if len(rows) == 0:
+        return signatures
+    starts = (np.cumsum(counts) - counts)[rows]
+    for permutation in range(NUM_PERMUTATIONS):
+        permuted = hashes * multipliers[permutation] + increments[permutation]
+        signatures[rows, permutation] = np.minimum.reduceat(permuted, starts)
+    return signatures
@@ -0,0 +1,109 @@
+import copyreg
+import hashlib
+import os
+import pickle
+from typing import Dict, Tuple
+
+from A2.adapters.repository import AbstractRepository
+from A2.domain.model import Movie, Actor, User, Director, Genre, Comment
+
+# Bump whenever MemoryRepository, its indexes or the domain model change shape, so that older snapshots are ignored.
+SNAPSHOT_VERSION = 11
+
+# The files populate reads; a snapshot is only used while all of them, and the settings populate was given, are
+# unchanged.
+DATA_FILES = ('Data1000Movies.csv', 'users.csv', 'comments.csv')
+
+DOMAIN_CLASSES = (Movie, Actor, User, Director, Genre, Comment)
+
+
+def slot_names(cls) -> Tuple[str, ...]:
+    # The attributes held in the slots of cls, with private names mangled as Python stores them.
+    names = list()
+    for name in cls.__slots__:
+        if name == '__weakref__':
+            continue
+        if name.startswith('__'):
+            name = f'_{cls.__name__}{name}'
+        names.append(name)
+    return tuple(names)
+
+
+# The state of a domain object is the values of these attributes, in order.
+SLOT_NAMES = {cls: slot_names(cls) for cls in DOMAIN_CLASSES}
+
+
+class SnapshotPickler(pickle.Pickler):
+    """ Pickles domain objects as empty shells, deferring their state to later batches.
+
+    Movies, Genres, Actors and the rest refer to each other in one large cycle, and pickling an object's state as soon
+    as it's reached recurses through the whole graph. Deferring the state keeps the recursion shallow: by the time a
+    batch of states is written, every object it refers to has been written as a shell and is pickled by reference.
+    """
+
+    def __init__(self, file):
+        super().__init__(file, protocol=pickle.HIGHEST_PROTOCOL)
+        self.deferred = list()
+
+    def reducer_override(self, obj):
+        if type(obj) in DOMAIN_CLASSES:
+            self.deferred.append(obj)
+            return copyreg.__newobj__, (type(obj),)
+        return NotImplemented
+
+
+def data_checksums(data_path: str) -> Dict[str, str]:
+    checksums = dict()
+    for filename in DATA_FILES:
+        digest = hashlib.sha256()
+        with open(os.path.join(data_path, filename), 'rb') as infile:
+            for block in iter(lambda: infile.read(1 << 20), b''):
+                digest.update(block)
+        checksums[filename] = digest.hexdigest()
+    return checksums
+
+
+def snapshot_key(data_path: str, repo: AbstractRepository, password_method: str = None) -> Dict[str, str]:
+    # Everything the populated repository depends on: the data files, the repository class restored into, and the
+    # method the passwords were hashed with.
+    key = data_checksums(data_path)
+    key['repository'] = f'{type(repo).__module__}.{type(repo).__qualname__}'
+    key['password method'] = password_method or 'default'
+    return key
+
+
+def write_snapshot(snapshot_path: str, key: Dict[str, str], repo: AbstractRepository):
+    # Write to a temporary file and move it into place, so a reader never sees a partly written snapshot.
+    temporary_path = f'{snapshot_path}.{os.getpid()}.tmp'
+    with open(temporary_path, 'wb') as outfile:
+        pickler = SnapshotPickler(outfile)
+        pickler.dump((SNAPSHOT_VERSION, key))
+        pickler.dump(vars(repo))
+        while len(pickler.deferred) > 0:
+            objects, pickler.deferred = pickler.deferred, list()
+            pickler.dump((objects, [[getattr(obj, name) for name in SLOT_NAMES[type(obj)]] for obj in objects]))
+        pickler.dump(None)
+    os.replace(temporary_path, snapshot_path)
+
+
+def read_snapshot(snapshot_path: str, key: Dict[str, str], repo: AbstractRepository) -> bool:
+    """ Restores repo from the snapshot at snapshot_path, returning False, and leaving repo unchanged, if there is no
+    usable snapshot: it's missing, damaged, or was written by another SNAPSHOT_VERSION or with another key. """
+    try:
+        with open(snapshot_path, 'rb') as infile:
+            unpickler = pickle.Unpickler(infile)
+            if unpickler.load() != (SNAPSHOT_VERSION, key):
+                return False
+
+            state = unpickler.load()
+            batch = unpickler.load()
+            while batch is not None:
+                for obj, obj_state in zip(*batch):
+                    for name, value in zip(SLOT_NAMES[type(obj)], obj_state):
+                        setattr(obj, name, value)
+                batch = unpickler.load()
+    except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ImportError, ValueError):
+        return False
+
+    vars(repo).update(state)
+    return True
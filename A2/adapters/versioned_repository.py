@@ -0,0 +1,70 @@
+import threading
+from functools import partial
+
+from A2.adapters.memory_repository import INDEXED_WRITERS, WRITTEN_ATTRIBUTES, MemoryRepository
+from A2.adapters.repository import AbstractRepository
+
+
+class VersionedRepository:
+    """ Shares a MemoryRepository between threads, publishing each write as a new version.
+
+    Reads take no lock: each call runs on the version that is current when it's made, which is never changed once
+    published. Writes are serialized by a lock. A write copies the current version and the containers it changes,
+    applies the change to the copy, then publishes the copy by replacing the current version in one assignment, so a
+    read sees either all of a write or none of it.
+
+    Domain objects are shared between versions until a write changes them: the draft changes a copy of each Movie,
+    User, Genre, Director or Actor it touches, and the lists and indexes holding it, so earlier versions keep the
+    originals. The copied containers are chunked, so a write costs about the size of its change.
+
+    Writes that change the catalogue, such as the data watcher's, may leave indexes to be rebuilt, which takes a while.
+    They're serialized by a lock of their own, and build their version without holding the write lock, so other writes
+    go on meanwhile. Only those other writes are published in between, and none of them changes what the indexes are
+    built from. So if any was published, the catalogue write is applied again on top of it, under the write lock,
+    keeping the indexes already built.
+    """
+
+    def __init__(self, repo: MemoryRepository):
+        self._current = repo
+        self._write_lock = threading.Lock()
+        self._catalogue_lock = threading.Lock()
+
+    @property
+    def current(self) -> MemoryRepository:
+        return self._current
+
+    def __getattr__(self, name):
+        # Only called for names the VersionedRepository doesn't define itself, i.e. MemoryRepository's methods.
+        if name in WRITTEN_ATTRIBUTES:
+            return partial(self.write, name)
+        return getattr(self._current, name)
+
+    def write(self, writer: str, *args, **kwargs):
+        if writer in INDEXED_WRITERS:
+            return self.write_catalogue(writer, *args, **kwargs)
+        with self._write_lock:
+            draft = self._current.copy_for_write(writer)
+            result = getattr(draft, writer)(*args, **kwargs)
+            draft.prepare_for_readers()
+            self._current = draft
+        return result
+
+    def write_catalogue(self, writer: str, *args, **kwargs):
+        with self._catalogue_lock:
+            version = self._current
+            draft = version.copy_for_write(writer)
+            result = getattr(draft, writer)(*args, **kwargs)
+            draft.prepare_for_readers()
+
+            with self._write_lock:
+                if self._current is not version:
+                    rebased = self._current.copy_for_write(writer)
+                    result = getattr(rebased, writer)(*args, **kwargs)
+                    rebased.take_derived_indexes(draft)
+                    rebased.prepare_for_readers()
+                    draft = rebased
+                self._current = draft
+        return result
+
+
+AbstractRepository.register(VersionedRepository)
@@ -17,8 +17,7 @@ class AuthenticationException(Exception):
 
 def add_user(username: str, password: str, repo: AbstractRepository):
     # Check that the given username is available.
-    user = repo.get_user(username)
-    if user is not None:
+    if not repo.is_username_available(username):
         raise NameNotUniqueException
 
     # Encrypt password so that the database doesn't store passwords 'in the clear'.
@@ -29,6 +28,10 @@ def add_user(username: str, password: str, repo: AbstractRepository):
     repo.add_user(user)
 
 
+def is_username_available(username: str, repo: AbstractRepository):
+    return repo.is_username_available(username)
+
+
 def get_user(username: str, repo: AbstractRepository):
     user = repo.get_user(username)
     if user is None:
@@ -1,7 +1,15 @@
+import sys
 from datetime import datetime
 from typing import List, Iterable
 
+# Domain classes declare __slots__, so that a catalogue of millions of Movies doesn't carry a dictionary per object.
+# Movies and Users also allow weak references, which SqliteRepository keeps them by. copy.copy gives an object with its
+# own lists, which can change without changing the original.
+
+
 class User:
+    __slots__ = ('_username', '_password', '_comments', '__watched', '__reviews', '__time_spent', '__weakref__')
+
     def __init__(
             self, username: str, password: str
     ):
@@ -61,6 +69,14 @@ class User:
     def add_review(self, review):
         self.__reviews.append(review)
 
+    def __copy__(self):
+        copied = User(self._username, self._password)
+        copied._comments = list(self._comments)
+        copied.__watched = list(self.__watched)
+        copied.__reviews = list(self.__reviews)
+        copied.__time_spent = self.__time_spent
+        return copied
+
     @property
     def __repr__(self):
         return f"<User {self._username}>"
@@ -85,6 +101,8 @@ class User:
 
 
 class Comment:
+    __slots__ = ('_user', '_movie', '_comment', '_timestamp')
+
     def __init__(
             self, user: User, movie: 'Movie', comment: str, timestamp: datetime
     ):
@@ -120,6 +138,10 @@ class Comment:
 
 
 class Movie:
+    __slots__ = ('__id', '__title', '__year', '__description', '__director', '__runtime_minutes', '__actors',
+                 '__genres', '_comments', '_image_hyperlink', '_rating', '_votes', '_revenue', '_metascore',
+                 '__weakref__')
+
     def __init__(self, title=None, year=None, movie_id: int = None):
         self.__id = movie_id
         self.__title = None
@@ -133,15 +155,13 @@ class Movie:
         self.__runtime_minutes = 0
         self.__actors = []
         self.__genres = []
-        self._comments: List[Comment] = list()
-        self._hyperlink: str = f"https://www.google.com/search?q={self.__title}&rlz=1C1CHZL_enNZ777NZ777&oq=123&aqs" \
-                               f"=chrome.0.69i59j69i60l3.1134j0j9&sourceid=chrome&ie=UTF-8 "
+        # Created by the first Comment, as most Movies have none.
+        self._comments: List[Comment] = None
         self._image_hyperlink: str = ''
         self._rating = float(10)
         self._votes = 0
         self._revenue = 'N/A'
         self._metascore = 'N/A'
-        self._voted = []
 
     @property
     def votes(self):
@@ -177,7 +197,8 @@ class Movie:
 
     @property
     def hyperlink(self) -> str:
-        return self._hyperlink
+        # Built when asked for, rather than stored with every Movie.
+        return search_hyperlink(self.__title)
 
     @property
     def image_hyperlink(self) -> str:
@@ -189,11 +210,33 @@ class Movie:
 
     @property
     def comments(self) -> list():
+        if self._comments is None:
+            return list()
         return self._comments
 
     def add_comment(self, comment: Comment):
+        if self._comments is None:
+            self._comments = list()
         self._comments.append(comment)
 
+    def __copy__(self):
+        copied = Movie.__new__(Movie)
+        copied.__id = self.__id
+        copied.__title = self.__title
+        copied.__year = self.__year
+        copied.__description = self.__description
+        copied.__director = self.__director
+        copied.__runtime_minutes = self.__runtime_minutes
+        copied.__actors = list(self.__actors)
+        copied.__genres = list(self.__genres)
+        copied._comments = list(self._comments) if self._comments is not None else None
+        copied._image_hyperlink = self._image_hyperlink
+        copied._rating = self._rating
+        copied._votes = self._votes
+        copied._revenue = self._revenue
+        copied._metascore = self._metascore
+        return copied
+
     @property
     def id(self) -> int:
         return self.__id
@@ -202,6 +245,11 @@ class Movie:
     def date(self) -> int:
         return self.__year
 
+    @date.setter
+    def date(self, year):
+        if isinstance(year, int) and year >= 1900:
+            self.__year = year
+
     def __repr__(self):
         return f"<Movie {self.__title}, {self.__year}>"
 
@@ -307,11 +355,13 @@ class Movie:
 
 
 class Director:
+    __slots__ = ('__director_full_name', '__directed_movies')
+
     def __init__(self, director_full_name: str):
         if director_full_name == "" or type(director_full_name) is not str:
             self.__director_full_name = None
         else:
-            self.__director_full_name = director_full_name.strip()
+            self.__director_full_name = sys.intern(director_full_name.strip())
         self.__directed_movies = list()
 
     @property
@@ -325,6 +375,19 @@ class Director:
     def add_movie(self, movie: Movie):
         self.__directed_movies.append(movie)
 
+    def remove_movie(self, movie: Movie):
+        if movie in self.__directed_movies:
+            self.__directed_movies.remove(movie)
+
+    def replace_movie(self, movie: Movie, replacement: Movie):
+        if movie in self.__directed_movies:
+            self.__directed_movies[self.__directed_movies.index(movie)] = replacement
+
+    def __copy__(self):
+        copied = Director(self.__director_full_name)
+        copied.__directed_movies = list(self.__directed_movies)
+        return copied
+
     @property
     def director_full_name(self) -> str:
         return self.__director_full_name
@@ -334,7 +397,7 @@ class Director:
         if full_name == "" or type(full_name) is not str:
             self.__director_full_name = None
         else:
-            self.__director_full_name = full_name.strip()
+            self.__director_full_name = sys.intern(full_name.strip())
 
     def __repr__(self):
         return f"<Director {self.director_full_name}>"
@@ -358,12 +421,13 @@ class Director:
 
 
 class Genre:
+    __slots__ = ('__genre_name', '_tagged_movies')
 
     def __init__(self, genre_name: str):
         if genre_name == "" or type(genre_name) is not str:
             self.__genre_name = None
         else:
-            self.__genre_name = genre_name.strip()
+            self.__genre_name = sys.intern(genre_name.strip())
         self._tagged_movies: List[Movie] = list()
 
     @property
@@ -375,7 +439,7 @@ class Genre:
         if name == "" or type(name) is not str:
             self.__genre_name = None
         else:
-            self.__genre_name = name.strip()
+            self.__genre_name = sys.intern(name.strip())
 
     @property
     def tagged_movies(self) -> Iterable[Movie]:
@@ -391,6 +455,19 @@ class Genre:
     def add_movie(self, movie: Movie):
         self._tagged_movies.append(movie)
 
+    def remove_movie(self, movie: Movie):
+        if movie in self._tagged_movies:
+            self._tagged_movies.remove(movie)
+
+    def replace_movie(self, movie: Movie, replacement: Movie):
+        if movie in self._tagged_movies:
+            self._tagged_movies[self._tagged_movies.index(movie)] = replacement
+
+    def __copy__(self):
+        copied = Genre(self.__genre_name)
+        copied._tagged_movies = list(self._tagged_movies)
+        return copied
+
     def __repr__(self):
         return f"<Genre {self.__genre_name}>"
 
@@ -411,11 +488,13 @@ class Genre:
 
 
 class Actor:
+    __slots__ = ('__actor_full_name', 'colleagues', '__joined_movies')
+
     def __init__(self, actor_full_name: str):
         if actor_full_name == "" or type(actor_full_name) is not str:
             self.__actor_full_name = None
         else:
-            self.__actor_full_name = actor_full_name.strip()
+            self.__actor_full_name = sys.intern(actor_full_name.strip())
         self.colleagues = set()
         self.__joined_movies = list()
 
@@ -430,6 +509,20 @@ class Actor:
     def add_movie(self, movie: Movie):
         self.__joined_movies.append(movie)
 
+    def remove_movie(self, movie: Movie):
+        if movie in self.__joined_movies:
+            self.__joined_movies.remove(movie)
+
+    def replace_movie(self, movie: Movie, replacement: Movie):
+        if movie in self.__joined_movies:
+            self.__joined_movies[self.__joined_movies.index(movie)] = replacement
+
+    def __copy__(self):
+        copied = Actor(self.__actor_full_name)
+        copied.colleagues = set(self.colleagues)
+        copied.__joined_movies = list(self.__joined_movies)
+        return copied
+
     def joined(self, movie: Movie):
         for m in self.__joined_movies:
             if movie == m:
@@ -445,7 +538,7 @@ class Actor:
         if full_name == "" or type(full_name) is not str:
             self.__actor_full_name = None
         else:
-            self.__actor_full_name = full_name.strip()
+            self.__actor_full_name = sys.intern(full_name.strip())
 
     def __repr__(self):
         return f"<Actor {self.actor_full_name}>"
@@ -483,6 +576,11 @@ class ModelException(Exception):
     pass
 
 
+def search_hyperlink(title: str) -> str:
+    return f"https://www.google.com/search?q={title}&rlz=1C1CHZL_enNZ777NZ777&oq=123&aqs" \
+           f"=chrome.0.69i59j69i60l3.1134j0j9&sourceid=chrome&ie=UTF-8 "
+
+
 def make_comment(comment_text: str, user: User, movie: Movie, timestamp: datetime = datetime.today()):
     comment = Comment(user, movie, comment_text, timestamp)
     user.add_comment(comment)
@@ -510,3 +608,13 @@ def make_actor_association(movie: Movie, actor: Actor):
 
     movie.add_actor(actor)
     actor.add_movie(movie)
+
+
+def remove_genre_association(movie: Movie, genre: Genre):
+    movie.remove_genre(genre)
+    genre.remove_movie(movie)
+
+
+def remove_actor_association(movie: Movie, actor: Actor):
+    movie.remove_actor(actor)
+    actor.remove_movie(movie)
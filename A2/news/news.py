@@ -5,7 +5,7 @@ import A2.utilities.utilities as utilities
 from A2.authentication.authentication import login_required
 from better_profanity import profanity
 from flask import Blueprint
-from flask import request, render_template, redirect, url_for, session
+from flask import request, render_template, redirect, url_for, session, jsonify, abort
 from flask_wtf import FlaskForm
 from wtforms import TextAreaField, HiddenField, SubmitField
 from wtforms.validators import DataRequired, Length, ValidationError
@@ -14,6 +14,14 @@ from wtforms.validators import DataRequired, Length, ValidationError
 news_blueprint = Blueprint(
     'news_bp', __name__)
 
+# The heading of each leaderboard, keyed by the attribute it ranks movies by.
+LEADERBOARD_TITLES = {
+    'rating': 'Highest rated movies',
+    'votes': 'Most voted movies',
+    'revenue': 'Highest grossing movies',
+    'runtime_minutes': 'Longest movies'
+}
+
 @news_blueprint.route('/movies_by_genre', methods=['GET'])
 def movies_by_genre():
     movies_per_page = 3
@@ -71,6 +79,8 @@ def movies_by_genre_2(movies_per_page, genre_name, cursor, movie_to_show_comment
         movie['view_comment_url'] = url_for('news_bp.movies_by_genre', genre=genre_name, cursor=cursor,
                                             view_comments_for=movie['id'])
         movie['add_comment_url'] = url_for('news_bp.comment_on_movie', movie=movie['id'])
+        movie['similar_movies'] = movies_and_urls(services.get_similar_movies(movie['id'], repo.repo_instance))
+        movie['related_movies'] = movies_and_urls(services.get_related_movies(movie['id'], repo.repo_instance))
 
     st = ""
     if s:
@@ -155,6 +165,8 @@ def movies_by_director_2(movies_per_page, director_name, cursor, movie_to_show_c
         movie['view_comment_url'] = url_for('news_bp.movies_by_director', director=director_name, cursor=cursor,
                                             view_comments_for=movie['id'])
         movie['add_comment_url'] = url_for('news_bp.comment_on_movie', movie=movie['id'])
+        movie['similar_movies'] = movies_and_urls(services.get_similar_movies(movie['id'], repo.repo_instance))
+        movie['related_movies'] = movies_and_urls(services.get_related_movies(movie['id'], repo.repo_instance))
 
     st = ""
     if s:
@@ -239,6 +251,8 @@ def movies_by_actor_2(movies_per_page, actor_name, cursor, movie_to_show_comment
         movie['view_comment_url'] = url_for('news_bp.movies_by_actor', actor=actor_name, cursor=cursor,
                                             view_comments_for=movie['id'])
         movie['add_comment_url'] = url_for('news_bp.comment_on_movie', movie=movie['id'])
+        movie['similar_movies'] = movies_and_urls(services.get_similar_movies(movie['id'], repo.repo_instance))
+        movie['related_movies'] = movies_and_urls(services.get_related_movies(movie['id'], repo.repo_instance))
 
     st = ""
     if s:
@@ -331,6 +345,8 @@ def movies_by_title_2(movies_per_page, title_name, cursor, movie_to_show_comment
         movie['view_comment_url'] = url_for('news_bp.movies_by_title', title=title_name, cursor=cursor,
                                             view_comments_for=movie['id'])
         movie['add_comment_url'] = url_for('news_bp.comment_on_movie', movie=movie['id'])
+        movie['similar_movies'] = movies_and_urls(services.get_similar_movies(movie['id'], repo.repo_instance))
+        movie['related_movies'] = movies_and_urls(services.get_related_movies(movie['id'], repo.repo_instance))
 
     st = ""
     if s:
@@ -418,6 +434,8 @@ def movies_by_date_2(movies_per_page, date, cursor, movie_to_show_comments, s=Fa
         movie['view_comment_url'] = url_for('news_bp.movies_by_date', date=date, cursor=cursor,
                                             view_comments_for=movie['id'])
         movie['add_comment_url'] = url_for('news_bp.comment_on_movie', movie=movie['id'])
+        movie['similar_movies'] = movies_and_urls(services.get_similar_movies(movie['id'], repo.repo_instance))
+        movie['related_movies'] = movies_and_urls(services.get_related_movies(movie['id'], repo.repo_instance))
 
     st = ""
     if s:
@@ -444,6 +462,299 @@ def movies_by_date_2(movies_per_page, date, cursor, movie_to_show_comments, s=Fa
     )
 
 
+@news_blueprint.route('/movies_by_description', methods=['GET'])
+def movies_by_description():
+    movies_per_page = 3
+
+    # Read query parameters.
+    query = request.args.get('query')
+    cursor = request.args.get('cursor')
+    movie_to_show_comments = request.args.get('view_comments_for')
+    return movies_by_description_2(movies_per_page, query, cursor, movie_to_show_comments)
+
+
+def movies_by_description_2(movies_per_page, query, cursor, movie_to_show_comments, s=False):
+    if movie_to_show_comments is None:
+        # No view-comments query parameter, so set to a non-existent movie id.
+        movie_to_show_comments = -1
+    else:
+        # Convert movie_to_show_comments from string to int.
+        movie_to_show_comments = int(movie_to_show_comments)
+
+    if cursor is None:
+        # No cursor query parameter, so initialise cursor to start at the beginning.
+        cursor = 0
+    else:
+        # Convert cursor from string to int.
+        cursor = int(cursor)
+
+    # Retrieve movie ids for movies whose descriptions best match query, best match first.
+    movie_ids = services.get_movie_ids_for_description(query, repo.repo_instance)
+    if len(movie_ids) == 0:
+        raise IndexError
+
+    # Retrieve the batch of movies to display on the Web page.
+    movies = services.get_movies_by_id(movie_ids[cursor:cursor + movies_per_page], repo.repo_instance)
+
+    first_movie_url = None
+    last_movie_url = None
+    next_movie_url = None
+    prev_movie_url = None
+
+    if cursor > 0:
+        # There are preceding movies, so generate URLs for the 'previous' and 'first' navigation buttons.
+        prev_movie_url = url_for('news_bp.movies_by_description', query=query, cursor=cursor - movies_per_page)
+        first_movie_url = url_for('news_bp.movies_by_description', query=query)
+
+    if cursor + movies_per_page < len(movie_ids):
+        # There are further movies, so generate URLs for the 'next' and 'last' navigation buttons.
+        next_movie_url = url_for('news_bp.movies_by_description', query=query, cursor=cursor + movies_per_page)
+
+        last_cursor = movies_per_page * int(len(movie_ids) / movies_per_page)
+        if len(movie_ids) % movies_per_page == 0:
+            last_cursor -= movies_per_page
+        last_movie_url = url_for('news_bp.movies_by_description', query=query, cursor=last_cursor)
+
+    # Construct urls for viewing movie comments and adding comments.
+    for movie in movies:
+        movie['view_comment_url'] = url_for('news_bp.movies_by_description', query=query, cursor=cursor,
+                                            view_comments_for=movie['id'])
+        movie['add_comment_url'] = url_for('news_bp.comment_on_movie', movie=movie['id'])
+        movie['similar_movies'] = movies_and_urls(services.get_similar_movies(movie['id'], repo.repo_instance))
+        movie['related_movies'] = movies_and_urls(services.get_related_movies(movie['id'], repo.repo_instance))
+
+    st = ""
+    if s:
+        st = f'Search result for "Description: {query}"'
+
+    # Generate the webpage to display the movies.
+    return render_template(
+        'news/movies.html',
+        title='Movies',
+        movies_title='Movies about ' + query,
+        movies=movies,
+        selected_movies=utilities.get_selected_movies(len(movies) * 2),
+        genre_urls=utilities.get_genres_and_urls(),
+        first_movie_url=first_movie_url,
+        last_movie_url=last_movie_url,
+        prev_movie_url=prev_movie_url,
+        next_movie_url=next_movie_url,
+        show_comments_for_movie=movie_to_show_comments,
+        director_urls=utilities.get_directors_and_urls(),
+        actor_urls=utilities.get_actors_and_urls(),
+        title_urls=utilities.get_titles_and_urls(),
+        date_urls=utilities.get_dates_and_urls(),
+        search_txt=st
+    )
+
+
+@news_blueprint.route('/movies_by_facets', methods=['GET'])
+def movies_by_facets():
+    movies_per_page = 3
+
+    # Read query parameters. Facets that are missing, or can't be converted, don't restrict the movies.
+    facets = {
+        'genre': request.args.getlist('genre') or None,
+        'director': request.args.get('director'),
+        'actor': request.args.get('actor'),
+        'year_from': request.args.get('year_from', type=int),
+        'year_to': request.args.get('year_to', type=int),
+        'min_rating': request.args.get('min_rating', type=float)
+    }
+    facets = {facet: value for facet, value in facets.items() if value is not None}
+    cursor = request.args.get('cursor')
+    movie_to_show_comments = request.args.get('view_comments_for')
+
+    if movie_to_show_comments is None:
+        # No view-comments query parameter, so set to a non-existent movie id.
+        movie_to_show_comments = -1
+    else:
+        # Convert movie_to_show_comments from string to int.
+        movie_to_show_comments = int(movie_to_show_comments)
+
+    if cursor is None:
+        # No cursor query parameter, so initialise cursor to start at the beginning.
+        cursor = 0
+    else:
+        # Convert cursor from string to int.
+        cursor = int(cursor)
+
+    # Retrieve movie ids for movies that match every facet.
+    movie_ids = services.get_movie_ids_for_facets(
+        repo.repo_instance,
+        genres=facets.get('genre', []),
+        director=facets.get('director'),
+        actor=facets.get('actor'),
+        start_date=facets.get('year_from'),
+        end_date=facets.get('year_to'),
+        minimum_rating=facets.get('min_rating')
+    )
+    if len(movie_ids) == 0:
+        message = "Sorry, no movies match all of the selected filters, Please try again!"
+        return render_template(
+            'home/home.html',
+            selected_movies=utilities.get_selected_movies(),
+            genre_urls=utilities.get_genres_and_urls(),
+            director_urls=utilities.get_directors_and_urls(),
+            actor_urls=utilities.get_actors_and_urls(),
+            title_urls=utilities.get_titles_and_urls(),
+            date_urls=utilities.get_dates_and_urls(),
+            returned_message=message
+        )
+
+    # Retrieve the batch of movies to display on the Web page.
+    movies = services.get_movies_by_id(movie_ids[cursor:cursor + movies_per_page], repo.repo_instance)
+
+    first_movie_url = None
+    last_movie_url = None
+    next_movie_url = None
+    prev_movie_url = None
+
+    if cursor > 0:
+        # There are preceding movies, so generate URLs for the 'previous' and 'first' navigation buttons.
+        prev_movie_url = url_for('news_bp.movies_by_facets', cursor=cursor - movies_per_page, **facets)
+        first_movie_url = url_for('news_bp.movies_by_facets', **facets)
+
+    if cursor + movies_per_page < len(movie_ids):
+        # There are further movies, so generate URLs for the 'next' and 'last' navigation buttons.
+        next_movie_url = url_for('news_bp.movies_by_facets', cursor=cursor + movies_per_page, **facets)
+
+        last_cursor = movies_per_page * int(len(movie_ids) / movies_per_page)
+        if len(movie_ids) % movies_per_page == 0:
+            last_cursor -= movies_per_page
+        last_movie_url = url_for('news_bp.movies_by_facets', cursor=last_cursor, **facets)
+
+    # Construct urls for viewing movie comments and adding comments.
+    for movie in movies:
+        movie['view_comment_url'] = url_for('news_bp.movies_by_facets', cursor=cursor, view_comments_for=movie['id'],
+                                            **facets)
+        movie['add_comment_url'] = url_for('news_bp.comment_on_movie', movie=movie['id'])
+        movie['similar_movies'] = movies_and_urls(services.get_similar_movies(movie['id'], repo.repo_instance))
+        movie['related_movies'] = movies_and_urls(services.get_related_movies(movie['id'], repo.repo_instance))
+
+    # Construct urls that narrow the movies to one more genre or to a single year, labelled with the number of
+    # matching movies.
+    facet_counts = services.get_facet_counts(movie_ids, repo.repo_instance)
+    selected_genres = facets.get('genre', [])
+    facet_urls = dict()
+    for genre_name, count in facet_counts['genre'].items():
+        if genre_name not in selected_genres:
+            facet_urls[f'{genre_name.capitalize()} ({count})'] = url_for(
+                'news_bp.movies_by_facets', **dict(facets, genre=selected_genres + [genre_name]))
+    for date, count in facet_counts['date'].items():
+        facet_urls[f'{date} ({count})'] = url_for('news_bp.movies_by_facets',
+                                                  **dict(facets, year_from=date, year_to=date))
+
+    st = ""
+    if len(facets) > 0:
+        st = 'Filtered by ' + ', '.join(
+            f"{facet}: {' and '.join(value) if isinstance(value, list) else value}" for facet, value in facets.items())
+
+    # Generate the webpage to display the movies.
+    return render_template(
+        'news/movies.html',
+        title='Movies',
+        movies_title=f'{len(movie_ids)} matching movies',
+        movies=movies,
+        selected_movies=utilities.get_selected_movies(len(movies) * 2),
+        genre_urls=utilities.get_genres_and_urls(),
+        first_movie_url=first_movie_url,
+        last_movie_url=last_movie_url,
+        prev_movie_url=prev_movie_url,
+        next_movie_url=next_movie_url,
+        show_comments_for_movie=movie_to_show_comments,
+        director_urls=utilities.get_directors_and_urls(),
+        actor_urls=utilities.get_actors_and_urls(),
+        title_urls=utilities.get_titles_and_urls(),
+        date_urls=utilities.get_dates_and_urls(),
+        facet_urls=facet_urls,
+        search_txt=st
+    )
+
+
+@news_blueprint.route('/leaderboard', methods=['GET'])
+def leaderboard():
+    movies_per_page = 3
+
+    # Read query parameters.
+    attribute = request.args.get('attribute', 'rating')
+    cursor = request.args.get('cursor')
+    movie_to_show_comments = request.args.get('view_comments_for')
+
+    if movie_to_show_comments is None:
+        # No view-comments query parameter, so set to a non-existent movie id.
+        movie_to_show_comments = -1
+    else:
+        # Convert movie_to_show_comments from string to int.
+        movie_to_show_comments = int(movie_to_show_comments)
+
+    if cursor is None:
+        # No cursor query parameter, so initialise cursor to start at the beginning.
+        cursor = 0
+    else:
+        # Convert cursor from string to int.
+        cursor = max(int(cursor), 0)
+
+    # Retrieve only the batch of movies to display, and the length of the leaderboard for the navigation buttons.
+    try:
+        movies = services.get_leaderboard(attribute, repo.repo_instance, cursor, movies_per_page)
+        length = services.get_leaderboard_length(attribute, repo.repo_instance)
+    except services.UnknownLeaderboardException:
+        abort(404)
+
+    first_movie_url = None
+    last_movie_url = None
+    next_movie_url = None
+    prev_movie_url = None
+
+    if cursor > 0:
+        # There are preceding movies, so generate URLs for the 'previous' and 'first' navigation buttons.
+        prev_movie_url = url_for('news_bp.leaderboard', attribute=attribute, cursor=max(cursor - movies_per_page, 0))
+        first_movie_url = url_for('news_bp.leaderboard', attribute=attribute)
+
+    if cursor + movies_per_page < length:
+        # There are further movies, so generate URLs for the 'next' and 'last' navigation buttons.
+        next_movie_url = url_for('news_bp.leaderboard', attribute=attribute, cursor=cursor + movies_per_page)
+
+        last_cursor = movies_per_page * int(length / movies_per_page)
+        if length % movies_per_page == 0:
+            last_cursor -= movies_per_page
+        last_movie_url = url_for('news_bp.leaderboard', attribute=attribute, cursor=last_cursor)
+
+    # Construct urls for viewing movie comments and adding comments.
+    for movie in movies:
+        movie['view_comment_url'] = url_for('news_bp.leaderboard', attribute=attribute, cursor=cursor,
+                                            view_comments_for=movie['id'])
+        movie['add_comment_url'] = url_for('news_bp.comment_on_movie', movie=movie['id'])
+        movie['similar_movies'] = movies_and_urls(services.get_similar_movies(movie['id'], repo.repo_instance))
+        movie['related_movies'] = movies_and_urls(services.get_related_movies(movie['id'], repo.repo_instance))
+
+    # Construct urls that switch to the other leaderboards.
+    leaderboard_urls = {title: url_for('news_bp.leaderboard', attribute=other)
+                        for other, title in LEADERBOARD_TITLES.items() if other != attribute}
+
+    # Generate the webpage to display the movies.
+    return render_template(
+        'news/movies.html',
+        title='Movies',
+        movies_title=LEADERBOARD_TITLES[attribute],
+        movies=movies,
+        selected_movies=utilities.get_selected_movies(len(movies) * 2),
+        genre_urls=utilities.get_genres_and_urls(),
+        first_movie_url=first_movie_url,
+        last_movie_url=last_movie_url,
+        prev_movie_url=prev_movie_url,
+        next_movie_url=next_movie_url,
+        show_comments_for_movie=movie_to_show_comments,
+        director_urls=utilities.get_directors_and_urls(),
+        actor_urls=utilities.get_actors_and_urls(),
+        title_urls=utilities.get_titles_and_urls(),
+        date_urls=utilities.get_dates_and_urls(),
+        facet_urls=leaderboard_urls,
+        search_txt=f'{length} movies'
+    )
+
+
 @news_blueprint.route('/comment', methods=['GET', 'POST'])
 @login_required
 def comment_on_movie():
@@ -538,7 +849,33 @@ def search():
     except IndexError:
         pass
 
+    # Nothing matched the keyword, so look for titles and names within a few typing mistakes of it.
+    suggestions = services.get_name_suggestions(aim_name, repo.repo_instance)
+    closest = [suggestion for suggestion in suggestions if suggestion['distance'] == suggestions[0]['distance']]
+    if len(closest) == 1:
+        # A single closest match, so show its movies.
+        name = closest[0]['name']
+        if closest[0]['kind'] == 'title':
+            return movies_by_title_2(movies_per_page, name, cursor, movie_to_show_comments, True)
+        elif closest[0]['kind'] == 'genre':
+            return movies_by_genre_2(movies_per_page, name, cursor, movie_to_show_comments, True)
+        elif closest[0]['kind'] == 'director':
+            return movies_by_director_2(movies_per_page, name, cursor, movie_to_show_comments, True)
+        return movies_by_actor_2(movies_per_page, name, cursor, movie_to_show_comments, True)
+
+    # Descriptions match any one word of the keyword, so they're searched last, once the keyword is known not to be a
+    # misspelt name.
+    if len(suggestions) == 0:
+        try:
+            return movies_by_description_2(movies_per_page, aim_name, cursor, movie_to_show_comments, True)
+        except IndexError:
+            pass
+
     message = f"Sorry, Can't find a matched {aim_name}, Please try again!"
+    suggestion_urls = dict()
+    for suggestion in suggestions:
+        suggestion_urls[suggestion['name']] = name_url(suggestion['kind'], suggestion['name'])
+
     return render_template(
         'home/home.html',
         selected_movies=utilities.get_selected_movies(),
@@ -547,10 +884,78 @@ def search():
         actor_urls=utilities.get_actors_and_urls(),
         title_urls=utilities.get_titles_and_urls(),
         date_urls=utilities.get_dates_and_urls(),
-        returned_message=message
+        returned_message=message,
+        suggestion_urls=suggestion_urls
     )
 
 
+@news_blueprint.route('/autocomplete', methods=['GET'])
+def autocomplete():
+    # Read query parameters.
+    prefix = request.args.get('q', '')
+    quantity = request.args.get('k', 10, type=int)
+
+    completions = services.get_name_completions(prefix, repo.repo_instance, quantity)
+
+    # Construct the url of the movies page for each completion.
+    for completion in completions:
+        completion['url'] = name_url(completion['kind'], completion['name'])
+
+    return jsonify(completions)
+
+
+@news_blueprint.route('/collaborators', methods=['GET'])
+def collaborators():
+    # Read query parameters.
+    name = request.args.get('name', '').lower().strip()
+    kind = request.args.get('kind', 'actor')
+    quantity = request.args.get('k', 10, type=int)
+
+    people = services.get_top_collaborators(name, kind, repo.repo_instance, quantity)
+
+    # Construct the url of the movies page for each collaborator.
+    for person in people:
+        person['url'] = name_url(person['kind'], person['name'])
+
+    return jsonify(people)
+
+
+@news_blueprint.route('/separation', methods=['GET'])
+def separation():
+    # Read query parameters.
+    first_name = request.args.get('from', '').lower().strip()
+    first_kind = request.args.get('from_kind', 'actor')
+    second_name = request.args.get('to', '').lower().strip()
+    second_kind = request.args.get('to_kind', 'actor')
+
+    path = services.get_collaboration_path(first_name, first_kind, second_name, second_kind, repo.repo_instance)
+
+    # Construct the url of the movies page for each person on the path.
+    for person in path:
+        person['url'] = name_url(person['kind'], person['name'])
+
+    # People who aren't linked have no degrees of separation.
+    return jsonify({'degrees': len(path) - 1 if len(path) > 0 else None, 'path': path})
+
+
+def movies_and_urls(movies):
+    # Adds the url of its movies page to each of movies.
+    for movie in movies:
+        movie['url'] = name_url('title', movie['title'])
+    return movies
+
+
+def name_url(kind, name):
+    # Returns the url of the movies page for a title, genre, director or actor.
+    if kind == 'title':
+        return url_for('news_bp.movies_by_title', title=name)
+    elif kind == 'genre':
+        return url_for('news_bp.movies_by_genre', genre=name)
+    elif kind == 'director':
+        return url_for('news_bp.movies_by_director', director=name)
+    return url_for('news_bp.movies_by_actor', actor=name)
+
+
 class ProfanityFree:
     def __init__(self, message=None):
         if not message:
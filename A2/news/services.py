@@ -1,6 +1,6 @@
-from typing import Iterable
+from typing import Dict, Iterable
 from A2.adapters.repository import AbstractRepository
-from A2.domain.model import Movie, Actor, User, Director, Genre, Comment, make_comment
+from A2.domain.model import Movie, Actor, Director, Genre, Comment
 
 
 class NonExistentMovieException(Exception):
@@ -11,6 +11,10 @@ class UnknownUserException(Exception):
     pass
 
 
+class UnknownLeaderboardException(Exception):
+    pass
+
+
 def add_comment(movie_id: int, comment_text: str, username: str, repo: AbstractRepository):
     # Check that the movie exists.
     movie = repo.get_movie(movie_id)
@@ -21,11 +25,8 @@ def add_comment(movie_id: int, comment_text: str, username: str, repo: AbstractR
     if user is None:
         raise UnknownUserException
 
-    # Create comment.
-    comment = make_comment(comment_text, user, movie)
-
-    # Update the repository.
-    repo.add_comment(comment)
+    # Create the comment and update the repository.
+    repo.comment_on_movie(comment_text, user, movie)
 
 
 def add_image_link(movie_id: int, link: str, repo: AbstractRepository):
@@ -37,6 +38,15 @@ def add_image_link(movie_id: int, link: str, repo: AbstractRepository):
     repo.add_image_link(link, movie)
 
 
+def add_image_links(links: Dict[int, str], repo: AbstractRepository):
+    # Check that every movie exists.
+    if any(repo.get_movie(movie_id) is None for movie_id in links):
+        raise NonExistentMovieException
+
+    # Update the repository.
+    repo.add_image_links(links)
+
+
 def get_movie(movie_id: int, repo: AbstractRepository):
     movie = repo.get_movie(movie_id)
 
@@ -100,12 +110,88 @@ def get_movie_ids_for_title(title, repo: AbstractRepository):
     return movie_ids
 
 
+def get_movie_ids_for_description(query, repo: AbstractRepository):
+    movie_ids = repo.get_movie_ids_for_description(query)
+
+    return movie_ids
+
+
 def get_movie_ids_for_date(date, repo: AbstractRepository):
-    movie_ids = repo.get_movie_ids_for_date(date)
+    # A date of the form '2010-2014' selects every movie released within that range of years.
+    years = str(date).split('-')
+    if len(years) == 2 and years[0].strip().isdigit() and years[1].strip().isdigit():
+        movie_ids = repo.get_movie_ids_for_date_range(int(years[0]), int(years[1]))
+    else:
+        movie_ids = repo.get_movie_ids_for_date(date)
 
     return movie_ids
 
 
+def get_movie_ids_for_facets(repo: AbstractRepository, genres=(), director=None, actor=None, start_date=None,
+                             end_date=None, minimum_rating=None):
+    movie_ids = repo.get_movie_ids_for_facets(genres, director, actor, start_date, end_date, minimum_rating)
+
+    return movie_ids
+
+
+def get_facet_counts(movie_ids, repo: AbstractRepository):
+    facet_counts = repo.get_facet_counts(movie_ids)
+
+    return facet_counts
+
+
+def get_leaderboard(attribute, repo: AbstractRepository, cursor=0, quantity=10):
+    try:
+        movie_ids = repo.get_leaderboard_movie_ids(attribute, cursor, quantity)
+    except ValueError:
+        raise UnknownLeaderboardException
+
+    return movies_to_dict(repo.get_movies_by_id(movie_ids))
+
+
+def get_leaderboard_length(attribute, repo: AbstractRepository):
+    try:
+        return repo.get_leaderboard_length(attribute)
+    except ValueError:
+        raise UnknownLeaderboardException
+
+
+def get_name_completions(prefix, repo: AbstractRepository, quantity=10):
+    completions = repo.get_name_completions(prefix, quantity)
+
+    return [{'name': name, 'kind': kind} for name, kind in completions]
+
+
+def get_name_suggestions(query, repo: AbstractRepository, quantity=5):
+    suggestions = repo.get_name_suggestions(query, quantity)
+
+    return [{'name': name, 'kind': kind, 'distance': distance} for name, kind, distance in suggestions]
+
+
+def get_top_collaborators(name, kind, repo: AbstractRepository, quantity=10):
+    collaborators = repo.get_top_collaborators((name, kind), quantity)
+
+    return [{'name': name, 'kind': kind, 'count': count} for name, kind, count in collaborators]
+
+
+def get_collaboration_path(first_name, first_kind, second_name, second_kind, repo: AbstractRepository):
+    path = repo.get_collaboration_path((first_name, first_kind), (second_name, second_kind))
+
+    return [{'name': name, 'kind': kind} for name, kind in path]
+
+
+def get_similar_movies(movie_id, repo: AbstractRepository, quantity=5):
+    similar_ids = repo.get_similar_movie_ids(movie_id, quantity)
+
+    return [{'id': movie.id, 'title': movie.title, 'date': movie.date} for movie in repo.get_movies_by_id(similar_ids)]
+
+
+def get_related_movies(movie_id, repo: AbstractRepository, quantity=5):
+    related_ids = repo.get_related_movie_ids(movie_id, quantity)
+
+    return [{'id': movie.id, 'title': movie.title, 'date': movie.date} for movie in repo.get_movies_by_id(related_ids)]
+
+
 def get_movies_by_id(id_list, repo: AbstractRepository):
     movies = repo.get_movies_by_id(id_list)
 
@@ -0,0 +1,82 @@
+"""Share one populated repository between worker processes forked from a master."""
+
+import gc
+import os
+from typing import Dict
+
+import A2.adapters.repository as repo
+
+# True in a master that builds the application before forking. Threads don't survive a fork, so create_app leaves its
+# threads unstarted, and each worker starts its own in restart_after_fork.
+preloading = False
+
+
+def disable_collection():
+    """ Called in the master before the application is built.
+
+    Collections while loading free objects part way through, leaving holes that later allocations in the workers
+    fill, which dirties pages that would otherwise stay shared.
+    """
+    gc.disable()
+
+
+def defer_threads():
+    """ Called in the master before the application is built, so that no thread is started in it. """
+    global preloading
+    preloading = True
+
+
+def freeze_before_fork():
+    """ Called in the master once the application is built, before any worker is forked.
+
+    Moves every object into the collector's permanent generation. The collector writes to the header of each object
+    it examines, so without this a worker's first collection would copy nearly every page of the catalogue. Reference
+    counts are still written when a worker uses an object, so only the pages of objects that requests touch are
+    copied.
+    """
+    gc.freeze()
+
+
+def close_connections():
+    """ Called in the master before any worker is forked, and in each worker once forked.
+
+    SQLite connections can't be used on both sides of a fork, so the sqlite repository's connections are closed, and
+    each worker's threads open their own on first use.
+    """
+    close = getattr(repo.repo_instance, 'close', None)
+    if close is not None:
+        close()
+
+
+def restart_after_fork(app):
+    """ Called in each worker just after it's forked from the master. """
+    gc.enable()
+    close_connections()
+
+    # Threads don't survive a fork, and the master defers them, so each worker watches the data files itself.
+    watcher = getattr(app, 'data_watcher', None)
+    if watcher is not None:
+        app.data_watcher = watcher.restarted()
+
+
+def memory_usage() -> Dict[str, int]:
+    """ Returns this process's resident memory, in bytes: 'rss' in total, 'shared' with other processes and 'private'
+    to this one. Returns an empty dict where /proc isn't available. """
+    fields = {'Rss': 'rss', 'Shared_Clean': 'shared', 'Shared_Dirty': 'shared', 'Private_Clean': 'private',
+              'Private_Dirty': 'private'}
+    usage = {'rss': 0, 'shared': 0, 'private': 0}
+    try:
+        with open(f'/proc/{os.getpid()}/smaps_rollup') as infile:
+            for line in infile:
+                name, _, value = line.partition(':')
+                if name in fields:
+                    usage[fields[name]] += int(value.split()[0]) * 1024
+    except OSError:
+        return dict()
+    return usage
+
+
+def format_memory_usage(usage: Dict[str, int]) -> str:
+    if len(usage) == 0:
+        return 'memory usage unavailable'
+    return ', '.join(f'{name} {size / (1 << 20):.1f} MB' for name, size in usage.items())
@@ -0,0 +1,46 @@
+"""Benchmark prefix completion over a large vocabulary of names.
+
+Run from the project directory:
+
+    python -m benchmarks.bench_autocomplete [size ...]
+
+Reports the time to build the index and the mean latency of completing random prefixes of one to six characters.
+"""
+
+import random
+import string
+import sys
+import time
+
+from A2.adapters.autocomplete import PrefixIndex
+
+DEFAULT_SIZES = [10_000, 100_000, 1_000_000]
+QUERIES = 10_000
+KINDS = ('title', 'genre', 'director', 'actor')
+
+
+def make_names(size: int):
+    words = [''.join(random.choices(string.ascii_lowercase, k=random.randint(3, 9))) for _ in range(size // 20 + 10)]
+    return [' '.join(random.choices(words, k=random.randint(1, 4))) for _ in range(size)]
+
+
+def main(sizes):
+    random.seed(235)
+    print(f"{'names':>10} {'build (s)':>10} {'complete (us)':>14}")
+    for size in sizes:
+        names = make_names(size)
+
+        start = time.perf_counter()
+        index = PrefixIndex((name, random.choice(KINDS), random.random()) for name in names)
+        build = time.perf_counter() - start
+
+        prefixes = [random.choice(names)[:random.randint(1, 6)] for _ in range(QUERIES)]
+        start = time.perf_counter()
+        for prefix in prefixes:
+            index.complete(prefix)
+        complete = (time.perf_counter() - start) / QUERIES * 1_000_000
+        print(f'{size:>10} {build:>10.2f} {complete:>14.2f}')
+
+
+if __name__ == '__main__':
+    main([int(size) for size in sys.argv[1:]] or DEFAULT_SIZES)
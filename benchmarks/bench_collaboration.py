@@ -0,0 +1,57 @@
+"""Benchmark degrees-of-separation and top-collaborator queries on a generated collaboration graph.
+
+Run from the project directory:
+
+    python -m benchmarks.bench_collaboration [movies ...]
+
+Each generated movie has a director and four actors drawn from a pool of people, so 100,000 movies give about a million
+collaborations. Path queries between random actors should stay in the low milliseconds as the graph grows.
+"""
+
+import random
+import sys
+import time
+
+from A2.adapters.collaboration_graph import CollaborationGraph
+
+DEFAULT_SIZES = [10_000, 100_000]
+QUERIES = 200
+
+
+def generate_credits(movies: int):
+    actors = movies // 2
+    directors = movies // 10
+    rng = random.Random(235)
+    return [[(f'actor {rng.randrange(actors)}', 'actor') for _ in range(4)] +
+            [(f'director {rng.randrange(directors)}', 'director')] for _ in range(movies)]
+
+
+def main(sizes):
+    print(f"{'movies':>10} {'people':>8} {'edges':>9} {'build (s)':>10} {'path (ms)':>10} {'degrees':>8} "
+          f"{'top 10 (us)':>12}")
+    for size in sizes:
+        credits = generate_credits(size)
+        start = time.perf_counter()
+        graph = CollaborationGraph(credits)
+        build = time.perf_counter() - start
+
+        people = [person for people in credits for person in people if person[1] == 'actor']
+        pairs = [(random.choice(people), random.choice(people)) for _ in range(QUERIES)]
+
+        start = time.perf_counter()
+        lengths = [len(graph.shortest_path(first, second)) - 1 for first, second in pairs]
+        path = (time.perf_counter() - start) / QUERIES * 1000
+
+        start = time.perf_counter()
+        for first, _ in pairs:
+            graph.top_collaborators(first)
+        top = (time.perf_counter() - start) / QUERIES * 1_000_000
+
+        connected = [length for length in lengths if length > 0]
+        degrees = sum(connected) / len(connected) if len(connected) > 0 else float('nan')
+        print(f'{size:>10} {len(graph):>8} {graph.edge_count():>9} {build:>10.2f} {path:>10.2f} {degrees:>8.2f} '
+              f'{top:>12.1f}')
+
+
+if __name__ == '__main__':
+    main([int(size) for size in sys.argv[1:]] or DEFAULT_SIZES)
@@ -0,0 +1,135 @@
+"""Benchmark the memory taken by the domain model, in bytes per movie.
+
+Run from the project directory:
+
+    python -m benchmarks.bench_domain_memory [movies ...]
+
+Movies are generated as the loader builds them from the data file: every row gives fresh strings for the names of its
+genres, director and actors, which are looked up in shared dictionaries as populate's indexes do. The memory traced
+while building them, divided by the number of movies, covers the Movies themselves and their share of the Genres,
+Directors and Actors.
+
+The same catalogue is also built from baseline classes holding the attributes the domain model held before it used
+__slots__: each object keeps them in its own dictionary, and a Movie stores its search link and creates its lists of
+comments and votes up front. Names aren't interned.
+"""
+
+import random
+import sys
+import tracemalloc
+from types import SimpleNamespace
+
+from A2.domain.model import Actor, Director, Genre, Movie, make_actor_association, make_director_association, \
+    search_hyperlink
+
+DEFAULT_SIZES = [10_000, 100_000]
+GENRES = 20
+
+
+class BaselineMovie:
+    def __init__(self, title: str, year: int, movie_id: int):
+        self._id = movie_id
+        self._title = title.strip()
+        self._year = year
+        self.description = None
+        self.director = None
+        self.runtime_minutes = 0
+        self._actors = []
+        self._genres = []
+        self._comments = list()
+        self._hyperlink = search_hyperlink(self._title)
+        self._image_hyperlink = ''
+        self.rating = float(10)
+        self.votes = 0
+        self.revenue = 'N/A'
+        self.metascore = 'N/A'
+        self._voted = []
+
+    def add_genre(self, genre):
+        if genre not in self._genres:
+            self._genres.append(genre)
+
+    def add_actor(self, actor):
+        if actor not in self._actors:
+            self._actors.append(actor)
+
+
+class BaselinePerson:
+    # Stands for both Director and Actor, which held a name and a list of Movies; an Actor also a set of colleagues.
+    def __init__(self, full_name: str, colleagues: bool = False):
+        self.full_name = full_name.strip()
+        if colleagues:
+            self.colleagues = set()
+        self._movies = list()
+
+    def add_movie(self, movie):
+        self._movies.append(movie)
+
+    def joined(self, movie) -> bool:
+        return movie in self._movies
+
+
+class BaselineGenre:
+    def __init__(self, genre_name: str):
+        self.genre_name = genre_name.strip()
+        self._tagged_movies = list()
+
+    def add_movie(self, movie):
+        self._tagged_movies.append(movie)
+
+
+SLOTTED = SimpleNamespace(Movie=Movie, Genre=Genre, Director=Director, Actor=Actor)
+BASELINE = SimpleNamespace(Movie=BaselineMovie, Genre=BaselineGenre, Director=BaselinePerson,
+                           Actor=lambda name: BaselinePerson(name, colleagues=True))
+
+
+def build_movies(size: int, model=SLOTTED):
+    rng = random.Random(235)
+    genres, directors, actors = dict(), dict(), dict()
+    movies = list()
+    for movie_id in range(size):
+        movie = model.Movie(f'movie {movie_id}', 2000 + rng.randrange(20), movie_id)
+        movie.description = f'The description of movie {movie_id}, which is about as long as most descriptions are.'
+        movie.runtime_minutes = rng.randrange(60, 200)
+        movie.rating = round(rng.uniform(1, 10), 1)
+        movie.votes = rng.randrange(1_000_000)
+        movie.revenue = f'{rng.uniform(0, 900):.2f}Millions'
+        movie.metascore = str(rng.randrange(100))
+
+        # Build each name afresh, as parsing a row does.
+        for genre_name in {''.join(['genre ', str(rng.randrange(GENRES))]) for _ in range(rng.randint(1, 3))}:
+            # Associate directly, as make_genre_association scans every Movie of the Genre.
+            genre = genres.setdefault(genre_name, model.Genre(genre_name))
+            movie.add_genre(genre)
+            genre.add_movie(movie)
+        director_name = ''.join(['director ', str(rng.randrange(size // 10 + 1))])
+        make_director_association(movie, directors.setdefault(director_name, model.Director(director_name)))
+        for actor_name in {''.join(['actor ', str(rng.randrange(size // 2 + 1))]) for _ in range(4)}:
+            actor = actors.setdefault(actor_name, model.Actor(actor_name))
+            if not actor.joined(movie):
+                make_actor_association(movie, actor)
+        movies.append(movie)
+    return movies, genres, directors, actors
+
+
+def traced_bytes(size: int, model) -> int:
+    tracemalloc.start()
+    catalogue = build_movies(size, model)
+    total = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del catalogue
+    return total
+
+
+def main(sizes):
+    print(f"{'movies':>10} {'baseline (MB)':>14} {'slotted (MB)':>13} {'baseline B/movie':>17} "
+          f"{'slotted B/movie':>16} {'change':>7}")
+    for size in sizes:
+        baseline = traced_bytes(size, BASELINE)
+        slotted = traced_bytes(size, SLOTTED)
+        print(f'{size:>10} {baseline / 1e6:>14.1f} {slotted / 1e6:>13.1f} {baseline / size:>17.0f} '
+              f'{slotted / size:>16.0f} {slotted / baseline - 1:>7.0%}')
+
+
+if __name__ == '__main__':
+    main([int(size) for size in sys.argv[1:]] or DEFAULT_SIZES)
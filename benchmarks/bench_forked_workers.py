@@ -0,0 +1,110 @@
+"""Benchmark the memory used by worker processes sharing a repository built before they were forked.
+
+Run from the project directory, on Linux:
+
+    python -m benchmarks.bench_forked_workers [size [workers]]
+
+A catalogue of size movies is generated from the bundled data. Workers then either build their own repository from
+it, or share one the parent built before forking them, with and without the collector frozen as gunicorn.conf.py does.
+Each worker reports its resident memory, and how much of it is private, once forked and again after serving a batch of
+simulated requests. With a shared repository, private memory per worker should be a fraction of the catalogue's size.
+"""
+
+import gc
+import json
+import os
+import sys
+import tempfile
+
+from A2 import prefork
+from A2.adapters.memory_repository import MemoryRepository, load_movies_and_genres
+from benchmarks.bench_loading import write_catalogue
+
+DEFAULT_SIZE = 10_000
+DEFAULT_WORKERS = 4
+MODES = ('separate', 'preloaded', 'preloaded, frozen')
+
+
+def build_repository(data_path: str) -> MemoryRepository:
+    repo = MemoryRepository()
+    load_movies_and_genres(data_path, repo)
+    repo.build_name_indexes()
+    return repo
+
+
+def serve_requests(repo: MemoryRepository):
+    # Requests list pages of movies, search and complete names, and the collector runs from time to time.
+    movies = repo.get_movies()
+    for start in range(0, len(movies), 1000):
+        for movie in movies[start:start + 10]:
+            _ = movie.title, movie.genres, movie.director, movie.actors
+        repo.get_movie_ids_for_genre('action')
+        repo.get_movie_ids_for_title('guardians galaxy', match_phrase=False)
+        repo.get_name_completions('gu')
+        gc.collect()
+
+
+def run_worker(mode: str, data_path: str, repo: MemoryRepository, outfile):
+    if mode == 'separate':
+        repo = build_repository(data_path)
+    elif mode == 'preloaded, frozen':
+        prefork.restart_after_fork(None)
+    started = prefork.memory_usage()
+    serve_requests(repo)
+    outfile.write(json.dumps([started, prefork.memory_usage()]))
+    outfile.close()
+
+
+def measure(mode: str, data_path: str, workers: int):
+    if mode == 'preloaded, frozen':
+        prefork.disable_collection()
+    repo = build_repository(data_path) if mode != 'separate' else None
+    if mode == 'preloaded, frozen':
+        prefork.freeze_before_fork()
+
+    pipes = list()
+    for _ in range(workers):
+        read_end, write_end = os.pipe()
+        if os.fork() == 0:
+            os.close(read_end)
+            try:
+                run_worker(mode, data_path, repo, os.fdopen(write_end, 'w'))
+            finally:
+                os._exit(0)
+        os.close(write_end)
+        pipes.append(read_end)
+
+    reports = list()
+    for read_end in pipes:
+        with os.fdopen(read_end) as infile:
+            reports.append(json.loads(infile.read()))
+    while True:
+        try:
+            os.wait()
+        except ChildProcessError:
+            break
+
+    gc.unfreeze()
+    gc.enable()
+    return reports
+
+
+def main(size: int, workers: int):
+    if len(prefork.memory_usage()) == 0:
+        sys.exit('This benchmark reads /proc/<pid>/smaps_rollup, so needs Linux.')
+
+    with tempfile.TemporaryDirectory() as data_path:
+        write_catalogue(os.path.join(data_path, 'Data1000Movies.csv'), size)
+
+        print(f'{size} movies, {workers} workers; memory per worker in MB')
+        print(f"{'mode':>18} {'worker':>7} {'rss':>8} {'private':>8} {'rss after':>10} {'private after':>14}")
+        for mode in MODES:
+            for worker, (started, finished) in enumerate(measure(mode, data_path, workers), 1):
+                print(f"{mode:>18} {worker:>7} {started['rss'] / (1 << 20):>8.1f} "
+                      f"{started['private'] / (1 << 20):>8.1f} {finished['rss'] / (1 << 20):>10.1f} "
+                      f"{finished['private'] / (1 << 20):>14.1f}")
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_SIZE,
+         int(sys.argv[2]) if len(sys.argv) > 2 else DEFAULT_WORKERS)
@@ -0,0 +1,66 @@
+"""Benchmark serving leaderboard pages from kept orderings, against sorting every movie for each request.
+
+Run from the project directory:
+
+    python -m benchmarks.bench_leaderboard [movies ...]
+
+A page is a slice of a kept ordering, so its cost shouldn't depend on the number of movies. Changing one movie takes it
+out of, and puts it back into, each ordering, which copies the arrays once but never sorts them.
+"""
+
+import random
+import sys
+import time
+
+from A2.adapters.movie_columns import MovieColumns
+from A2.domain.model import Movie
+
+DEFAULT_SIZES = [100_000, 1_000_000]
+PAGE_SIZE = 10
+PAGES = 1000
+SORTS = 5
+UPDATES = 100
+
+
+def generate_movie(movie_id: int, rng: random.Random) -> Movie:
+    movie = Movie(f'movie {movie_id}', 2000 + rng.randrange(20), movie_id)
+    movie.rating = round(rng.uniform(1, 10), 1)
+    movie.votes = rng.randrange(1_000_000)
+    movie.revenue = f'{rng.uniform(0, 900):.2f}Millions'
+    movie.runtime_minutes = rng.randrange(60, 200)
+    return movie
+
+
+def main(sizes):
+    print(f"{'movies':>10} {'build (s)':>10} {'page (us)':>10} {'full sort (ms)':>15} {'update (ms)':>12}")
+    rng = random.Random(235)
+    for size in sizes:
+        columns = MovieColumns()
+        for movie_id in range(size):
+            columns.add(generate_movie(movie_id, rng))
+        start = time.perf_counter()
+        columns.flush()
+        build = time.perf_counter() - start
+
+        cursors = [rng.randrange(size - PAGE_SIZE) for _ in range(PAGES)]
+        start = time.perf_counter()
+        for cursor in cursors:
+            columns.leaderboard('rating', cursor, cursor + PAGE_SIZE)
+        page = (time.perf_counter() - start) / PAGES * 1_000_000
+
+        start = time.perf_counter()
+        for cursor in cursors[:SORTS]:
+            columns.ids_ordered_by('rating', descending=True)[cursor:cursor + PAGE_SIZE]
+        full_sort = (time.perf_counter() - start) / SORTS * 1000
+
+        start = time.perf_counter()
+        for _ in range(UPDATES):
+            columns.add(generate_movie(rng.randrange(size), rng))
+            columns.flush()
+        update = (time.perf_counter() - start) / UPDATES * 1000
+
+        print(f'{size:>10} {build:>10.2f} {page:>10.1f} {full_sort:>15.1f} {update:>12.2f}')
+
+
+if __name__ == '__main__':
+    main([int(size) for size in sys.argv[1:]] or DEFAULT_SIZES)
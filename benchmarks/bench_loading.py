@@ -0,0 +1,62 @@
+"""Benchmark parsing the movie CSV file in turn and in parallel chunks.
+
+Run from the project directory:
+
+    python -m benchmarks.bench_loading [size ...]
+
+For each catalogue size, a CSV file of that many rows is generated from the bundled data, then parsed into movie
+records in this process and by a process pool. The parallel time should fall with the number of cores.
+"""
+
+import csv
+import os
+import sys
+import tempfile
+import time
+
+from A2.adapters import memory_repository
+
+DATA_FILE = os.path.join('A2', 'adapters', 'data', 'Data1000Movies.csv')
+DEFAULT_SIZES = [100_000, 1_000_000]
+
+
+def write_catalogue(filename: str, size: int):
+    with open(DATA_FILE, encoding='utf-8-sig') as infile:
+        reader = csv.reader(infile)
+        header = next(reader)
+        rows = list(reader)
+
+    with open(filename, 'w', newline='', encoding='utf-8') as outfile:
+        writer = csv.writer(outfile)
+        writer.writerow(header)
+        for movie_id in range(1, size + 1):
+            row = list(rows[movie_id % len(rows)])
+            row[0] = str(movie_id)
+            row[1] = f'{row[1]} {movie_id}'
+            writer.writerow(row)
+
+
+def time_read(filename: str, parallel: bool) -> float:
+    start = time.perf_counter()
+    if parallel:
+        memory_repository.read_movie_records_in_parallel(filename, os.path.getsize(filename))
+    else:
+        [memory_repository.movie_record(data_row) for data_row in memory_repository.read_csv_file(filename)]
+    return time.perf_counter() - start
+
+
+def main(sizes):
+    print(f"{'movies':>10} {'MB':>8} {'in turn (s)':>12} {'parallel (s)':>13} {'workers':>8}")
+    with tempfile.TemporaryDirectory() as directory:
+        for size in sizes:
+            filename = os.path.join(directory, f'movies-{size}.csv')
+            write_catalogue(filename, size)
+            megabytes = os.path.getsize(filename) / (1 << 20)
+
+            in_turn = time_read(filename, parallel=False)
+            parallel = time_read(filename, parallel=True)
+            print(f'{size:>10} {megabytes:>8.1f} {in_turn:>12.3f} {parallel:>13.3f} {os.cpu_count():>8}')
+
+
+if __name__ == '__main__':
+    main([int(size) for size in sys.argv[1:]] or DEFAULT_SIZES)
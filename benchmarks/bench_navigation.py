@@ -0,0 +1,50 @@
+"""Benchmark first/last and previous/next navigation in MemoryRepository.
+
+Run from the project directory:
+
+    python -m benchmarks.bench_navigation [size ...]
+
+For each catalogue size, the mean latency of each navigation query should stay flat as the catalogue grows.
+"""
+
+import random
+import sys
+import time
+
+from A2.adapters.memory_repository import MemoryRepository
+from A2.domain.model import Movie
+
+DEFAULT_SIZES = [1_000, 10_000, 100_000, 1_000_000]
+QUERIES = 10_000
+
+
+def build_repository(size: int) -> MemoryRepository:
+    repo = MemoryRepository()
+    for movie_id in range(1, size + 1):
+        # Titles are generated in order so that building the repository doesn't dominate the benchmark.
+        repo.add_movie(Movie(f'movie {movie_id:08d}', 1950 + movie_id % 70, movie_id))
+    return repo
+
+
+def time_query(query, arguments) -> float:
+    start = time.perf_counter()
+    for argument in arguments:
+        query(argument)
+    return (time.perf_counter() - start) / len(arguments) * 1_000_000
+
+
+def main(sizes):
+    print(f"{'movies':>10} {'first (us)':>11} {'last (us)':>10} {'previous (us)':>14} {'next (us)':>10}")
+    for size in sizes:
+        repo = build_repository(size)
+        movies = [repo.get_movie(random.randint(1, size)) for _ in range(QUERIES)]
+
+        first = time_query(lambda _: repo.get_first_movie(), movies)
+        last = time_query(lambda _: repo.get_last_movie(), movies)
+        previous = time_query(repo.get_date_of_previous_movie, movies)
+        following = time_query(repo.get_date_of_next_movie, movies)
+        print(f'{size:>10} {first:>11.3f} {last:>10.3f} {previous:>14.3f} {following:>10.3f}')
+
+
+if __name__ == '__main__':
+    main([int(size) for size in sys.argv[1:]] or DEFAULT_SIZES)
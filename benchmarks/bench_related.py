@@ -0,0 +1,51 @@
+"""Benchmark finding related movies by the TF-IDF similarity of generated descriptions.
+
+Run from the project directory:
+
+    python -m benchmarks.bench_related [movies ...]
+
+Each generated description has 25 words drawn from a vocabulary of 20,000 with Zipf-like frequencies, so a few words are
+in most descriptions and most words are rare. Every movie's neighbours are found when the index is built, so looking
+them up at request time should take microseconds at any size, while building should grow about linearly, as words in
+more than a few hundred descriptions are left out.
+"""
+
+import random
+import sys
+import time
+
+import numpy as np
+
+from A2.adapters.full_text import RelatedDescriptions
+
+DEFAULT_SIZES = [10_000, 100_000]
+VOCABULARY = 20_000
+WORDS = 25
+QUERIES = 10_000
+
+
+def generate_entries(movies: int):
+    rng = np.random.default_rng(235)
+    words = np.minimum(rng.zipf(1.3, (movies, WORDS)), VOCABULARY)
+    return [(movie_id, ' '.join(f'w{word}' for word in row)) for movie_id, row in enumerate(words.tolist())]
+
+
+def main(sizes):
+    print(f"{'movies':>10} {'build (s)':>10} {'per movie (us)':>15} {'lookup (us)':>12} {'related':>8}")
+    for size in sizes:
+        entries = generate_entries(size)
+        start = time.perf_counter()
+        related = RelatedDescriptions(entries)
+        build = time.perf_counter() - start
+
+        movie_ids = [random.randrange(size) for _ in range(QUERIES)]
+        start = time.perf_counter()
+        found = sum(len(related.related(movie_id)) for movie_id in movie_ids)
+        lookup = (time.perf_counter() - start) / QUERIES * 1_000_000
+
+        print(f'{size:>10} {build:>10.2f} {build / size * 1_000_000:>15.1f} {lookup:>12.1f} '
+              f'{found / QUERIES:>8.2f}')
+
+
+if __name__ == '__main__':
+    main([int(size) for size in sys.argv[1:]] or DEFAULT_SIZES)
@@ -0,0 +1,71 @@
+"""Benchmark "more like this" queries against a MinHash index of generated movies.
+
+Run from the project directory:
+
+    python -m benchmarks.bench_similarity [movies ...]
+
+Each generated movie has up to three genres, four actors and a director. Queries only score the movies sharing a band
+with the queried movie, so they should stay far below a scan of every movie, which is timed on a sample for comparison.
+Quality is the total Jaccard similarity of the 5 movies the index returns, as a share of that of the exact top 5.
+Many generated movies tie on shared genres alone, so this is fairer than counting the exact top 5 the index found.
+"""
+
+import random
+import sys
+import time
+
+from A2.adapters.similarity import SimilarityIndex
+
+DEFAULT_SIZES = [10_000, 100_000]
+GENRES = 20
+QUERIES = 200
+SCANS = 10
+QUANTITY = 5
+
+
+def generate_entries(movies: int):
+    actors = movies // 2
+    directors = movies // 10
+    rng = random.Random(235)
+    return [(movie_id, [f'genre:{rng.randrange(GENRES)}' for _ in range(rng.randint(1, 3))] +
+             [f'actor:{rng.randrange(actors)}' for _ in range(4)] + [f'director:{rng.randrange(directors)}'])
+            for movie_id in range(movies)]
+
+
+def jaccard(first, second):
+    first, second = set(first), set(second)
+    return len(first & second) / len(first | second)
+
+
+def scan(entries, movie_id: int):
+    # The similarities of the exact top movies, comparing with every movie.
+    scores = [jaccard(entries[movie_id][1], other) for other_id, other in entries if other_id != movie_id]
+    return sorted(scores, reverse=True)[:QUANTITY]
+
+
+def main(sizes):
+    print(f"{'movies':>10} {'build (s)':>10} {'query (ms)':>11} {'scan (ms)':>10} {'quality':>8}")
+    for size in sizes:
+        entries = generate_entries(size)
+        start = time.perf_counter()
+        index = SimilarityIndex(entries)
+        build = time.perf_counter() - start
+
+        movie_ids = [random.randrange(size) for _ in range(QUERIES)]
+        start = time.perf_counter()
+        results = {movie_id: [similar_id for similar_id, _ in index.similar(movie_id, QUANTITY)]
+                   for movie_id in movie_ids}
+        query = (time.perf_counter() - start) / QUERIES * 1000
+
+        start = time.perf_counter()
+        exact = {movie_id: scan(entries, movie_id) for movie_id in movie_ids[:SCANS]}
+        scanned = (time.perf_counter() - start) / SCANS * 1000
+
+        found = sum(jaccard(entries[movie_id][1], entries[similar_id][1])
+                    for movie_id in exact for similar_id in results[movie_id])
+        quality = found / max(sum(map(sum, exact.values())), 1e-9)
+        print(f'{size:>10} {build:>10.2f} {query:>11.2f} {scanned:>10.1f} {quality:>8.2f}')
+
+
+if __name__ == '__main__':
+    main([int(size) for size in sys.argv[1:]] or DEFAULT_SIZES)
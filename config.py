@@ -14,3 +14,29 @@ class Config:
     FLASK_ENV = environ.get('FLASK_ENV')
 
     SECRET_KEY = environ.get('SECRET_KEY')
+
+    # Repository configuration: 'memory' keeps everything in RAM, 'sqlite' stores it in SQLITE_DATABASE_PATH.
+    REPOSITORY = environ.get('REPOSITORY', 'memory')
+    SQLITE_DATABASE_PATH = environ.get('SQLITE_DATABASE_PATH', 'movies.db')
+
+    # File holding a snapshot of the populated memory repository, which later starts load instead of the data files.
+    SNAPSHOT_PATH = environ.get('SNAPSHOT_PATH') or None
+
+    # werkzeug hash method for the passwords in users.csv, e.g. 'pbkdf2:sha256:1000'; empty for werkzeug's default.
+    # Tests use a cheap method, as the seed passwords are hashed whenever the repository is populated.
+    PASSWORD_HASH_METHOD = environ.get('PASSWORD_HASH_METHOD') or None
+
+    # Whether request threads share the memory repository through copy-on-write versions, reading without locks.
+    THREAD_SAFE_REPOSITORY = environ.get('THREAD_SAFE_REPOSITORY', 'False') == 'True'
+
+    # Whether to apply edits to the memory repository's data files while the application runs, checking every
+    # WATCH_INTERVAL seconds.
+    WATCH_DATA = environ.get('WATCH_DATA', 'False') == 'True'
+    WATCH_INTERVAL = float(environ.get('WATCH_INTERVAL') or 2.0)
+
+    # File recording the Users and Comments added to the memory repository, so they survive a restart. Records are
+    # synced in batches of JOURNAL_SYNC_BATCH, and folded into users.csv and comments.csv at a start where the journal
+    # has reached JOURNAL_COMPACT_BYTES.
+    JOURNAL_PATH = environ.get('JOURNAL_PATH') or None
+    JOURNAL_SYNC_BATCH = int(environ.get('JOURNAL_SYNC_BATCH') or 1)
+    JOURNAL_COMPACT_BYTES = int(environ.get('JOURNAL_COMPACT_BYTES') or 1 << 20)
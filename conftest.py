@@ -3,25 +3,40 @@ import os
 import pytest
 from A2 import create_app
 from A2.adapters import memory_repository
+from A2.adapters.database_repository import SqliteRepository
 from A2.adapters.memory_repository import MemoryRepository
 
 TEST_DATA_PATH = os.path.join("Macintosh HD",os.sep ,"Users", "alina", "Desktop", "COMPSCI-235 2", "data")
 #TEST_DATA_PATH = os.path.join('C:', os.sep, 'Users', 'iwar006', 'Documents', 'Python dev', 'COVID-19', 'tests', 'data')
 
+# Hashing the seed passwords at full strength would dominate the time taken to build each fixture.
+TEST_PASSWORD_METHOD = 'pbkdf2:sha256:1000'
+
 print(os.sep)
 @pytest.fixture
 def in_memory_repo():
     repo = MemoryRepository()
-    memory_repository.populate(TEST_DATA_PATH, repo)
+    memory_repository.populate(TEST_DATA_PATH, repo, password_method=TEST_PASSWORD_METHOD)
     return repo
 
 
+@pytest.fixture
+def sqlite_repo(tmp_path):
+    repo = SqliteRepository(str(tmp_path / 'movies.db'))
+    memory_repository.populate(TEST_DATA_PATH, repo, password_method=TEST_PASSWORD_METHOD)
+    yield repo
+    repo.close()
+
+
 @pytest.fixture
 def client():
     my_app = create_app({
         'TESTING': True,                                # Set to True during testing.
         'TEST_DATA_PATH': TEST_DATA_PATH,               # Path for loading test data into the repository.
-        'WTF_CSRF_ENABLED': False                       # test_client will not send a CSRF token, so disable validation.
+        'WTF_CSRF_ENABLED': False,                      # test_client will not send a CSRF token, so disable validation.
+        'SNAPSHOT_PATH': None,                          # Always load the test data, rather than a snapshot.
+        'JOURNAL_PATH': None,                           # Don't record the test users and comments.
+        'PASSWORD_HASH_METHOD': TEST_PASSWORD_METHOD    # Hash the test users' passwords cheaply.
     })
 
     return my_app.test_client()
@@ -124,6 +124,11 @@ def test_movies_with_date(client):
     assert b'2014' in response.data
     assert b'A group of intergalactic criminals are forced to work together to stop a fanatical warrior from taking control of the universe.' in response.data
 
+    # Check that movies link to the movies most like them.
+    assert b'More like this' in response.data
+    assert b'<a href="/movies_by_title?title=rogue+one">rogue one (2016)</a>' in response.data
+    assert b'Related by description' in response.data
+
 
 def test_movies_with_comment(client):
     # Check that we can retrieve the movies page.
@@ -145,3 +150,106 @@ def test_movies_with_genre(client):
     assert b'guardians of the galaxy' in response.data
     assert b'A group of intergalactic criminals are forced to work together to stop a fanatical warrior from taking control of the universe.' in response.data
 
+
+
+def test_leaderboard(client):
+    response = client.get('/leaderboard?attribute=votes&cursor=3')
+    assert response.status_code == 200
+
+    # Check that the page holds the fourth to sixth most voted movies, and links to the other leaderboards.
+    assert b'Most voted movies' in response.data
+    assert b'<h2>arrival</h2>' in response.data
+    assert b'<h2>rogue one</h2>' in response.data
+    assert b'<h2>la la land</h2>' in response.data
+    assert b'/leaderboard?attribute=rating' in response.data
+    assert b'/leaderboard?attribute=votes&amp;cursor=6' in response.data
+
+    assert client.get('/leaderboard?attribute=title').status_code == 404
+
+
+def test_movies_with_facets(client):
+    # Check that we can retrieve the movies page for a combination of facets.
+    response = client.get('/movies_by_facets?genre=action&year_from=2014&min_rating=7')
+    assert response.status_code == 200
+
+    # Check that only the matching movies are included, with links to narrow the results further.
+    assert b'3 matching movies' in response.data
+    assert b'guardians of the galaxy' in response.data
+    assert b'Adventure (3)' in response.data
+
+
+def test_movies_with_facets_without_matches(client):
+    response = client.get('/movies_by_facets?genre=horror&actor=chris')
+    assert response.status_code == 200
+
+    assert b'no movies match' in response.data
+
+
+def test_autocomplete(client):
+    response = client.get('/autocomplete?q=chr&k=1')
+    assert response.status_code == 200
+
+    assert response.get_json() == [
+        {'name': 'chris pratt', 'kind': 'actor', 'url': '/movies_by_actor?actor=chris+pratt'}
+    ]
+
+
+def test_collaborators(client):
+    response = client.get('/collaborators?name=Chris+Pratt&k=2')
+    assert response.status_code == 200
+
+    assert response.get_json() == [
+        {'name': 'bradley cooper', 'kind': 'actor', 'count': 1, 'url': '/movies_by_actor?actor=bradley+cooper'},
+        {'name': 'james gunn', 'kind': 'director', 'count': 1, 'url': '/movies_by_director?director=james+gunn'}
+    ]
+
+
+def test_separation(client):
+    response = client.get('/separation?from=vin+diesel&to=michael+sheen')
+    assert response.status_code == 200
+
+    result = response.get_json()
+    assert result['degrees'] == 2
+    assert [person['name'] for person in result['path']] == ['vin diesel', 'chris pratt', 'michael sheen']
+
+    response = client.get('/separation?from=vin+diesel&to=matt+damon')
+    assert response.get_json() == {'degrees': None, 'path': []}
+
+
+def test_search_resolves_misspelt_keyword(client):
+    response = client.get('/search?keyword=galxy')
+    assert response.status_code == 200
+
+    assert b'guardians of the galaxy' in response.data
+
+
+def test_search_resolves_misspelt_name_before_descriptions(client):
+    response = client.get('/search?keyword=chris+prat')
+    assert response.status_code == 200
+
+    assert b'Search result for &#34;Actor: chris pratt&#34;' in response.data
+    assert b'Description:' not in response.data
+
+
+def test_search_suggests_names_for_ambiguous_keyword(client):
+    response = client.get('/search?keyword=jams')
+    assert response.status_code == 200
+
+    assert b"Sorry, Can&#39;t find a matched jams" in response.data
+    assert b'Did you mean' in response.data
+    assert b'james gunn' in response.data
+
+
+def test_movies_with_description(client):
+    response = client.get('/movies_by_description?query=intergalactic+criminals')
+    assert response.status_code == 200
+
+    assert b'Movies about intergalactic criminals' in response.data
+    assert b'guardians of the galaxy' in response.data
+
+
+def test_search_matches_description(client):
+    response = client.get('/search?keyword=intergalactic')
+    assert response.status_code == 200
+
+    assert b'Search result for &#34;Description: intergalactic&#34;' in response.data
@@ -0,0 +1,40 @@
+"""gunicorn settings that build the application once and share it with every worker.
+
+Run from the project directory:
+
+    gunicorn wsgi:app
+
+The master imports wsgi.py, populating the repository, then forks the workers, which read its catalogue rather than
+each building their own. Each worker logs its memory use when it starts and when it exits.
+"""
+
+import os
+
+from A2 import prefork
+
+bind = os.environ.get('BIND', '127.0.0.1:5000')
+workers = int(os.environ.get('WEB_CONCURRENCY') or os.cpu_count() or 1)
+threads = int(os.environ.get('THREADS') or 1)
+
+# Load wsgi:app in the master, before forking, rather than in each worker.
+preload_app = True
+
+# Leave the collector off from the start, so that loading doesn't free objects part way through, and leave threads such
+# as the data watcher to the workers.
+prefork.disable_collection()
+prefork.defer_threads()
+
+
+def when_ready(server):
+    prefork.close_connections()
+    prefork.freeze_before_fork()
+    server.log.info('Master ready: %s', prefork.format_memory_usage(prefork.memory_usage()))
+
+
+def post_fork(server, worker):
+    prefork.restart_after_fork(server.app.wsgi())
+    server.log.info('Worker %s started: %s', worker.pid, prefork.format_memory_usage(prefork.memory_usage()))
+
+
+def worker_exit(server, worker):
+    server.log.info('Worker %s exiting: %s', worker.pid, prefork.format_memory_usage(prefork.memory_usage()))
@@ -0,0 +1,25 @@
+from A2.adapters.collaboration_graph import CollaborationGraph
+
+
+def person(number: int):
+    return f'actor {number}', 'actor'
+
+
+def test_graph_finds_shortest_path_along_a_chain():
+    # Movies linking actors 0-1, 1-2, ..., 8-9, and a shortcut from 2 to 7.
+    credits = [[person(number), person(number + 1)] for number in range(9)] + [[person(2), person(7)]]
+    graph = CollaborationGraph(credits)
+
+    assert graph.edge_count() == 10
+    assert graph.shortest_path(person(0), person(9)) == [person(0), person(1), person(2), person(7), person(8),
+                                                          person(9)]
+    assert graph.shortest_path(person(9), person(0)) == [person(9), person(8), person(7), person(2), person(1),
+                                                          person(0)]
+
+
+def test_graph_weights_collaborations_by_shared_movies():
+    graph = CollaborationGraph([[person(1), person(2), person(3)], [person(1), person(3)], [person(1), person(3)],
+                                [person(1), person(2)], [person(1), person(4)]])
+
+    assert graph.top_collaborators(person(1)) == [(*person(3), 3), (*person(2), 2), (*person(4), 1)]
+    assert graph.top_collaborators(person(1), 1) == [(*person(3), 3)]
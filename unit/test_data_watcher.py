@@ -0,0 +1,157 @@
+import csv
+import os
+import shutil
+
+import conftest
+import pytest
+from A2 import create_app
+from A2.adapters import memory_repository, repository
+from A2.adapters.data_watcher import DataWatcher
+from A2.adapters.memory_repository import MemoryRepository
+from A2.adapters.versioned_repository import VersionedRepository
+from A2.domain.model import Actor, Genre
+
+
+@pytest.fixture
+def data_path(tmp_path):
+    # A copy of the test data, which the tests can edit.
+    path = tmp_path / 'data'
+    shutil.copytree(conftest.TEST_DATA_PATH, path)
+    return str(path)
+
+
+@pytest.fixture
+def repo(data_path):
+    repo = MemoryRepository()
+    memory_repository.populate(data_path, repo, password_method=conftest.TEST_PASSWORD_METHOD)
+    return repo
+
+
+@pytest.fixture
+def watcher(data_path, repo):
+    return DataWatcher(data_path, repo, password_method=conftest.TEST_PASSWORD_METHOD)
+
+
+def edit_csv(data_path: str, filename: str, edit):
+    path = os.path.join(data_path, filename)
+    with open(path, encoding='utf-8-sig', newline='') as infile:
+        rows = list(csv.reader(infile))
+    rows = [rows[0]] + edit(rows[1:])
+    with open(path, 'w', encoding='utf-8', newline='') as outfile:
+        csv.writer(outfile).writerows(rows)
+
+    # Make sure the change is seen even if the modification time doesn't move on.
+    os.utime(path, ns=(os.stat(path).st_atime_ns, os.stat(path).st_mtime_ns + 1))
+
+
+def test_watcher_ignores_unchanged_files(watcher):
+    assert watcher.check() == {}
+
+
+def test_watcher_applies_only_changed_movie_rows(data_path, repo, watcher):
+    movie = repo.get_movie(2)
+    comments = list(movie.comments)
+
+    def edit(rows):
+        rows[1][1] = 'Prometheus Returns'
+        rows[1][6] = '2017'
+        rows[1][8] = '9.9'
+        rows[1][2] = 'Adventure,Mystery,Western'
+        return rows
+
+    edit_csv(data_path, 'Data1000Movies.csv', edit)
+
+    assert watcher.check() == {'Data1000Movies.csv': {'added': 0, 'changed': 1, 'removed': 0}}
+    assert repo.get_movie(2) is movie
+    assert movie.comments == comments
+    assert movie.title == 'prometheus returns'
+    assert movie.hyperlink.startswith('https://www.google.com/search?q=prometheus returns&')
+    assert repo.get_movie_ids_for_title('prometheus returns') == [2]
+    assert repo.get_movie_ids_for_title('prometheus', match_phrase=False) == [2]
+    assert 2 in repo.get_movie_ids_for_date('2017')
+    assert 2 not in repo.get_movie_ids_for_date('2012')
+    assert 2 in repo.get_movie_ids_for_attribute_range('rating', 9.5)
+    assert Genre('western') in movie.genres and Genre('sci-fi') not in movie.genres
+    assert 2 not in repo.get_movie_ids_for_genre('sci-fi')
+    assert repo.get_movie_ids_for_genre('western') == [2]
+    assert ('prometheus returns', 'title') in repo.get_name_completions('prometheus')
+
+
+def test_watcher_adds_and_removes_movies(data_path, repo, watcher):
+    def edit(rows):
+        added = list(rows[0])
+        added[:6] = ['21', 'Walrus Bay', 'Drama', 'A lighthouse keeper befriends a walrus.', 'Jane Doe', 'Ann Lee']
+        return [row for row in rows if row[0] != '1'] + [added]
+
+    edit_csv(data_path, 'Data1000Movies.csv', edit)
+
+    assert watcher.check() == {'Data1000Movies.csv': {'added': 1, 'changed': 0, 'removed': 1}}
+    assert repo.get_movie(1) is None
+    assert repo.get_number_of_movies() == 20
+    assert repo.get_first_movie().id == 2
+    assert repo.get_last_movie().id == 21
+    assert 1 not in repo.get_movie_ids_for_actor('chris pratt')
+    assert all(comment.movie.id != 1 for comment in repo.get_comments())
+    assert 1 not in repo.get_movie_ids_for_attribute_range('rating')
+    assert repo.get_movie_ids_for_description('intergalactic') == []
+    assert repo.get_movie_ids_for_description('walrus') == [21]
+    assert repo.get_movie_ids_for_actor('ann lee') == [21]
+    assert Actor('ann lee') in repo.get_actors()
+
+
+def test_watcher_applies_changed_user_rows(data_path, repo, watcher):
+    def edit(rows):
+        return [['3', 'dave', 'Dave1234'], ['2', 'fmercury', 'NewPassword1']]
+
+    edit_csv(data_path, 'users.csv', edit)
+
+    assert watcher.check() == {'users.csv': {'added': 1, 'changed': 1, 'removed': 1}}
+    assert repo.get_user('thorke') is None
+    assert repo.get_user('dave') is not None
+    assert repo.get_user('fmercury', ignore_case=True).password.startswith('pbkdf2:sha256:1000$')
+    assert len(repo.get_users()) == 2
+
+
+def test_watcher_retries_a_file_it_cannot_read(data_path, repo, watcher):
+    edit_csv(data_path, 'Data1000Movies.csv', lambda rows: rows + [['22', 'Half written']])
+
+    assert watcher.check() == {}
+    assert repo.get_number_of_movies() == 20
+
+    edit_csv(data_path, 'Data1000Movies.csv', lambda rows: rows[:-1])
+
+    assert watcher.check() == {'Data1000Movies.csv': {'added': 0, 'changed': 0, 'removed': 0}}
+
+
+def test_watcher_only_changes_a_movie_with_an_early_year_once(data_path, repo, watcher):
+    def edit(rows):
+        rows[1][6] = '1850'
+        rows[1][8] = '9.9'
+        return rows
+
+    edit_csv(data_path, 'Data1000Movies.csv', edit)
+    assert watcher.check() == {'Data1000Movies.csv': {'added': 0, 'changed': 1, 'removed': 0}}
+    assert repo.get_movie(2).date == 2012
+
+    # Years before 1900 aren't kept, so the row now matches the Movie.
+    edit_csv(data_path, 'Data1000Movies.csv', lambda rows: rows)
+    assert watcher.check() == {'Data1000Movies.csv': {'added': 0, 'changed': 0, 'removed': 0}}
+
+
+def test_watched_data_is_read_through_versions(data_path):
+    app = create_app({
+        'TESTING': True,
+        'TEST_DATA_PATH': data_path,
+        'PASSWORD_HASH_METHOD': conftest.TEST_PASSWORD_METHOD,
+        'SNAPSHOT_PATH': None,
+        'JOURNAL_PATH': None,
+        'THREAD_SAFE_REPOSITORY': False,
+        'WATCH_DATA': True,
+        'WATCH_INTERVAL': 60
+    })
+
+    try:
+        assert isinstance(repository.repo_instance, VersionedRepository)
+        assert app.data_watcher._repo is repository.repo_instance
+    finally:
+        app.data_watcher.stop()
@@ -0,0 +1,68 @@
+import gc
+import threading
+
+import pytest
+from A2.adapters.database_repository import SqliteRepository
+from A2.domain.model import *
+
+# Run every repository test against SqliteRepository as well.
+from test_memory_repository import *
+
+
+@pytest.fixture
+def in_memory_repo(sqlite_repo):
+    return sqlite_repo
+
+
+def test_repository_keeps_data_after_reopening(sqlite_repo, tmp_path):
+    user = User('dave', '123456789')
+    sqlite_repo.add_user(user)
+    movie = sqlite_repo.get_movie(2)
+    sqlite_repo.add_comment(make_comment('Still here.', user, movie, datetime(2020, 9, 1, 12, 0)))
+
+    reopened = SqliteRepository(str(tmp_path / 'movies.db'))
+
+    assert reopened.get_number_of_movies() == 20
+    assert reopened.get_user('dave') == user
+    assert [comment.comment for comment in reopened.get_movie(2).comments] == ['Still here.']
+    assert Genre('action') in reopened.get_movie(1).genres
+    reopened.close()
+
+
+def test_repository_returns_the_same_movie_while_it_is_in_use(sqlite_repo):
+    movie = sqlite_repo.get_movie(5)
+
+    assert sqlite_repo.get_movie(5) is movie
+    assert sqlite_repo.get_movies_by_id([4, 5])[1] is movie
+
+
+def test_repository_loads_movie_associations(sqlite_repo):
+    movie = sqlite_repo.get_movie(1)
+
+    assert movie.director == Director('james gunn')
+    assert movie.actors[0] == Actor('chris pratt')
+    assert movie.revenue == '333.13Millions'
+
+
+def test_repository_serves_queries_from_other_threads(sqlite_repo):
+    results = list()
+
+    def query():
+        results.append(sqlite_repo.get_movie_ids_for_actor('chris pratt'))
+
+    thread = threading.Thread(target=query)
+    thread.start()
+    thread.join()
+
+    assert results == [[1, 10]]
+
+
+def test_repository_closes_the_connection_of_a_finished_thread(sqlite_repo):
+    connections = len(sqlite_repo._connections)
+
+    thread = threading.Thread(target=sqlite_repo.get_number_of_movies)
+    thread.start()
+    thread.join()
+    gc.collect()
+
+    assert len(sqlite_repo._connections) == connections
@@ -45,6 +45,32 @@ def test_movie_construction(movie):
         movie) == '<Movie test movie, 1997>'
 
 
+def test_movie_title_and_date_can_change(movie):
+    movie.title = 'retitled movie'
+    movie.date = 1998
+    movie.date = 1850
+
+    assert movie.date == 1998
+    assert movie.hyperlink.startswith('https://www.google.com/search?q=retitled movie&')
+
+
+def test_domain_objects_have_no_attribute_dictionary(movie, user, genre):
+    for obj in (movie, user, genre, Actor('chris pratt'), Director('james gunn'),
+                Comment(user, movie, 'great', datetime(2020, 1, 1))):
+        assert not hasattr(obj, '__dict__')
+
+    with pytest.raises(AttributeError):
+        movie.tagline = 'a movie'
+
+
+def test_names_are_interned():
+    # Names built at runtime are distinct strings until interned.
+    name = ''.join(['chris ', 'pratt'])
+    assert Actor(name).actor_full_name is Actor('chris pratt').actor_full_name
+    assert Director(''.join(['james ', 'gunn'])).director_full_name is Director('james gunn').director_full_name
+    assert Genre(''.join(['sci-', 'fi'])).genre_name is Genre('sci-fi').genre_name
+
+
 def test_movie_less_than_operator():
     movie_1 = Movie(
         'abcd', 2010, None
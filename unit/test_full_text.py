@@ -0,0 +1,40 @@
+from A2.adapters.full_text import DescriptionIndex, RelatedDescriptions
+
+
+def test_related_descriptions_rank_movies_by_shared_terms():
+    related = RelatedDescriptions([(1, 'A space pirate crew steals a galaxy orb.'),
+                                   (2, 'The galaxy pirate crew returns.'),
+                                   (3, 'A quiet drama about a family farm.'),
+                                   (4, 'A farm family drama in winter.'),
+                                   (5, 'A pirate drama.'),
+                                   (6, None)])
+
+    # Pirate and drama appear in half of the descriptions, too many to relate Movies.
+    assert [movie_id for movie_id, _ in related.related(1)] == [2]
+    assert [movie_id for movie_id, _ in related.related(3)] == [4]
+    assert related.related(5) == []
+    assert related.related(6) == []
+    assert related.related(7) == []
+
+
+def test_related_descriptions_keep_the_given_quantity():
+    descriptions = ['heist thriller', 'heist', 'thriller'] + [f'filler{number}' for number in range(7)]
+    related = RelatedDescriptions(enumerate(descriptions, start=1), quantity=1)
+
+    assert [movie_id for movie_id, _ in related.related(1, 5)] == [2]
+
+
+def test_description_index_drops_the_postings_of_removed_movies():
+    index = DescriptionIndex()
+    for movie_id in range(1, 9):
+        index.add(movie_id, f'A walrus story, part {movie_id}.')
+    index.add(9, 'A lighthouse keeper.')
+    for movie_id in range(1, 5):
+        index.remove(movie_id)
+
+    assert len(index) == 5
+    assert len(index._removed) <= 0.25 * len(index)
+    assert [movie_id for movie_id, _ in index.search('walrus')] == [5, 6, 7, 8]
+    assert [movie_id for movie_id, _ in index.search('lighthouse')] == [9]
+    assert index.search('2') == []
+    assert '2' not in index._postings
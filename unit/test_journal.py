@@ -0,0 +1,140 @@
+import os
+import shutil
+from datetime import datetime
+
+import conftest
+import pytest
+from A2.adapters import memory_repository
+from A2.adapters.journal import Journal, compact_journal, read_records, replay_journal
+from A2.adapters.memory_repository import MemoryRepository
+from A2.domain.model import User, make_comment
+
+
+@pytest.fixture
+def data_path(tmp_path):
+    # A copy of the test data, which compaction can change.
+    path = tmp_path / 'data'
+    shutil.copytree(conftest.TEST_DATA_PATH, path)
+    return str(path)
+
+
+@pytest.fixture
+def journal_path(tmp_path):
+    return str(tmp_path / 'repository.journal')
+
+
+def populated_repo(data_path: str, journal_path: str) -> MemoryRepository:
+    # A repository populated and replayed as at startup.
+    repo = MemoryRepository()
+    memory_repository.populate(data_path, repo, password_method=conftest.TEST_PASSWORD_METHOD)
+    replay_journal(journal_path, repo)
+    return repo
+
+
+def add_user_and_comment(repo: MemoryRepository):
+    user = User('dave', 'pbkdf2:sha256:1000$salt$hash')
+    repo.add_user(user)
+    comment = make_comment('Better than the book.', user, repo.get_movie(3), datetime(2020, 3, 15, 10, 30, 5, 125))
+    repo.add_comment(comment)
+
+
+def test_journal_keeps_users_and_comments_across_restarts(data_path, journal_path):
+    repo = populated_repo(data_path, journal_path)
+    journal = Journal(journal_path)
+    repo.attach_journal(journal)
+    add_user_and_comment(repo)
+    journal.close()
+
+    repo = populated_repo(data_path, journal_path)
+    user = repo.get_user('dave')
+    assert user.password == 'pbkdf2:sha256:1000$salt$hash'
+    assert [(comment.comment, comment.timestamp) for comment in repo.get_movie(3).comments] == \
+           [('Better than the book.', datetime(2020, 3, 15, 10, 30, 5, 125))]
+    assert len(list(user.comments)) == 1
+
+
+def test_journal_ignores_users_read_from_the_data_files(data_path, journal_path):
+    repo = populated_repo(data_path, journal_path)
+    journal = Journal(journal_path)
+    repo.attach_journal(journal)
+    repo.add_user(User('erin', 'hash'), journaled=False)
+    journal.close()
+
+    assert read_records(journal_path) == ([], 0)
+
+
+def test_journal_syncs_records_in_batches(journal_path):
+    journal = Journal(journal_path, sync_batch=3)
+    journal.append_user(User('dave', 'hash1'))
+    journal.append_user(User('erin', 'hash2'))
+    assert os.path.getsize(journal_path) == 0
+
+    journal.append_user(User('fred', 'hash3'))
+    records, end = read_records(journal_path)
+    assert records == [['user', 'dave', 'hash1'], ['user', 'erin', 'hash2'], ['user', 'fred', 'hash3']]
+    assert end == os.path.getsize(journal_path)
+
+    journal.append_user(User('gina', 'hash4'))
+    journal.close()
+    assert len(read_records(journal_path)[0]) == 4
+
+
+def test_journal_drops_a_torn_record(journal_path):
+    journal = Journal(journal_path)
+    journal.append_user(User('dave', 'hash1'))
+    journal.append_user(User('erin', 'hash2'))
+    journal.close()
+
+    # Cut the last record short, as a crash part way through writing it would.
+    with open(journal_path, 'r+b') as journal_file:
+        journal_file.truncate(os.path.getsize(journal_path) - 3)
+    assert read_records(journal_path)[0] == [['user', 'dave', 'hash1']]
+
+    journal = Journal(journal_path)
+    journal.append_user(User('fred', 'hash3'))
+    journal.close()
+    assert read_records(journal_path)[0] == [['user', 'dave', 'hash1'], ['user', 'fred', 'hash3']]
+
+
+def test_replaying_a_journal_twice_adds_nothing_more(data_path, journal_path):
+    repo = populated_repo(data_path, journal_path)
+    journal = Journal(journal_path)
+    repo.attach_journal(journal)
+    add_user_and_comment(repo)
+    journal.close()
+
+    repo = populated_repo(data_path, journal_path)
+    assert replay_journal(journal_path, repo) == {'users': 0, 'comments': 0}
+    assert len(repo.get_users()) == 3
+    assert len(repo.get_movie(3).comments) == 1
+
+
+def test_compaction_moves_the_journal_into_the_data_files(data_path, journal_path):
+    repo = populated_repo(data_path, journal_path)
+    journal = Journal(journal_path)
+    repo.attach_journal(journal)
+    add_user_and_comment(repo)
+
+    compact_journal(data_path, repo, journal)
+    assert journal.size() == 0
+    journal.close()
+
+    repo = populated_repo(data_path, journal_path)
+    assert repo.get_user('dave').password == 'pbkdf2:sha256:1000$salt$hash'
+    assert repo.get_user('thorke') is not None
+    assert [comment.comment for comment in repo.get_movie(3).comments] == ['Better than the book.']
+    assert len(repo.get_comments()) == 3
+
+
+def test_compaction_skips_comments_by_users_not_in_the_repository(data_path, journal_path):
+    repo = populated_repo(data_path, journal_path)
+    journal = Journal(journal_path)
+    stranger = User('stranger', 'pbkdf2:sha256:1000$salt$hash')
+    repo.add_comment(make_comment('Who wrote this?', stranger, repo.get_movie(3), datetime(2020, 3, 16)))
+
+    compact_journal(data_path, repo, journal)
+    journal.close()
+
+    repo = populated_repo(data_path, journal_path)
+    assert repo.get_movie(3).comments == []
+    assert len(repo.get_comments()) == 2
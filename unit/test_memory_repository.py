@@ -1,9 +1,14 @@
+import os
 from datetime import date, datetime
 from typing import List
 
+import conftest
 import pytest
+from A2.adapters import memory_repository
+from A2.adapters.memory_repository import PARALLEL_HASH_MINIMUM, hash_passwords, load_users
 from A2.adapters.repository import RepositoryException
 from A2.domain.model import *
+from werkzeug.security import check_password_hash, generate_password_hash
 
 
 def test_repository_can_add_a_user(in_memory_repo):
@@ -23,6 +28,18 @@ def test_repository_does_not_retrieve_a_non_existent_user(in_memory_repo):
     assert user is None
 
 
+def test_repository_can_retrieve_a_user_ignoring_case(in_memory_repo):
+    assert in_memory_repo.get_user('FMercury') is None
+    assert in_memory_repo.get_user('FMercury', ignore_case=True) is in_memory_repo.get_user('fmercury')
+
+
+def test_repository_reports_username_availability(in_memory_repo):
+    assert not in_memory_repo.is_username_available('thorke')
+    assert in_memory_repo.is_username_available('Thorke')
+    assert not in_memory_repo.is_username_available('Thorke', ignore_case=True)
+    assert in_memory_repo.is_username_available('prince')
+
+
 def test_repository_can_retrieve_movie_count(in_memory_repo):
     number_of_movies = in_memory_repo.get_number_of_movies()
 
@@ -41,6 +58,18 @@ def test_repository_can_add_movie(in_memory_repo):
     assert in_memory_repo.get_movie(1001) is movie
 
 
+def test_repository_can_add_movies_in_bulk(in_memory_repo):
+    movies = [Movie('zulu', 1997, 1002), Movie('aardvark', 1997, 1001)]
+    in_memory_repo.add_movies(movies)
+
+    assert in_memory_repo.get_number_of_movies() == 22
+    assert in_memory_repo.get_movies()[0] is movies[1]
+    assert in_memory_repo.get_movies()[-1] is movies[0]
+    assert in_memory_repo.get_last_movie() is movies[0]
+    assert in_memory_repo.get_movie_ids_for_date('1997') == [1001, 1002]
+    assert in_memory_repo.get_movie_ids_for_title('aardvark') == [1001]
+
+
 def test_repository_can_retrieve_movie(in_memory_repo):
     movie = in_memory_repo.get_movie(1)
 
@@ -151,9 +180,9 @@ def test_repository_returns_date_of_previous_movie(in_memory_repo):
 
 
 def test_repository_returns_none_when_there_are_no_previous_movies(in_memory_repo):
-    movie = in_memory_repo.get_movies()[0]
+    # Prometheus is the only movie released in 2012, the earliest year.
+    movie = in_memory_repo.get_movie(2)
     previous_date = in_memory_repo.get_date_of_previous_movie(movie)
-    print(previous_date)
 
     assert previous_date is None
 
@@ -166,12 +195,28 @@ def test_repository_returns_date_of_next_movie(in_memory_repo):
 
 
 def test_repository_returns_none_when_there_are_no_subsequent_movies(in_memory_repo):
-    movie = in_memory_repo.get_movies()[19]
+    # Arrival has the highest id of the movies released in 2016, the latest year.
+    movie = in_memory_repo.get_movie(20)
     next_date = in_memory_repo.get_date_of_next_movie(movie)
 
     assert next_date is None
 
 
+def test_repository_returns_dates_of_neighbouring_years(in_memory_repo):
+    # Guardians of the Galaxy is the only movie released in 2014.
+    movie = in_memory_repo.get_movie(1)
+
+    assert in_memory_repo.get_date_of_previous_movie(movie) == 2012
+    assert in_memory_repo.get_date_of_next_movie(movie) == 2016
+
+
+def test_repository_returns_none_for_neighbours_of_a_movie_not_in_the_repository(in_memory_repo):
+    movie = Movie('test movie', 1997, 1001)
+
+    assert in_memory_repo.get_date_of_previous_movie(movie) is None
+    assert in_memory_repo.get_date_of_next_movie(movie) is None
+
+
 def test_repository_can_add_a_genre(in_memory_repo):
     genre = Genre('Motoring')
     in_memory_repo.add_genre(genre)
@@ -213,4 +258,342 @@ def test_repository_can_retrieve_comments(in_memory_repo):
     assert len(in_memory_repo.get_comments()) == 2
 
 
+def test_repository_returns_movie_ids_for_actor_full_name(in_memory_repo):
+    movie_ids = in_memory_repo.get_movie_ids_for_actor('chris pratt')
+
+    assert movie_ids == [1, 10]
+
+
+def test_repository_returns_movie_ids_for_every_actor_sharing_a_name(in_memory_repo):
+    # 'michael' matches Michael Fassbender, Michael Sheen and Michael Stuhlbarg.
+    movie_ids = in_memory_repo.get_movie_ids_for_actor('michael')
+
+    assert movie_ids == [2, 10, 20]
+
+
+def test_repository_returns_movie_ids_for_every_director_sharing_a_name(in_memory_repo):
+    movie_ids = in_memory_repo.get_movie_ids_for_director('james')
+
+    assert movie_ids == [1, 9]
+
+
+def test_repository_can_find_movies_for_an_added_director(in_memory_repo):
+    movie = in_memory_repo.get_movie(3)
+    director = Director('jane campion')
+    make_director_association(movie, director)
+    in_memory_repo.add_director(director)
+
+    assert in_memory_repo.get_movie_ids_for_director('jane campion') == [3]
+    assert in_memory_repo.get_movie_ids_for_director('campion') == [3]
+
+
+def test_repository_returns_movie_ids_for_title_word(in_memory_repo):
+    movie_ids = in_memory_repo.get_movie_ids_for_title('the')
+
+    assert movie_ids == [1, 6, 9, 16]
+
+
+def test_repository_returns_movie_ids_for_title_phrase(in_memory_repo):
+    assert in_memory_repo.get_movie_ids_for_title('The Great Wall') == [6]
+    assert in_memory_repo.get_movie_ids_for_title('the great') == [6]
+    assert in_memory_repo.get_movie_ids_for_title('great the') == []
+
+
+def test_repository_returns_movie_ids_for_all_title_words(in_memory_repo):
+    movie_ids = in_memory_repo.get_movie_ids_for_title('great the', match_phrase=False)
+
+    assert movie_ids == [6]
+
+
+def test_repository_can_retrieve_dates(in_memory_repo):
+    assert in_memory_repo.get_dates() == [2012, 2014, 2016]
+
+
+def test_repository_returns_sorted_movie_ids_for_date(in_memory_repo):
+    movie_ids = in_memory_repo.get_movie_ids_for_date('2016')
+
+    assert movie_ids == sorted(movie_ids)
+    assert len(movie_ids) == 18
+
+
+def test_repository_returns_movie_ids_for_date_range(in_memory_repo):
+    assert in_memory_repo.get_movie_ids_for_date_range(2010, 2014) == [2, 1]
+    assert in_memory_repo.get_movie_ids_for_date_range(2017, 2020) == []
+
+
+def test_repository_indexes_date_of_added_movie(in_memory_repo):
+    in_memory_repo.add_movie(Movie('test movie', 1997, 1001))
+
+    assert in_memory_repo.get_dates() == [1997, 2012, 2014, 2016]
+    assert in_memory_repo.get_movie_ids_for_date('1997') == [1001]
+
+
+def test_repository_can_add_an_image_link(in_memory_repo):
+    movie = in_memory_repo.get_movie(2)
+    in_memory_repo.add_image_link('prometheus.jpg', movie)
+
+    assert in_memory_repo.get_movie(2).image_hyperlink == 'prometheus.jpg'
+
+
+def test_repository_can_add_image_links_in_bulk(in_memory_repo):
+    in_memory_repo.add_image_links({1: 'guardians.jpg', 2: 'prometheus.jpg'})
+
+    assert in_memory_repo.get_movie(1).image_hyperlink == 'guardians.jpg'
+    assert in_memory_repo.get_movie(2).image_hyperlink == 'prometheus.jpg'
+
+
+def test_repository_does_not_add_image_links_for_non_existent_movies(in_memory_repo):
+    with pytest.raises(RepositoryException):
+        in_memory_repo.add_image_links({1: 'guardians.jpg', 1001: 'missing.jpg'})
+
+    assert in_memory_repo.get_movie(1).image_hyperlink == ''
+
+
+def test_repository_returns_movie_ids_for_attribute_range(in_memory_repo):
+    movie_ids = in_memory_repo.get_movie_ids_for_attribute_range('rating', minimum=7.5)
+
+    assert movie_ids == [1, 7, 11, 12, 13, 14, 17, 19, 20]
+    assert in_memory_repo.get_movie_ids_for_attribute_range('revenue', minimum=300) == [1, 5, 13, 16]
+
+
+def test_repository_does_not_filter_on_unknown_attribute(in_memory_repo):
+    with pytest.raises(ValueError):
+        in_memory_repo.get_movie_ids_for_attribute_range('title', minimum=1)
+
+
+def test_repository_returns_leaderboard_pages(in_memory_repo):
+    assert in_memory_repo.get_leaderboard_movie_ids('rating', 0, 4) == [7, 17, 1, 19]
+    assert in_memory_repo.get_leaderboard_movie_ids('votes', 1, 3) == [2, 5, 20]
+    assert in_memory_repo.get_leaderboard_movie_ids('rating', 18, 5) == [5, 6]
+
+    # Movie 8 has no revenue, so it isn't ranked.
+    assert in_memory_repo.get_leaderboard_length('revenue') == 19
+    assert 8 not in in_memory_repo.get_leaderboard_movie_ids('revenue', 0, 20)
+
+
+def test_repository_ranks_added_movies(in_memory_repo):
+    movie = Movie('top movie', 1997, 1001)
+    movie.rating = 9.5
+    movie.votes = 10
+    in_memory_repo.add_movie(movie)
+
+    assert in_memory_repo.get_leaderboard_movie_ids('rating', 0, 2) == [1001, 7]
+    assert in_memory_repo.get_leaderboard_movie_ids('votes', 20) == [1001]
+    assert in_memory_repo.get_leaderboard_length('rating') == 21
+
+
+def test_repository_has_no_leaderboard_for_unknown_attribute(in_memory_repo):
+    with pytest.raises(ValueError):
+        in_memory_repo.get_leaderboard_movie_ids('metascore')
+    with pytest.raises(ValueError):
+        in_memory_repo.get_leaderboard_length('title')
+
+
+def test_repository_returns_mean_attribute_by_genre(in_memory_repo):
+    means = in_memory_repo.get_attribute_mean_by_genre('rating')
+
+    assert len(means) == 15
+    assert means['horror'] == pytest.approx(7.3)
+    assert means['history'] == pytest.approx(8.0)
+
+
+def test_repository_returns_total_attribute_by_date(in_memory_repo):
+    totals = in_memory_repo.get_attribute_total_by_date('revenue')
+
+    assert set(totals) == {2012, 2014, 2016}
+    assert totals[2012] == pytest.approx(126.46)
+    assert totals[2014] == pytest.approx(333.13)
+
+
+def test_repository_returns_movie_ids_for_facets(in_memory_repo):
+    movie_ids = in_memory_repo.get_movie_ids_for_facets(['action'], minimum_rating=7)
+    assert movie_ids == [1, 9, 13]
+
+    movie_ids = in_memory_repo.get_movie_ids_for_facets(['action', 'adventure'], actor_name='chris', start_date=2013)
+    assert movie_ids == [1]
+
+    assert in_memory_repo.get_movie_ids_for_facets(['action'], end_date=2013) == []
+
+
+def test_repository_returns_movie_ids_for_range_facets(in_memory_repo):
+    movies = in_memory_repo.get_movies()
+
+    movie_ids = in_memory_repo.get_movie_ids_for_facets(start_date=2014, minimum_rating=7)
+    assert movie_ids == sorted(movie.id for movie in movies
+                               if movie.date is not None and movie.date >= 2014 and movie.rating >= 7)
+
+    movie_ids = in_memory_repo.get_movie_ids_for_facets(minimum_rating=8)
+    assert movie_ids == sorted(movie.id for movie in movies if movie.rating >= 8)
+
+
+def test_repository_returns_every_movie_id_without_facets(in_memory_repo):
+    assert in_memory_repo.get_movie_ids_for_facets() == list(range(1, 21))
+
+
+def test_repository_returns_facet_counts(in_memory_repo):
+    counts = in_memory_repo.get_facet_counts([1, 9, 13])
+
+    assert counts['genre'] == {'action': 3, 'adventure': 3, 'sci-fi': 2, 'biography': 1}
+    assert counts['date'] == {2014: 1, 2016: 2}
+
+
+def test_repository_returns_name_completions_by_votes(in_memory_repo):
+    completions = in_memory_repo.get_name_completions('Chr', 3)
+
+    assert completions == [('chris pratt', 'actor'), ('chris renaud', 'director'), ('christophe lourdelet', 'director')]
+
+
+def test_repository_completes_later_words_of_names(in_memory_repo):
+    assert ('the great wall', 'title') in in_memory_repo.get_name_completions('wall')
+    assert in_memory_repo.get_name_completions('zzz') == []
+
+
+def test_repository_completes_added_names(in_memory_repo):
+    in_memory_repo.get_name_completions('mot')
+    in_memory_repo.add_genre(Genre('motoring'))
+
+    assert in_memory_repo.get_name_completions('mot') == [('motoring', 'genre')]
+
+
+def test_repository_returns_name_suggestions_for_misspelt_words(in_memory_repo):
+    assert in_memory_repo.get_name_suggestions('galxy')[0] == ('guardians of the galaxy', 'title', 1)
+    assert in_memory_repo.get_name_suggestions('chirs prat') == [('chris pratt', 'actor', 2)]
+
+
+def test_repository_orders_name_suggestions_by_distance(in_memory_repo):
+    suggestions = in_memory_repo.get_name_suggestions('jams')
+
+    assert [distance for _, _, distance in suggestions] == [1, 1, 1, 2]
+    assert ('james gunn', 'director', 1) in suggestions
+
+
+def test_repository_returns_top_collaborators(in_memory_repo):
+    collaborators = in_memory_repo.get_top_collaborators(('chris pratt', 'actor'), 3)
+
+    assert collaborators == [('bradley cooper', 'actor', 1), ('james gunn', 'director', 1),
+                             ('jennifer lawrence', 'actor', 1)]
+    assert len(in_memory_repo.get_top_collaborators(('chris pratt', 'actor'), 10)) == 8
+    assert in_memory_repo.get_top_collaborators(('nobody', 'actor')) == []
+
+
+def test_repository_returns_collaboration_path(in_memory_repo):
+    path = in_memory_repo.get_collaboration_path(('vin diesel', 'actor'), ('michael sheen', 'actor'))
+
+    assert path == [('vin diesel', 'actor'), ('chris pratt', 'actor'), ('michael sheen', 'actor')]
+    assert in_memory_repo.get_collaboration_path(('james gunn', 'director'), ('vin diesel', 'actor')) == \
+           [('james gunn', 'director'), ('vin diesel', 'actor')]
+    assert in_memory_repo.get_collaboration_path(('vin diesel', 'actor'), ('vin diesel', 'actor')) == \
+           [('vin diesel', 'actor')]
+
+
+def test_repository_returns_no_path_between_unconnected_people(in_memory_repo):
+    assert in_memory_repo.get_collaboration_path(('vin diesel', 'actor'), ('matt damon', 'actor')) == []
+    assert in_memory_repo.get_collaboration_path(('vin diesel', 'actor'), ('nobody', 'actor')) == []
+
+
+def test_repository_returns_similar_movie_ids(in_memory_repo):
+    # Rogue One shares all three genres with Guardians of the Galaxy, The Lost City of Z two of them.
+    assert in_memory_repo.get_similar_movie_ids(1, 2) == [13, 9]
+    assert 1 not in in_memory_repo.get_similar_movie_ids(1, 10)
+    assert in_memory_repo.get_similar_movie_ids(999) == []
+
+
+def test_repository_returns_related_movie_ids(in_memory_repo):
+    # Split's description shares uncommon terms with those of Arrival, Hacksaw Ridge and Mindhorn.
+    assert in_memory_repo.get_related_movie_ids(3, 3) == [20, 17, 8]
+    assert 3 not in in_memory_repo.get_related_movie_ids(3, 10)
+    assert in_memory_repo.get_related_movie_ids(999) == []
+
+
+
+def test_repository_returns_no_name_suggestions_for_distant_words(in_memory_repo):
+    assert in_memory_repo.get_name_suggestions('qqqq') == []
+
+
+def test_repository_returns_movie_ids_for_description_best_match_first(in_memory_repo):
+    movie_ids = in_memory_repo.get_movie_ids_for_description('intergalactic warrior')
+
+    assert movie_ids[0] == 1
+
+
+def test_repository_returns_an_empty_list_for_unmatched_description(in_memory_repo):
+    assert in_memory_repo.get_movie_ids_for_description('zzz') == []
+    assert in_memory_repo.get_movie_ids_for_description('the of and') == []
+
+
+def test_repository_indexes_description_of_added_movie(in_memory_repo):
+    movie = Movie('test movie', 1997, 1001)
+    movie.description = 'A lighthouse keeper befriends a walrus.'
+    in_memory_repo.add_movie(movie)
+
+    assert in_memory_repo.get_movie_ids_for_description('walrus lighthouse') == [1001]
+
+
+def test_load_users_keeps_pre_hashed_passwords(in_memory_repo, tmp_path):
+    password_hash = generate_password_hash('Dave1234', method='pbkdf2:sha256:1000')
+    (tmp_path / 'users.csv').write_text('id,username,password,password-hash\n'
+                                        f'1,dave,,{password_hash}\n'
+                                        '2,erin,Erin1234,\n')
+
+    users = load_users(str(tmp_path), in_memory_repo, 'pbkdf2:sha256:1000')
+
+    assert in_memory_repo.get_user('dave').password == password_hash
+    assert users['2'].password.startswith('pbkdf2:sha256:1000$')
+    assert check_password_hash(users['2'].password, 'Erin1234')
+
+
+def test_hash_passwords_in_parallel():
+    passwords = [f'password{number}' for number in range(PARALLEL_HASH_MINIMUM * 2)]
+
+    password_hashes = hash_passwords(passwords, 'pbkdf2:sha256:1000')
+
+    assert all(check_password_hash(password_hash, password)
+               for password, password_hash in zip(passwords, password_hashes))
+
+
+def test_read_movie_records_in_parallel_chunks_matches_reading_in_turn(monkeypatch):
+    filename = os.path.join(conftest.TEST_DATA_PATH, 'Data1000Movies.csv')
+    records = memory_repository.read_movie_records(filename)
+
+    # Parse even the small test file in many chunks, however many cores there are.
+    monkeypatch.setattr(memory_repository, 'PARALLEL_LOAD_MINIMUM_BYTES', 0)
+    monkeypatch.setattr(os, 'cpu_count', lambda: 2)
+    monkeypatch.setattr(memory_repository, 'MINIMUM_CHUNK_BYTES', 512)
+
+    assert len(memory_repository.chunk_ranges(filename, os.path.getsize(filename), 512)) > 1
+    assert memory_repository.read_movie_records(filename) == records
+    assert records[0][5][:2] == ['chris pratt', 'vin diesel']
+
+
+def test_read_movie_records_handles_rows_spanning_lines(monkeypatch, tmp_path):
+    filename = tmp_path / 'Data1000Movies.csv'
+    filename.write_text('Rank,Title,Genre,Description,Director,Actors,Year,Runtime (Minutes),Rating,Votes,'
+                        'Revenue (Millions),Metascore\n'
+                        '1,First,Drama,"Two\nlines",Jane Doe,"Ann Lee, Bo Ma",2010,100,7.5,1000,N/A,60\n'
+                        '2,Second,Comedy,One line,John Doe,Cy Ng,2011,90,6.5,2000,12.5,N/A\n')
+    monkeypatch.setattr(memory_repository, 'PARALLEL_LOAD_MINIMUM_BYTES', 0)
+    monkeypatch.setattr(memory_repository, 'MINIMUM_CHUNK_BYTES', 16)
+    monkeypatch.setattr(os, 'cpu_count', lambda: 2)
+
+    records = memory_repository.read_movie_records(str(filename))
+
+    assert [record[0] for record in records] == [1, 2]
+    assert records[0][3] == 'Two\nlines'
+    assert records[0][5] == ['ann lee', 'bo ma']
+
+
+def test_read_movie_records_in_parallel_keeps_unicode_line_separators_in_fields(monkeypatch, tmp_path):
+    filename = tmp_path / 'Data1000Movies.csv'
+    filename.write_text('Rank,Title,Genre,Description,Director,Actors,Year,Runtime (Minutes),Rating,Votes,'
+                        'Revenue (Millions),Metascore\n'
+                        '1,First,Drama,Part one\u2028part\x0ctwo,Jane Doe,Ann Lee,2010,100,7.5,1000,N/A,60\n'
+                        '2,Second,Comedy,Next\x85line,John Doe,Cy Ng,2011,90,6.5,2000,12.5,N/A\n', encoding='utf-8')
+    serial = memory_repository.read_movie_records(str(filename))
+    monkeypatch.setattr(memory_repository, 'PARALLEL_LOAD_MINIMUM_BYTES', 0)
+    monkeypatch.setattr(memory_repository, 'MINIMUM_CHUNK_BYTES', 16)
+    monkeypatch.setattr(os, 'cpu_count', lambda: 2)
 
+    assert memory_repository.parse_movie_chunk(str(filename), *memory_repository.chunk_ranges(
+        str(filename), filename.stat().st_size, 1 << 20)[0]) == serial
+    assert memory_repository.read_movie_records(str(filename)) == serial
+    assert serial[0][3] == 'Part one\u2028part\x0ctwo'
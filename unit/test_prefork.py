@@ -0,0 +1,73 @@
+import gc
+import sys
+from types import SimpleNamespace
+
+import conftest
+import pytest
+from A2 import create_app, prefork
+from A2.adapters import memory_repository, repository
+from A2.adapters.database_repository import SqliteRepository
+from A2.adapters.data_watcher import DataWatcher
+from A2.adapters.memory_repository import MemoryRepository
+
+
+def test_restart_after_fork_enables_collection_and_restarts_the_watcher():
+    repo = MemoryRepository()
+    memory_repository.populate(conftest.TEST_DATA_PATH, repo, password_method=conftest.TEST_PASSWORD_METHOD)
+    watcher = DataWatcher(conftest.TEST_DATA_PATH, repo, interval=60)
+    app = SimpleNamespace(data_watcher=watcher)
+
+    prefork.disable_collection()
+    try:
+        prefork.restart_after_fork(app)
+        assert gc.isenabled()
+        assert app.data_watcher is not watcher and app.data_watcher.is_alive()
+        assert app.data_watcher.check() == {}
+    finally:
+        gc.enable()
+        app.data_watcher.stop()
+
+
+@pytest.mark.skipif(not sys.platform.startswith('linux'), reason='memory usage is read from /proc')
+def test_memory_usage_splits_resident_memory():
+    usage = prefork.memory_usage()
+
+    assert usage['rss'] > 0
+    assert usage['shared'] + usage['private'] == usage['rss']
+
+
+def test_a_preloading_master_leaves_the_watcher_to_the_workers(monkeypatch):
+    monkeypatch.setattr(prefork, 'preloading', False)
+    prefork.defer_threads()
+    app = create_app({
+        'TESTING': True,
+        'TEST_DATA_PATH': conftest.TEST_DATA_PATH,
+        'PASSWORD_HASH_METHOD': conftest.TEST_PASSWORD_METHOD,
+        'SNAPSHOT_PATH': None,
+        'JOURNAL_PATH': None,
+        'WATCH_DATA': True,
+        'WATCH_INTERVAL': 60
+    })
+    assert not app.data_watcher.is_alive()
+
+    try:
+        prefork.restart_after_fork(app)
+        assert app.data_watcher.is_alive()
+    finally:
+        gc.enable()
+        app.data_watcher.stop()
+
+
+def test_restart_after_fork_closes_inherited_sqlite_connections(monkeypatch, tmp_path):
+    sqlite_repo = SqliteRepository(str(tmp_path / 'movies.db'))
+    memory_repository.populate(conftest.TEST_DATA_PATH, sqlite_repo, password_method=conftest.TEST_PASSWORD_METHOD)
+    inherited = sqlite_repo._connection()
+    monkeypatch.setattr(repository, 'repo_instance', sqlite_repo)
+
+    try:
+        prefork.restart_after_fork(SimpleNamespace())
+        assert sqlite_repo._connection() is not inherited
+        assert sqlite_repo.get_number_of_movies() == 20
+    finally:
+        gc.enable()
+        sqlite_repo.close()
@@ -28,6 +28,11 @@ def test_cannot_add_user_with_existing_name(in_memory_repo):
         auth_services.add_user(username, password, in_memory_repo)
 
 
+def test_username_availability(in_memory_repo):
+    assert not auth_services.is_username_available('thorke', in_memory_repo)
+    assert auth_services.is_username_available('jz', in_memory_repo)
+
+
 def test_authentication_with_valid_credentials(in_memory_repo):
     new_username = 'pmccartney'
     new_password = 'abcd1A23'
@@ -95,6 +100,18 @@ def test_can_get_movie(in_memory_repo):
     assert 'mystery' in genre_names
 
 
+def test_can_add_image_links(in_memory_repo):
+    news_services.add_image_links({2: 'prometheus.jpg', 3: 'split.jpg'}, in_memory_repo)
+
+    assert news_services.get_movie(2, in_memory_repo)['image_hyperlink'] == 'prometheus.jpg'
+    assert news_services.get_movie(3, in_memory_repo)['image_hyperlink'] == 'split.jpg'
+
+
+def test_cannot_add_image_links_for_non_existent_movie(in_memory_repo):
+    with pytest.raises(news_services.NonExistentMovieException):
+        news_services.add_image_links({2: 'prometheus.jpg', 1001: 'missing.jpg'}, in_memory_repo)
+
+
 def test_cannot_get_movie_with_non_existent_id(in_memory_repo):
     movie_id = 1001
 
@@ -136,6 +153,12 @@ def test_get_movies_by_date_with_multiple_dates(in_memory_repo):
 
 
 
+def test_get_movies_by_date_range(in_memory_repo):
+    movie_ids = news_services.get_movie_ids_for_date('2010-2014', in_memory_repo)
+
+    assert movie_ids == [2, 1]
+
+
 def test_get_movies_by_date_with_non_existent_date(in_memory_repo):
     target_date = '2222'
 
@@ -157,6 +180,32 @@ def test_get_movies_by_id(in_memory_repo):
     assert set([5, 6]).issubset(movie_ids)
 
 
+def test_get_similar_movies(in_memory_repo):
+    similar_movies = news_services.get_similar_movies(1, in_memory_repo, 2)
+
+    assert similar_movies == [{'id': 13, 'title': 'rogue one', 'date': 2016},
+                              {'id': 9, 'title': 'the lost city of z', 'date': 2016}]
+
+
+def test_get_related_movies(in_memory_repo):
+    related_movies = news_services.get_related_movies(2, in_memory_repo, 2)
+
+    assert related_movies == [{'id': 12, 'title': 'hidden figures', 'date': 2016},
+                              {'id': 10, 'title': 'passengers', 'date': 2016}]
+
+
+def test_get_leaderboard(in_memory_repo):
+    movies = news_services.get_leaderboard('votes', in_memory_repo, 0, 2)
+
+    assert [movie['title'] for movie in movies] == ['guardians of the galaxy', 'prometheus']
+    assert news_services.get_leaderboard_length('votes', in_memory_repo) == 20
+
+
+def test_get_unknown_leaderboard(in_memory_repo):
+    with pytest.raises(news_services.UnknownLeaderboardException):
+        news_services.get_leaderboard('title', in_memory_repo)
+
+
 def test_get_comments_for_movie(in_memory_repo):
     comments_as_dict = news_services.get_comments_for_movie(1, in_memory_repo)
 
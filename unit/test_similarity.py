@@ -0,0 +1,32 @@
+from A2.adapters.similarity import BAND_ROWS, BUCKET_CANDIDATES, NUM_PERMUTATIONS, SimilarityIndex
+
+
+def test_index_ranks_movies_by_shared_features():
+    entries = [(1, ['genre:action', 'genre:sci-fi', 'actor:a', 'actor:b', 'director:c']),
+               (2, ['genre:action', 'genre:sci-fi', 'actor:a', 'actor:b', 'director:d']),
+               (3, ['genre:action', 'genre:sci-fi', 'actor:e', 'actor:f', 'director:c']),
+               (4, ['genre:drama', 'actor:g', 'actor:h', 'director:i']),
+               (5, [])]
+    index = SimilarityIndex(entries)
+
+    assert [movie_id for movie_id, _ in index.similar(1)] == [2, 3]
+    assert index.similar(4) == []
+    assert index.similar(5) == []
+    assert index.similar(6) == []
+
+
+def test_index_scores_identical_movies_as_one():
+    index = SimilarityIndex([(1, ['genre:action', 'actor:a']), (2, ['actor:a', 'genre:action', 'actor:a'])])
+
+    assert index.similar(1) == [(2, 1.0)]
+
+
+def test_index_scores_a_bounded_number_of_candidates():
+    # Every Movie shares two genres, which puts most of them in the same buckets.
+    entries = [(movie_id, ['genre:drama', 'genre:action', f'actor:{movie_id}', f'director:{movie_id}'])
+               for movie_id in range(5000)]
+    entries.append((5000, ['genre:drama', 'genre:action', 'actor:0', 'director:0']))
+    index = SimilarityIndex(entries)
+
+    assert len(index.candidates(0)) <= BUCKET_CANDIDATES * NUM_PERMUTATIONS // BAND_ROWS < len(entries) // 2
+    assert index.similar(0, 1) == [(5000, 1.0)]
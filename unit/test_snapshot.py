@@ -0,0 +1,73 @@
+import os
+import shutil
+
+import conftest
+import pytest
+from A2.adapters import memory_repository
+from A2.adapters.memory_repository import MemoryRepository
+
+
+@pytest.fixture
+def data_path(tmp_path):
+    # A copy of the test data, which the tests can change.
+    path = tmp_path / 'data'
+    shutil.copytree(conftest.TEST_DATA_PATH, path)
+    return str(path)
+
+
+def test_populate_writes_a_snapshot_then_loads_it(data_path, tmp_path):
+    snapshot_path = str(tmp_path / 'repository.snapshot')
+
+    timings = memory_repository.populate(data_path, MemoryRepository(), snapshot_path)
+    assert 'movies' in timings and 'snapshot write' in timings
+    assert os.path.exists(snapshot_path)
+
+    repo = MemoryRepository()
+    timings = memory_repository.populate(data_path, repo, snapshot_path)
+    assert list(timings) == ['snapshot read']
+
+    movie = repo.get_movie(1)
+    assert repo.get_number_of_movies() == 20
+    assert movie is repo.get_movies_by_id([1])[0]
+    assert [comment.user.username for comment in movie.comments] == ['fmercury', 'thorke']
+    assert repo.get_user('thorke').password.startswith(('pbkdf2', 'scrypt'))
+    assert repo.get_movie_ids_for_actor('chris pratt') == [1, 10]
+    assert repo.get_name_completions('Chr', 1) == [('chris pratt', 'actor')]
+
+
+def test_populate_ignores_a_snapshot_of_other_data(data_path, tmp_path):
+    snapshot_path = str(tmp_path / 'repository.snapshot')
+    memory_repository.populate(data_path, MemoryRepository(), snapshot_path)
+
+    with open(os.path.join(data_path, 'users.csv'), 'a') as outfile:
+        outfile.write('\n3,dave,Dave1234')
+
+    repo = MemoryRepository()
+    timings = memory_repository.populate(data_path, repo, snapshot_path)
+
+    assert 'users' in timings
+    assert repo.get_user('dave') is not None
+
+
+def test_populate_ignores_a_damaged_snapshot(data_path, tmp_path):
+    snapshot_path = str(tmp_path / 'repository.snapshot')
+    memory_repository.populate(data_path, MemoryRepository(), snapshot_path)
+    with open(snapshot_path, 'r+b') as snapshot:
+        snapshot.truncate(os.path.getsize(snapshot_path) // 2)
+
+    repo = MemoryRepository()
+    timings = memory_repository.populate(data_path, repo, snapshot_path)
+
+    assert 'movies' in timings
+    assert repo.get_number_of_movies() == 20
+
+
+def test_populate_ignores_a_snapshot_written_with_another_password_method(data_path, tmp_path):
+    snapshot_path = str(tmp_path / 'repository.snapshot')
+    memory_repository.populate(data_path, MemoryRepository(), snapshot_path)
+
+    repo = MemoryRepository()
+    timings = memory_repository.populate(data_path, repo, snapshot_path, 'pbkdf2:sha256:1000')
+
+    assert 'users' in timings
+    assert repo.get_user('thorke').password.startswith('pbkdf2:sha256:1000')
@@ -0,0 +1,156 @@
+import threading
+
+import pytest
+from A2.adapters.memory_repository import MemoryRepository, movie_from_record, movie_record, record_of_movie
+from A2.adapters.versioned_repository import VersionedRepository
+from A2.domain.model import *
+
+# Run every repository test against VersionedRepository as well.
+from test_memory_repository import *
+
+
+@pytest.fixture
+def in_memory_repo(in_memory_repo):
+    return VersionedRepository(in_memory_repo)
+
+
+def test_writes_publish_a_new_version(in_memory_repo):
+    version = in_memory_repo.current
+    comments = in_memory_repo.get_comments()
+
+    user = User('dave', '123456789')
+    in_memory_repo.add_user(user)
+    in_memory_repo.comment_on_movie('Seen it twice.', user, in_memory_repo.get_movie(3))
+
+    assert in_memory_repo.current is not version
+    assert version.get_user('dave') is None
+    assert len(comments) == 2 and len(version.get_comments()) == 2
+    assert len(in_memory_repo.get_comments()) == 3
+    assert in_memory_repo.get_user('dave').username == 'dave'
+
+
+def test_catalogue_writes_leave_earlier_versions_whole(in_memory_repo):
+    version = in_memory_repo.current
+    movies = in_memory_repo.get_movies()
+
+    record = movie_record(['21', 'Walrus Bay', 'Drama', 'A lighthouse keeper befriends a walrus.', 'Jane Doe',
+                           'Ann Lee', '2014', '95', '7.1', '1200', 'N/A', 'N/A'])
+    in_memory_repo.add_movies([movie_from_record(record)])
+
+    assert len(movies) == 20 and version.get_number_of_movies() == 20
+    assert version.get_movie(21) is None
+    assert version.get_movie_ids_for_title('walrus bay') == []
+    assert in_memory_repo.get_movie_ids_for_title('walrus bay') == [21]
+    assert in_memory_repo.get_last_movie().id == 21
+    assert 21 in in_memory_repo.get_movie_ids_for_attribute_range('rating', 7.0, 7.2)
+    assert ('walrus bay', 'title') in in_memory_repo.get_name_completions('walrus')
+
+
+def test_comments_leave_earlier_versions_of_movies_and_users_whole(in_memory_repo):
+    user = User('dave', '123456789')
+    in_memory_repo.add_user(user)
+    version = in_memory_repo.current
+    movie = in_memory_repo.get_movie(3)
+    movie_comments = len(movie.comments)
+
+    in_memory_repo.comment_on_movie('Seen it twice.', in_memory_repo.get_user('dave'), movie)
+
+    assert len(movie.comments) == movie_comments and list(version.get_user('dave').comments) == []
+    assert len(in_memory_repo.get_movie(3).comments) == movie_comments + 1
+    assert len(list(in_memory_repo.get_user('dave').comments)) == 1
+    assert in_memory_repo.get_comments()[-1].movie is in_memory_repo.get_movie(3)
+
+
+def test_comments_share_the_unchanged_chunks_of_users(in_memory_repo):
+    in_memory_repo.add_user(User('dave', '123456789'))
+    version = in_memory_repo.current
+
+    in_memory_repo.comment_on_movie('Seen it twice.', in_memory_repo.get_user('dave'), in_memory_repo.get_movie(3))
+
+    assert in_memory_repo.current._users is not version._users
+    assert in_memory_repo.current._users._chunks[:-1] == version._users._chunks[:-1]
+    assert all(ours is theirs for ours, theirs in zip(in_memory_repo.current._users._chunks[:-1],
+                                                      version._users._chunks[:-1]))
+
+
+def test_changed_movie_records_leave_earlier_versions_whole(in_memory_repo):
+    version = in_memory_repo.current
+    movie = in_memory_repo.get_movie(3)
+    genre = movie.genres[0]
+    records = [record_of_movie(other) for other in in_memory_repo.get_movies()]
+    records = [record[:1] + ('walrus bay',) + record[2:9] + (record[9] + 1000,) + record[10:] if record[0] == 3
+               else record for record in records]
+
+    assert in_memory_repo.apply_movie_records(records)['changed'] == 1
+
+    assert movie.title != 'walrus bay' and version.get_movie(3) is movie
+    assert version.get_movie_ids_for_title('walrus bay') == []
+    assert any(other is movie for other in genre.tagged_movies) and genre in version.get_genres()
+    changed = in_memory_repo.get_movie(3)
+    assert changed.title == 'walrus bay' and changed is not movie
+    assert in_memory_repo.get_movie_ids_for_title('walrus bay') == [3]
+    assert all(any(other is changed for other in changed_genre.tagged_movies) for changed_genre in changed.genres)
+    assert ('walrus bay', 'title') in in_memory_repo.get_name_completions('walrus')
+
+
+def test_writes_go_on_while_a_catalogue_write_rebuilds_indexes(in_memory_repo, monkeypatch):
+    building = threading.Event()
+    release = threading.Event()
+    build_name_indexes = MemoryRepository.build_name_indexes
+
+    def slow_build_name_indexes(repo):
+        building.set()
+        assert release.wait(10)
+        build_name_indexes(repo)
+
+    monkeypatch.setattr(MemoryRepository, 'build_name_indexes', slow_build_name_indexes)
+    record = movie_record(['21', 'Walrus Bay', 'Drama', 'A lighthouse keeper befriends a walrus.', 'Jane Doe',
+                           'Ann Lee', '2014', '95', '7.1', '1200', 'N/A', 'N/A'])
+    records = [record_of_movie(movie) for movie in in_memory_repo.get_movies()] + [record]
+    writer = threading.Thread(target=in_memory_repo.apply_movie_records, args=(records,))
+    writer.start()
+    try:
+        assert building.wait(10)
+        user = User('dave', '123456789')
+        in_memory_repo.add_user(user)
+        in_memory_repo.comment_on_movie('Seen it twice.', in_memory_repo.get_user('dave'), in_memory_repo.get_movie(3))
+        assert in_memory_repo.get_movie(21) is None
+    finally:
+        release.set()
+        writer.join()
+
+    assert in_memory_repo.get_movie(21).title == 'walrus bay'
+    assert len(in_memory_repo.get_comments()) == 3
+    assert 'Seen it twice.' in [comment.comment for comment in in_memory_repo.get_movie(3).comments]
+    assert ('walrus bay', 'title') in in_memory_repo.get_name_completions('walrus')
+
+
+def test_readers_run_alongside_writers(in_memory_repo):
+    errors = list()
+    stop = threading.Event()
+
+    def read():
+        try:
+            while not stop.is_set():
+                comments = in_memory_repo.get_comments()
+                count = len(comments)
+                assert sum(1 for _ in comments) == count
+                assert len(in_memory_repo.get_movies()) == 20
+        except Exception as exception:
+            errors.append(exception)
+
+    readers = [threading.Thread(target=read) for _ in range(4)]
+    for reader in readers:
+        reader.start()
+
+    user = User('dave', '123456789')
+    in_memory_repo.add_user(user)
+    for number in range(200):
+        in_memory_repo.comment_on_movie(f'Comment {number}', user, in_memory_repo.get_movie(number % 20 + 1))
+
+    stop.set()
+    for reader in readers:
+        reader.join()
+
+    assert errors == []
+    assert len(in_memory_repo.get_comments()) == 202